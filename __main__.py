@@ -20,9 +20,15 @@ Moving any of these folders or files will prevent the game from working properly
 Author: Walker M. White (wmw2)
 Date:   November 20, 2019
 """
+import sys
+import consts
+
+# The constants must be set before the other modules copy them
+consts.applyArgs(sys.argv[1:])
 from consts import *
 from app import *
 
 # Application code
 if __name__ == '__main__':
-    Invaders(width=GAME_WIDTH,height=GAME_HEIGHT).run()
+    Invaders(width=GAME_WIDTH,height=GAME_HEIGHT,capture=CAPTURE_FILE,
+             preload=PRELOAD_ASSETS).run()
@@ -12,6 +12,11 @@ Date: 12/09/2021
 from consts import *
 from game2d import *
 from wave import *
+from simulation import GameSim
+from replay import ReplayWriter, outcome
+import os
+import random
+import time
 
 
 class Invaders(GameApp):
@@ -37,8 +42,9 @@ class Invaders(GameApp):
     have its own update and draw method.
 
     The primary purpose of this class is to manage the game state: which is
-    when the game started, paused, completed, etc. It keeps track of that in
-    an internal (hidden) attribute.
+    when the game started, paused, completed, etc. It keeps track of that
+    with a GameSim (simulation.py), which plays the wave and moves between
+    the states, while this class shows the messages for them.
 
     For a complete description of how the states work, see the specification
     for the method update.
@@ -50,20 +56,20 @@ class Invaders(GameApp):
     Invariant: input is an instance of GInput (inherited from GameApp)
     """
     # HIDDEN ATTRIBUTES:
-    # Attribute _state: the current state of the game represented as an int
-    # Invariant: _state is one of STATE_INACTIVE, STATE_NEWWAVE, STATE_ACTIVE,
-    # STATE_PAUSED, STATE_CONTINUE, or STATE_COMPLETE
-    #
-    # Attribute _wave: the subcontroller for a single wave, managing aliens
-    # Invariant: _wave is a Wave object, or None if there is no wave currently
-    # active. It is only None if _state is STATE_INACTIVE.
+    # Attribute _game: the state machine of the game, which plays the wave
+    # Invariant: _game is a GameSim object whose waves are Wave objects. Its
+    # wave is only None if its state is STATE_INACTIVE.
     #
     # Attribute _text: the currently active message
     # Invariant: _text is a GLabel object, or None if there is no message to
-    # display. It is onl None if _state is STATE_ACTIVE.
+    # display. It is onl None if the state is STATE_ACTIVE.
+    #
+    # Attribute _seed: the seed of the wave, recorded so it can be replayed
+    # Invariant: _seed is an int >= 0
     #
-    # Attribute _lastkeys: the number of keys held down in the last frame
-    # Invariant: _lastkeys is an int >= 0
+    # Attribute _replay: the recording of this game
+    # Invariant: _replay is a ReplayWriter object, or None if replays are not
+    # recorded (REPLAY_FOLDER is None)
     #
     # You may have new attributes if you wish (you might want an attribute to
     # store any score across multiple waves). But you must document them.
@@ -80,20 +86,26 @@ class Invaders(GameApp):
         attributes.
 
         This method should make sure that all of the attributes satisfy the
-        given invariants. When done, it sets the _state to STATE_INACTIVE and
-        create a message (in attribute _text) saying that the user should press
-        to play a game.
+        given invariants. When done, the game is in state STATE_INACTIVE, with
+        a message (in attribute _text) saying that the user should press to
+        play a game.
         """
-        self._state = STATE_INACTIVE
-        self._wave = None
-        #show text only if _state == STATE_INACTIVE
-        if self._state == STATE_INACTIVE:
-            self._text = GLabel(text="Press 'S' to Play",font_name=\
-            'RetroGame.ttf',font_size=35,x=GAME_WIDTH/2,y=GAME_HEIGHT/2)
-        else:
-            self._text = None
-        self._lastkeys = 0
         self.n = 0
+        self.tick = SIM_TICK
+        self.max_ticks = MAX_TICKS
+        self._seed = random.randrange(2**32)
+        self._game = GameSim(self._seed, ALIEN_ROWS, ALIENS_IN_ROW, \
+        ALIEN_SPEED, self.newWave)
+        self._text = None
+        self.showState()
+        self._replay = None
+        if REPLAY_FOLDER is not None:
+            name = 'replay-%s-%d.txt' % (time.strftime('%Y%m%d-%H%M%S'), \
+            self._seed)
+            path = os.path.join(os.path.dirname(GameApp.images), \
+            REPLAY_FOLDER, name)
+            self._replay = ReplayWriter(path, self._seed, ALIEN_ROWS, \
+            ALIENS_IN_ROW, ALIEN_SPEED, SIM_TICK)
 
     def update(self,dt):
         """
@@ -102,8 +114,9 @@ class Invaders(GameApp):
         It is the method that does most of the work. It is NOT in charge of
         playing the game.  That is the purpose of the class Wave. The primary
         purpose of this game is to determine the current state, and -- if the
-        game is active -- pass the input to the Wave object _wave to play the
-        game.
+        game is active -- pass the input to the Wave object to play the game.
+        Both are done by the GameSim object _game; this method then shows the
+        message for the new state, if the state changed.
 
         As part of the assignment, you are allowed to add your own states.
         However, at a minimum you must support the following states:
@@ -144,16 +157,23 @@ class Invaders(GameApp):
         should
         describe them here.
 
+        The game runs with a fixed timestep (see SIM_TICK in consts), so dt is
+        always SIM_TICK and this method may be called several times (or not at
+        all) per animation frame.
+
+        The keys held down on every call are recorded to a replay file (see
+        REPLAY_FOLDER in consts).  Replays are played back by a GameSim too,
+        so they always move between the states just as the game did.
+
         Parameter dt: The time in seconds since last update
         Precondition: dt is a number (int or float)
         """
-        self.stateInactive()
-        self.stateNewwave()
-        self.stateActive(SHIP_MOVEMENT, self.input, ALIEN_H_WALK, \
-        ALIEN_V_WALK, ALIEN_SPEED, dt)
-        self.statePaused()
-        self.stateContinue()
-        self.stateComplete()
+        if self._replay is not None:
+            self._replay.record(self.input)
+        state = self._game.getState()
+        self._game.update(self.input, dt)
+        if self._game.getState() != state:
+            self.showState()
 
     def draw(self):
         """
@@ -168,91 +188,79 @@ class Invaders(GameApp):
         getters for these attributes or you need to add a draw method to
         class Wave.  We suggest the latter.  See the example subcontroller.py
         from class.
+
+        While the wave is active, moving objects are drawn alpha of the way
+        between the last two updates, so that motion stays smooth between
+        fixed timesteps.
         """
-        if self._wave != None:
-            self._wave.draw(self.view)
+        wave = self._game.getWave()
+        if wave != None:
+            if self._game.getState() == STATE_ACTIVE:
+                wave.draw(self.view, self.alpha)
+            else:
+                wave.draw(self.view)
         if self._text != None:
             self._text.draw(self.view)
 
-    # HELPER METHODS FOR THE STATES GO HERE
-    def stateInactive(self):
-        """
-        Performs tasks for state STATE_INACTIVE.
+    def on_stop(self):
         """
-        #dismiss welcome message if key is held down
-        if self._state == STATE_INACTIVE:
-            keys_held = self.input.key_count
-            if keys_held > 0 and self._lastkeys == 0 and self._state == \
-            STATE_INACTIVE:
-                self._state = STATE_NEWWAVE
-                self._text = None
-            self._lastkeys = keys_held
-
-    def stateNewwave(self):
-        """
-        Performs tasks for state STATE_NEWWAVE.
-        """
-        #create wave and switch to state_active after one animation frame
-        if self._state == STATE_NEWWAVE:
-            self._wave = Wave()
-            self._state = STATE_ACTIVE
+        Closes the replay file when the application quits.
 
-    def stateActive(self, ship_amount, input, alien_hor_amount, \
-    alien_vert_amount, speed, dt):
+        This is a Kivy event handler, called when the window is closed.
         """
-        Performs tasks for state STATE_ACTIVE.
+        self.closeReplay()
 
-        Precondition: ship_amount is an int or float
-        Precondition: input is an instance of GInput
-        Precondition: alien_amount is an int or float
-        Precondition: speed is an int or float
-        Precondition: dt is an int or float
-        """
-        if self._state == STATE_ACTIVE:
-            self._wave.update(ship_amount, input, alien_hor_amount, \
-            alien_vert_amount, speed, dt)
-            if self._wave.getShip() == None:
-                self._state = STATE_PAUSED
-            if self._wave.wonGame():
-                self._text = GLabel(text="Nice Job!",font_name='RetroGame.ttf',\
-                font_size=35,x=GAME_WIDTH/2,y=GAME_HEIGHT/2)
-                self._state = STATE_COMPLETE
-            if self._wave.aliensCross():
-                self._text = GLabel(text="Better Luck Next Time",font_name=\
-                'RetroGame.ttf', font_size=35,x=GAME_WIDTH/2,y=GAME_HEIGHT/2)
-                self._state = STATE_COMPLETE
-
-    def statePaused(self):
+    # HELPER METHODS FOR THE STATES GO HERE
+    def showState(self):
         """
-        Performs tasks for state STATE_PAUSED.
+        Shows the message for the current state of the game.
+
+        Call this whenever the state changes.  Once the game is complete, this
+        also closes the replay file.
         """
-        if self._state == STATE_PAUSED:
-            if self._wave.moreLives():
-                self._text = GLabel(text="Press 'S' to Continue Playing",\
-                font_name='RetroGame.ttf',font_size=35,x=GAME_WIDTH/2,y=\
-                GAME_HEIGHT/2)
-                keys_held = self.input.key_count
-                if keys_held > 0 and self._lastkeys == 0:
-                    self._text = None
-                    self._state = STATE_CONTINUE
-                self._lastkeys = keys_held
+        state = self._game.getState()
+        wave = self._game.getWave()
+        text = None
+        if state == STATE_INACTIVE:
+            text = "Press 'S' to Play"
+        elif state == STATE_PAUSED:
+            text = "Press 'S' to Continue Playing"
+        elif state == STATE_COMPLETE:
+            if wave.wonGame() and not wave.aliensCross():
+                text = "Nice Job!"
             else:
-                self._text = GLabel(text="Better Luck Next Time",font_name=\
-                'RetroGame.ttf',font_size=35,x=GAME_WIDTH/2,y=GAME_HEIGHT/2)
-                self._wave.clearBolts()
-                self._state = STATE_COMPLETE
+                text = "Better Luck Next Time"
+            self.closeReplay()
+        if text is None:
+            self._text = None
+        elif self._text == None or self._text.text != text:
+            self._text = GLabel(text=text,font_name='RetroGame.ttf',\
+            font_size=35,x=GAME_WIDTH/2,y=GAME_HEIGHT/2)
 
-    def stateContinue(self):
-        """
-        Performs tasks for state STATE_CONTINUE.
+    def newWave(self, rows, cols, seed):
         """
-        if self._state == STATE_CONTINUE:
-            self._wave.newShip()
-            self._state = STATE_ACTIVE
+        Returns a new Wave, for state STATE_NEWWAVE.
 
-    def stateComplete(self):
+        This is the factory of _game.  Wave always has ALIEN_ROWS rows of
+        ALIENS_IN_ROW aliens, which is what _game is given.
+
+        Precondition: rows is ALIEN_ROWS
+        Precondition: cols is ALIENS_IN_ROW
+        Precondition: seed is an int, or None
+        """
+        # the images are normally preloaded while the game is inactive, but
+        # a quick player may start before they are all loaded
+        self.finish_preload()
+        if self._game.getWave() != None:
+            self._game.getWave().hide()
+        return Wave(seed)
+
+    def closeReplay(self):
         """
-        Performs tasks for state STATE_COMPLETE.
+        Closes the replay file (if any), recording the outcome of the game.
         """
-        if self._state == STATE_COMPLETE:
-            pass
+        if self._replay is not None and not self._replay.isClosed():
+            wave = self._game.getWave()
+            sim = None if wave is None else wave.getSim()
+            self._replay.close(outcome(self._game.getState(), sim, \
+            self._replay.getTicks()))
@@ -0,0 +1,354 @@
+"""
+Batch simulation module for Alien Invaders
+
+This module plays many independent games of Alien Invaders without a window,
+spread over a pool of worker processes (one per core by default).  Every game
+is a single wave played by a ship policy: a function that looks at the wave
+and returns the keys to hold down.  The results of the games are streamed
+back as they finish and added up into a Summary.  This is what we use to try
+out balancing changes, instead of playing the game by hand.
+
+Games are configured with a dictionary of the consts.py constants that may
+be changed: ALIEN_ROWS, ALIENS_IN_ROW, ALIEN_SPEED and BOLT_RATE.  Game n of a
+batch is seeded with seed+n, so a batch run twice with the same settings
+gives the same results (in whatever order they finish).
+
+To run a batch from the command line, type (for example)
+
+    python batch.py --games 10000 --policy tracker --speed 0.5 --rate 3
+
+Type python batch.py --help for the complete list of options.  A policy may
+also be given as module:function, for a function in some other module.
+"""
+from consts import *
+from simulation import SimInput, WaveSim
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+
+# the consts.py constants that a game can be configured with
+PARAMETERS = ('ALIEN_ROWS', 'ALIENS_IN_ROW', 'ALIEN_SPEED', 'BOLT_RATE')
+
+# the most updates a single game may last before it is abandoned (an hour of
+# play at the fixed timestep)
+GAME_LIMIT = int(3600/SIM_TICK)
+
+
+# SHIP POLICIES
+def idle(wave, rng):
+    """
+    Returns the keys for a ship that never moves or fires.
+
+    Precondition: wave is a WaveSim object with a ship
+    Precondition: rng is a random.Random object
+    """
+    return ()
+
+
+def flail(wave, rng):
+    """
+    Returns random keys: the ship wanders left and right, firing at random.
+
+    Precondition: wave is a WaveSim object with a ship
+    Precondition: rng is a random.Random object
+    """
+    keys = []
+    move = rng.random()
+    if move < 0.4:
+        keys.append('left')
+    elif move < 0.8:
+        keys.append('right')
+    if rng.random() < 0.5:
+        keys.append('up')
+    return keys
+
+
+def tracker(wave, rng):
+    """
+    Returns the keys for a ship that moves under the nearest column with a
+    living alien and fires once it is lined up.
+
+    Precondition: wave is a WaveSim object with a ship
+    Precondition: rng is a random.Random object
+    """
+    aliens = wave.getAliens()
+    if aliens.isEmpty():
+        return ()
+    columns = aliens.alive.any(axis=0).nonzero()[0]
+    centers = aliens.left[0, columns] + ALIEN_WIDTH/2
+    x = wave.getShip().x
+    target = float(centers[abs(centers - x).argmin()])
+    keys = []
+    if target < x - SHIP_MOVEMENT:
+        keys.append('left')
+    elif target > x + SHIP_MOVEMENT:
+        keys.append('right')
+    if abs(target - x) < ALIEN_WIDTH/2:
+        keys.append('up')
+    return keys
+
+
+# the built-in policies, by name
+POLICIES = {'idle': idle, 'flail': flail, 'tracker': tracker}
+
+
+def findPolicy(name):
+    """
+    Returns the ship policy called name.
+
+    A name is either one of the keys of POLICIES, or module:function for a
+    function in another (importable) module.  Policies are passed to the
+    workers by name, since functions cannot always be sent to them.
+
+    Precondition: name is a string naming a policy
+    """
+    if name in POLICIES:
+        return POLICIES[name]
+    assert ':' in name, '%s is not a known policy' % repr(name)
+    module, function = name.split(':', 1)
+    return getattr(importlib.import_module(module), function)
+
+
+def defaults():
+    """
+    Returns a dictionary of the game parameters as set in consts.py.
+    """
+    return {'ALIEN_ROWS': ALIEN_ROWS, 'ALIENS_IN_ROW': ALIENS_IN_ROW, \
+    'ALIEN_SPEED': ALIEN_SPEED, 'BOLT_RATE': BOLT_RATE}
+
+
+# PLAYING GAMES
+def playGame(task):
+    """
+    Plays a single game, returning its result as a dictionary.
+
+    The task is a tuple (game, seed, params, policy, limit), where game is
+    the number of the game in the batch, seed is the seed of the wave, params
+    is a dictionary of PARAMETERS, policy is the name of a ship policy and
+    limit is the most updates to play.  When the ship is destroyed, a new one
+    is made straight away (as if the player pressed a key at once).
+
+    The result has the keys game, seed, result ('won', 'lost' or 'timeout'),
+    ticks (the number of updates played), lives_lost, shots (the number of
+    bolts the player fired) and aliens (the number left).
+
+    Precondition: task is a tuple as described above
+    """
+    game, seed, params, policy, limit = task
+    play = findPolicy(policy)
+    wave = WaveSim(params['ALIEN_ROWS'], params['ALIENS_IN_ROW'], seed, \
+    params['BOLT_RATE'])
+    speed = params['ALIEN_SPEED']
+    rng = random.Random('policy-%d' % seed)
+    inputs = {}
+    result = 'timeout'
+    ticks = 0
+    while ticks < limit:
+        keys = frozenset(play(wave, rng))
+        if keys not in inputs:
+            inputs[keys] = SimInput(keys)
+        wave.update(SHIP_MOVEMENT, inputs[keys], ALIEN_H_WALK, ALIEN_V_WALK, \
+        speed, SIM_TICK)
+        ticks += 1
+        if wave.wonGame():
+            result = 'won'
+            break
+        if wave.aliensCross():
+            result = 'lost'
+            break
+        if wave.getShip() is None:
+            if not wave.moreLives():
+                result = 'lost'
+                break
+            wave.newShip()
+    return {'game': game, 'seed': seed, 'result': result, 'ticks': ticks, \
+    'lives_lost': SHIP_LIVES - wave.getLives(), 'shots': wave.getShots(), \
+    'aliens': int(wave.getAliens().count())}
+
+
+def run(games, params=None, policy='tracker', seed=0, workers=None, \
+limit=GAME_LIMIT):
+    """
+    Plays games games, yielding the result of each as soon as it finishes.
+
+    Results come back in the order the games finish, which is not the order
+    of the games.  If workers is 1, the games are played in this process,
+    one after the other (which is easiest to profile).
+
+    Precondition: games is an int >= 0
+    Precondition: params is a dictionary of some of PARAMETERS (the rest
+    are taken from consts.py), or None
+    Precondition: policy is a string naming a policy (see findPolicy)
+    Precondition: seed is an int, the seed of the first game
+    Precondition: workers is an int > 0, or None for one per core
+    Precondition: limit is an int > 0
+    """
+    settings = defaults()
+    if params is not None:
+        for key in params:
+            assert key in PARAMETERS, '%s is not a game parameter' % repr(key)
+        settings.update(params)
+    findPolicy(policy)
+    tasks = ((n, seed+n, settings, policy, limit) for n in range(games))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 1:
+        for task in tasks:
+            yield playGame(task)
+        return
+    chunk = max(1, games // (workers*16))
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap_unordered(playGame, tasks, chunk):
+            yield result
+
+
+class Summary(object):
+    """
+    A class to add up the results of a batch of games.
+
+    Add each result to the summary as it comes back from run.  The summary
+    keeps totals rather than the results themselves, so it takes the same
+    space however many games are played.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _games: the number of results added
+    # Invariant: _games is an int >= 0
+    #
+    # Attribute _outcomes: the number of games with each result
+    # Invariant: _outcomes is a dict mapping 'won', 'lost' and 'timeout' to
+    # ints >= 0 that sum to _games
+    #
+    # Attribute _clears: the ticks taken by each won game, in total, least
+    # and most
+    # Invariant: _clears is a list [total, least, most] of ints, where least
+    # and most are None if no game was won
+    #
+    # Attribute _ticks: the number of updates played over all games
+    # Invariant: _ticks is an int >= 0
+    #
+    # Attribute _lives: the number of lives lost over all games
+    # Invariant: _lives is an int >= 0
+    #
+    # Attribute _shots: the number of bolts fired over all games
+    # Invariant: _shots is an int >= 0
+    #
+    # Attribute _start: the time the summary was made
+    # Invariant: _start is a float, as returned by time.perf_counter
+
+    # GETTERS
+    def getGames(self):
+        """
+        Returns _games attribute.
+        """
+        return self._games
+
+    # INITIALIZER
+    def __init__(self):
+        """
+        Initializes an empty summary.
+        """
+        self._games = 0
+        self._outcomes = {'won': 0, 'lost': 0, 'timeout': 0}
+        self._clears = [0, None, None]
+        self._ticks = 0
+        self._lives = 0
+        self._shots = 0
+        self._start = time.perf_counter()
+
+    def add(self, result):
+        """
+        Adds the result of one game to the summary.
+
+        Precondition: result is a dictionary returned by playGame
+        """
+        self._games += 1
+        self._outcomes[result['result']] += 1
+        self._ticks += result['ticks']
+        self._lives += result['lives_lost']
+        self._shots += result['shots']
+        if result['result'] == 'won':
+            ticks = result['ticks']
+            clears = self._clears
+            clears[0] += ticks
+            clears[1] = ticks if clears[1] is None else min(clears[1], ticks)
+            clears[2] = ticks if clears[2] is None else max(clears[2], ticks)
+
+    def report(self):
+        """
+        Returns a dictionary of the totals and averages of the games so far.
+        """
+        games = max(self._games, 1)
+        wins = self._outcomes['won']
+        elapsed = time.perf_counter() - self._start
+        return {'games': self._games, 'won': wins, \
+        'lost': self._outcomes['lost'], 'timeout': self._outcomes['timeout'], \
+        'win_rate': wins/games, \
+        'mean_ticks_to_clear': self._clears[0]/wins if wins else None, \
+        'min_ticks_to_clear': self._clears[1], \
+        'max_ticks_to_clear': self._clears[2], \
+        'mean_lives_lost': self._lives/games, \
+        'mean_shots': self._shots/games, 'ticks': self._ticks, \
+        'seconds': elapsed, \
+        'ticks_per_second': self._ticks/elapsed if elapsed > 0 else None}
+
+
+def main(argv):
+    """
+    Runs a batch as described by the command line arguments argv, printing
+    the summary as JSON.
+
+    Precondition: argv is a list of strings (without the program name)
+    """
+    params = defaults()
+    parser = argparse.ArgumentParser(prog='batch.py', \
+    description='Plays many games of Alien Invaders without a window.')
+    parser.add_argument('--games', type=int, default=1000, \
+    help='the number of games to play')
+    parser.add_argument('--policy', default='tracker', \
+    help='%s, or module:function' % ', '.join(sorted(POLICIES)))
+    parser.add_argument('--rows', type=int, default=params['ALIEN_ROWS'], \
+    help='ALIEN_ROWS')
+    parser.add_argument('--cols', type=int, default=params['ALIENS_IN_ROW'], \
+    help='ALIENS_IN_ROW')
+    parser.add_argument('--speed', type=float, \
+    default=params['ALIEN_SPEED'], help='ALIEN_SPEED')
+    parser.add_argument('--rate', type=int, default=params['BOLT_RATE'], \
+    help='BOLT_RATE')
+    parser.add_argument('--seed', type=int, default=0, \
+    help='the seed of the first game')
+    parser.add_argument('--workers', type=int, default=None, \
+    help='the number of processes (default: one per core)')
+    parser.add_argument('--limit', type=int, default=GAME_LIMIT, \
+    help='the most updates in a game')
+    parser.add_argument('--results', default=None, \
+    help='a file to write each game result to, as JSON lines')
+    args = parser.parse_args(argv)
+
+    params = {'ALIEN_ROWS': args.rows, 'ALIENS_IN_ROW': args.cols, \
+    'ALIEN_SPEED': args.speed, 'BOLT_RATE': args.rate}
+    summary = Summary()
+    output = open(args.results, 'w') if args.results else None
+    try:
+        for result in run(args.games, params, args.policy, args.seed, \
+        args.workers, args.limit):
+            summary.add(result)
+            if output is not None:
+                output.write(json.dumps(result)+'\n')
+    finally:
+        if output is not None:
+            output.close()
+    report = summary.report()
+    report.update(params)
+    report['policy'] = args.policy
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,282 @@
+"""
+Benchmark module for Alien Invaders
+
+This module times the parts of the game engine that run on every frame, so
+that we can see what a change to them buys.  Each benchmark prints a table of
+its timings.
+
+To run a benchmark from the command line, type (for example)
+
+    python benchmark.py properties --calls 100000
+
+Type python benchmark.py --help for the list of benchmarks and options.  The
+benchmarks open a (blank) window, since game2d objects and textures cannot be
+made without one.  Run the properties benchmark without -O, or the checked
+properties lose their asserts too.
+
+The startup benchmark times fresh Python processes instead, from the moment
+they are started to each point in STARTUP_STAGES.  It runs them cold (with no
+compiled bytecode, as on the first run after an install) and warm (with the
+bytecode cached, as on every later run).
+"""
+import os
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+
+from consts import *
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+# the properties timed by the properties benchmark, as (property, two values
+# to alternate between)
+PROPERTY_CASES = (('x', (100, 101.5)), ('y', (100, 101.5)), \
+('left', (40, 41.5)), ('top', (400, 401.5)), ('width', (4, 5)), \
+('height', (10, 11)), ('angle', (0, 15.5)), \
+('fillcolor', ('yellow', 'purple')), ('linecolor', ((1, 0, 0), (0, 0, 1, 1))))
+
+
+# the points timed by the startup benchmark, as (stage, code run by a fresh
+# process to reach it).  The code must print the time since the process was
+# started (with the time.time() of the start in the variable START) and exit.
+STARTUP_STAGES = (('simulation', \
+'import simulation\nprint(time.time() - START)'), \
+('game2d', 'import game2d\nprint(time.time() - START)'), \
+('game', 'from app import *\nprint(time.time() - START)'), \
+('frame', """import consts
+consts.REPLAY_FOLDER = None
+from app import *
+from kivy.core.window import Window
+def first(window):
+    print(time.time() - START)
+    sys.stdout.flush()
+    os._exit(0)
+Window.bind(on_flip=first)
+Invaders(width=GAME_WIDTH, height=GAME_HEIGHT, preload=PRELOAD_ASSETS).run()
+"""))
+
+
+def timeSetter(obj, name, values, calls):
+    """
+    Returns the time in seconds for one assignment to attribute name of obj,
+    averaged over calls assignments alternating between the two values.
+
+    Precondition: obj is an object with an attribute name
+    Precondition: values is a pair of valid values for that attribute
+    Precondition: calls is an int > 0
+    """
+    first, second = values
+    start = time.perf_counter()
+    for n in range(calls//2):
+        setattr(obj, name, first)
+        setattr(obj, name, second)
+    return (time.perf_counter() - start)/(2*(calls//2))
+
+
+def properties(calls):
+    """
+    Returns the time of an assignment to each property in PROPERTY_CASES,
+    with and without the property checks of game2d.
+
+    The properties are those of a laser bolt (a GRectangle), but every
+    game2d shape shares them.  The result is a list of (property, checked
+    time, unchecked time) tuples, with the times in seconds.
+
+    Precondition: calls is an int > 1
+    """
+    from kivy.core.window import Window
+    from game2d import GRectangle
+    from game2d.gobject import is_checked, set_checked
+    bolt = GRectangle(x=100, y=100, width=BOLT_WIDTH, height=BOLT_HEIGHT, \
+    fillcolor='yellow', linecolor='yellow')
+
+    original = is_checked()
+    results = []
+    try:
+        for name, values in PROPERTY_CASES:
+            set_checked(True)
+            checked = timeSetter(bolt, name, values, calls)
+            set_checked(False)
+            unchecked = timeSetter(bolt, name, values, calls)
+            results.append((name, checked, unchecked))
+    finally:
+        set_checked(original)
+    return results
+
+
+def preload(workers):
+    """
+    Returns the preloader after loading every asset of the game with it.
+
+    The images are loaded one at a time (without a texture atlas), so that
+    each one is timed.  The timings are in the preloader.
+
+    Precondition: workers is an int > 0
+    """
+    from kivy.core.window import Window
+    from game2d import GameApp, GPreloader
+    import kivy.resources
+    folder = os.path.dirname(os.path.abspath(__file__))
+    GameApp.images = os.path.join(folder, 'Images')
+    GameApp.fonts = os.path.join(folder, 'Fonts')
+    GameApp.sounds = os.path.join(folder, 'Sounds')
+    GameApp.use_atlas = False
+    kivy.resources.resource_add_path(GameApp.images)
+
+    preloader = GPreloader(workers=workers)
+    preloader.finish()
+    return preloader
+
+
+def pixels(runs):
+    """
+    Returns the time to decode each image the game loads, and the time to
+    load it from its pixel file instead.
+
+    The images are those in the Images folder and the pages of the texture
+    atlas.  Their pixel files are made first, in a temporary folder.  The
+    result is a list of (image, decode time, mapped time) tuples, with the
+    times in seconds (the median over the runs), each including the time to
+    make a texture.
+
+    Precondition: runs is an int > 0
+    """
+    from kivy.core.window import Window
+    from kivy.core.image import Image
+    from game2d.gatlas import build_atlas
+    from game2d.gpixels import load_image
+    from game2d.gregistry import file_digest
+    import json
+    folder = os.path.dirname(os.path.abspath(__file__))
+    images = os.path.join(folder, 'Images')
+    files = [os.path.join(images, name) for name in sorted(os.listdir(images))]
+    with tempfile.TemporaryDirectory() as cache:
+        atlas = build_atlas(images, cache)
+        if atlas is not None:
+            with open(atlas) as file:
+                files.extend(os.path.join(cache, page) for page in json.load(file))
+
+        results = []
+        for path in files:
+            digest = file_digest(path)
+            load_image(path, cache, digest).texture
+            decoded = []
+            mapped = []
+            for n in range(runs):
+                start = time.perf_counter()
+                Image(load_image(path, None)).texture
+                decoded.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                Image(load_image(path, cache, digest)).texture
+                mapped.append(time.perf_counter() - start)
+            results.append((os.path.basename(path), \
+            statistics.median(decoded), statistics.median(mapped)))
+    return results
+
+
+def timeStartup(code, cold):
+    """
+    Returns the time in seconds for a fresh Python process to run code, as
+    printed by the process itself.
+
+    The process runs in the folder of this module.  A cold process has no
+    compiled bytecode to use (nor does it save any).
+
+    Precondition: code is a string of Python code from STARTUP_STAGES
+    Precondition: cold is a bool
+    """
+    folder = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ)
+    env.setdefault('KIVY_NO_ARGS', '1')
+    env.setdefault('KIVY_NO_CONSOLELOG', '1')
+    with tempfile.TemporaryDirectory() as prefix:
+        if cold:
+            env['PYTHONPYCACHEPREFIX'] = prefix
+            env['PYTHONDONTWRITEBYTECODE'] = '1'
+        script = 'import os, sys, time\nSTART = %r\n%s' % (time.time(), code)
+        result = subprocess.run([sys.executable, '-c', script], cwd=folder, \
+        env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, \
+        universal_newlines=True, check=True)
+    return float(result.stdout.split()[-1])
+
+
+def startup(runs):
+    """
+    Returns the median time to reach each stage in STARTUP_STAGES, cold and
+    warm, over the given number of runs.
+
+    The result is a list of (stage, cold time, warm time) tuples, with the
+    times in seconds.  An untimed warm run of each stage comes first, so that
+    the bytecode is cached for the warm runs.
+
+    Precondition: runs is an int > 0
+    """
+    results = []
+    for stage, code in STARTUP_STAGES:
+        timeStartup(code, False)
+        cold = [timeStartup(code, True) for n in range(runs)]
+        warm = [timeStartup(code, False) for n in range(runs)]
+        results.append((stage, statistics.median(cold), \
+        statistics.median(warm)))
+    return results
+
+
+def main(argv):
+    """
+    Runs the benchmark named in the command line arguments argv, printing
+    its timings.
+
+    Precondition: argv is a list of strings (without the program name)
+    """
+    parser = argparse.ArgumentParser(prog='benchmark.py', \
+    description='Times the per-frame work of Alien Invaders.')
+    parser.add_argument('benchmark', choices=['properties', 'preload', \
+    'startup', 'pixels'], \
+    help='the benchmark to run')
+    parser.add_argument('--calls', type=int, default=100000, \
+    help='the number of calls to time each operation over')
+    parser.add_argument('--workers', type=int, default=4, \
+    help='the number of threads to preload assets with')
+    parser.add_argument('--runs', type=int, default=5, \
+    help='the number of runs to time each startup stage (or image) over')
+    args = parser.parse_args(argv)
+
+    if args.benchmark == 'properties':
+        print('%-10s %12s %12s %7s' % ('property', 'checked ns', \
+        'unchecked ns', 'saved'))
+        for name, checked, unchecked in properties(args.calls):
+            print('%-10s %12.0f %12.0f %6.0f%%' % (name, checked*1e9, \
+            unchecked*1e9, 100*(1 - unchecked/checked)))
+    elif args.benchmark == 'preload':
+        preloader = preload(args.workers)
+        print('%-6s %-22s %10s %10s' % ('kind', 'asset', 'decode ms', \
+        'upload ms'))
+        decoding = 0
+        uploading = 0
+        for kind, name, decode, upload in preloader.timings:
+            if decode is None:
+                print('%-6s %-22s %10s %10s' % (kind, name, 'failed', '-'))
+            else:
+                print('%-6s %-22s %10.2f %10.2f' % (kind, name, decode*1e3, \
+                upload*1e3))
+                decoding += decode
+                uploading += upload
+        print('%d assets in %.1f ms with %d threads (%.1f ms decoding, ' \
+        '%.1f ms on the main thread)' % (preloader.total, \
+        preloader.elapsed*1e3, args.workers, decoding*1e3, uploading*1e3))
+    elif args.benchmark == 'startup':
+        print('%-10s %10s %10s' % ('stage', 'cold ms', 'warm ms'))
+        for stage, cold, warm in startup(args.runs):
+            print('%-10s %10.0f %10.0f' % (stage, cold*1e3, warm*1e3))
+    elif args.benchmark == 'pixels':
+        print('%-18s %10s %10s' % ('image', 'decode ms', 'mapped ms'))
+        for name, decoded, mapped in pixels(args.runs):
+            print('%-18s %10.3f %10.3f' % (name, decoded*1e3, mapped*1e3))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
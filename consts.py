@@ -8,8 +8,6 @@ we separate the constants into their own module. This allows all modules to acce
 # YOUR NAME(S) AND NETID(S) HERE
 # DATE COMPLETED HERE
 """
-import introcs
-import sys
 
 ### WINDOW CONSTANTS (all coordinates are in pixels) ###
 
@@ -92,38 +90,64 @@ STATE_PAUSED   = 3
 STATE_CONTINUE = 4
 #: state when the game is complete (won or lost)
 STATE_COMPLETE = 5
+# the length of a fixed simulation step in seconds (SHIP_MOVEMENT and
+# BOLT_SPEED are per step, and were tuned for 60 steps a second)
+SIM_TICK = 1/60
+# the most simulation steps to run in a single rendered frame
+MAX_TICKS = 5
+# the folder (next to the application) to record replays in, or None to not
+# record them
+REPLAY_FOLDER = 'Replays'
+# the file to record a video of the game to (.y4m, .avi, .raw, or a folder for
+# PNG images), or None to not record one
+CAPTURE_FILE = None
+# whether to load the images, fonts and sounds in the background while the
+# game waits for the player to start
+PRELOAD_ASSETS = True
 
 
 ### USE COMMAND LINE ARGUMENTS TO CHANGE NUMBER OF ALIENS IN A ROW"""
-"""
-sys.argv is a list of the command line arguments when you run python. These arguments are
-everything after the word python. So if you start the game typing
-
-    python invaders 3 4 0.5
-
-Python puts ['breakout.py', '3', '4', '0.5'] into sys.argv. Below, we take advantage of
-this fact to change the constants ALIEN_ROWS, ALIENS_IN_ROW, and ALIEN_SPEED.
-"""
-try:
-    rows = int(sys.argv[1])
-    if rows >= 1 and rows <= 10:
-        ALIEN_ROWS = rows
-except:
-    pass # Use original value
-
-try:
-    perrow = int(sys.argv[2])
-    if perrow >= 1 and perrow <= 15:
-        ALIENS_IN_ROW = perrow
-except:
-    pass # Use original value
-
-try:
-    speed = float(sys.argv[3])
-    if speed >= 0 and speed <= 3:
-        ALIEN_SPEED = speed
-except:
-    pass # Use original value
+def applyArgs(argv):
+    """
+    Changes the constants ALIEN_ROWS, ALIENS_IN_ROW, and ALIEN_SPEED to the
+    command line arguments argv, where they are valid.
+
+    sys.argv is a list of the command line arguments when you run python.
+    These arguments are everything after the word python. So if you start
+    the game typing
+
+        python invaders 3 4 0.5
+
+    Python puts ['invaders', '3', '4', '0.5'] into sys.argv, and the game
+    calls this function with sys.argv[1:].  This is not done when this module
+    is imported, as the simulation, replay and batch scripts have command
+    line arguments of their own.  The game must call it before importing any
+    module that copies the constants (with from consts import *).
+
+    Parameter argv: the command line arguments (without the program name)
+    Precondition: argv is a list of strings
+    """
+    global ALIEN_ROWS, ALIENS_IN_ROW, ALIEN_SPEED
+    try:
+        rows = int(argv[0])
+        if rows >= 1 and rows <= 10:
+            ALIEN_ROWS = rows
+    except:
+        pass # Use original value
+
+    try:
+        perrow = int(argv[1])
+        if perrow >= 1 and perrow <= 15:
+            ALIENS_IN_ROW = perrow
+    except:
+        pass # Use original value
+
+    try:
+        speed = float(argv[2])
+        if speed >= 0 and speed <= 3:
+            ALIEN_SPEED = speed
+    except:
+        pass # Use original value
 
 ### ADD MORE CONSTANTS (PROPERLY COMMENTED) AS NECESSARY ###
 
@@ -148,11 +172,12 @@ ARCADE_MEDIUM = 48
 # A small message or label
 ARCADE_SMALL  = 32
 
-# The background color
-DARK_GREY = introcs.RGB(32, 32, 32)
+# The background color (as RGB values 0..1, so that this module needs no
+# color classes)
+DARK_GREY = (32/255, 32/255, 32/255)
 # Other useful colors
-WHITE_COLOR = introcs.RGB(255, 255, 255)
-YELLOW_COLOR = introcs.RGB(255, 255, 0)
+WHITE_COLOR = (1.0, 1.0, 1.0)
+YELLOW_COLOR = (1.0, 1.0, 0.0)
 
 # The offset of the top labels from the top of the screen
 LABEL_HEIGHT  = 32
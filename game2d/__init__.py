@@ -4,13 +4,53 @@ A module to support simple 2D game development.
 This module is a simple wrapper around Kivy interfaces to make 2D game development
 simpler for students in CS 1110.
 
+The classes are imported from their modules the first time they are used, rather than
+with the package.  Importing Kivy (and its graphics, widgets and audio) takes a good
+part of a second, and a program that only needs part of this package, like a headless
+simulation, should not have to pay for the rest.  ``from game2d import *`` still
+imports everything.
+
 Author: Walker M. White (wmw2)
 Date:   August 1, 2017 (Python 3 version)
 """
-from .gobject import GObject, GScene
-from .grectangle import GRectangle, GEllipse, GImage, GLabel
-from .gsprite import GSprite
-from .gpath import GPath, GTriangle, GPolygon
-from .gview import GInput, GView
-from .sound import Sound, SoundLibrary
-from .app import GameApp
\ No newline at end of file
+import importlib
+
+# The module defining each class of the package
+_MODULES = {'GObject': 'gobject', 'GScene': 'gobject',
+            'GRectangle': 'grectangle', 'GEllipse': 'grectangle', 'GImage': 'grectangle',
+            'GLabel': 'grectangle',
+            'GSprite': 'gsprite',
+            'GBatch': 'gbatch',
+            'GPath': 'gpath', 'GTriangle': 'gpath', 'GPolygon': 'gpath',
+            'GRaster': 'graster',
+            'GInput': 'gview', 'GView': 'gview',
+            'GCapture': 'gcapture',
+            'GTextureCache': 'gcache',
+            'GRegistry': 'gregistry',
+            'GPixelLoader': 'gpixels',
+            'GPreloader': 'gpreload',
+            'Sound': 'sound', 'SoundLibrary': 'sound',
+            'GameApp': 'app'}
+
+__all__ = list(_MODULES)
+
+
+def __getattr__(name):
+    """
+    Returns the class ``name`` of this package, importing its module on first use.
+
+    :param name: The name of the class
+    :type name:  ``str``
+    """
+    if not name in _MODULES:
+        raise AttributeError('module %r has no attribute %r' % (__name__,name))
+    value = getattr(importlib.import_module('.'+_MODULES[name],__name__),name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """
+    Returns the names in this package, including the classes not imported yet.
+    """
+    return sorted(set(globals()) | set(_MODULES))
@@ -16,8 +16,10 @@ import kivy.app
 # Lower-level kivy modules to support animation
 from kivy.config import Config
 from kivy.clock  import Clock
-import numpy as np
+from kivy.logger import Logger
 
+from .gcache import GTextureCache, TEXTURE_BUDGET
+from .gregistry import GRegistry
 import os.path
 
 class GameApp(kivy.app.App):
@@ -40,7 +42,19 @@ class GameApp(kivy.app.App):
     thing you should have in this method are calls to ``self.view.draw()``.
     """
     # Class attribute for tracking textures (to reduce memory footprint)
-    TEXTURE_CACHE = {}
+    TEXTURE_CACHE = GTextureCache()
+    
+    # Class attribute for the texture atlas of the Images folder (once loaded)
+    ATLAS = None
+    
+    # Class attribute for the index of the asset folders (once scanned)
+    RESOURCES = None
+    
+    # Class attribute for whether to load images from the atlas
+    use_atlas = True
+    
+    # Class attribute for the folder of files built from the assets (None for no folder)
+    cache = None
     
     
     # MUTABLE ATTRIBUTES
@@ -65,6 +79,51 @@ class GameApp(kivy.app.App):
         self._fps = value
         Clock.schedule_interval(self._refresh,1.0/self._fps)
     
+    @property
+    def tick(self):
+        """
+        The length of a fixed simulation step in seconds, or None for variable steps.
+        
+        If this value is None (the default), :meth:`update` is called exactly once per
+        animation frame with the actual time since the last frame.  Otherwise, the time
+        of each frame is added to an accumulator and :meth:`update` is always called 
+        with exactly this value: several times on a long frame, and not at all on a 
+        frame shorter than a tick.  That makes the game play identically at any frame 
+        rate.  Use :attr:`alpha` in :meth:`draw` to interpolate between the last two 
+        updates.
+        
+        **Invariant**: Must be None or an int or float > 0.
+        """
+        return self._tick
+    
+    @tick.setter
+    def tick(self,value):
+        assert value is None or type(value) in [int,float], 'value %s is not a number' % repr(value)
+        assert value is None or value > 0, 'value %s is not positive' % repr(value)
+        self._tick = value
+        self._accum = 0.0
+        self._alpha = 1.0
+    
+    @property
+    def max_ticks(self):
+        """
+        The maximum number of fixed steps to run in a single animation frame.
+        
+        If a frame is so slow that it would need more steps than this, the extra time 
+        is dropped (and counted in :attr:`skipped`) rather than simulated.  This keeps 
+        one slow frame from making the next frame slower still.  This value is unused 
+        if :attr:`tick` is None.
+        
+        **Invariant**: Must be an int > 0.
+        """
+        return self._maxticks
+    
+    @max_ticks.setter
+    def max_ticks(self,value):
+        assert type(value) == int, 'value %s is not an int' % repr(value)
+        assert value > 0, 'value %s is not positive' % repr(value)
+        self._maxticks = value
+    
     
     # IMMUTABLE PROPERTIES
     @property
@@ -109,13 +168,75 @@ class GameApp(kivy.app.App):
         """
         return self._input
     
+    @property
+    def alpha(self):
+        """
+        How far the clock has advanced past the last :meth:`update`, as a fraction of a tick.
+        
+        If :attr:`tick` is set, a frame is usually drawn part of the way between two 
+        fixed steps.  Drawing objects at ``previous+alpha*(current-previous)`` makes the
+        motion smooth even though the simulation moves in whole ticks.  This value is
+        always 1 if :attr:`tick` is None.
+        
+        **Invariant**: Must be a float in the range 0..1.
+        """
+        return self._alpha
+    
+    @property
+    def skipped(self):
+        """
+        The number of fixed steps dropped because a frame exceeded :attr:`max_ticks`.
+        
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._skipped
+    
+    @property
+    def capture(self):
+        """
+        The recording of the game in progress, or None if it is not being recorded.
+        
+        See :meth:`start_capture` for more information.
+        
+        **Invariant**: Must be None or an instance of :class:`GCapture`.
+        """
+        return self._capture
+    
+    @property
+    def preloader(self):
+        """
+        The loader of the game assets, or None if they are not preloaded.
+        
+        See :meth:`start_preload` for more information.
+        
+        **Invariant**: Must be None or an instance of :class:`GPreloader`.
+        """
+        return self._preloader
+    
     # CLASS METHODS
+    @classmethod
+    def load_resources(cls):
+        """
+        Returns: The index of the **Images**, **Fonts** and **Sounds** folders
+        
+        The folders are scanned once, and files are looked up in the index after that
+        (see :class:`GRegistry`).  A new index is made if the folders are changed.  To
+        find files that have changed in place, call ``invalidate()`` on the index.
+        """
+        resources = cls.RESOURCES
+        if resources is None or resources.folders != (cls.images,cls.fonts,cls.sounds):
+            resources = GRegistry(cls.images,cls.fonts,cls.sounds)
+            cls.RESOURCES = resources
+        return resources
+    
     @classmethod
     def is_image(cls,name):
         """
         Checks if ``name`` refers to an image file
     
-        The method searches the **Images** folder for the given file name.
+        The method searches the **Images** folder for the given file name.  This is
+        a lookup in the index of the folder (see :meth:`load_resources`), and does not
+        touch the file system once the folder is indexed.
     
         :param name: The file name
         :type name:  ``str``
@@ -126,14 +247,15 @@ class GameApp(kivy.app.App):
         if type(name) != str:
             return False
     
-        return os.path.exists(cls.images+'/'+name)
+        return cls.load_resources().has('image',name)
     
     @classmethod
     def is_font(cls,name):
         """
         Checks if ``name`` refers to a font file
         
-        The method searches the **Fonts** folder for the given file name.
+        The method searches the **Fonts** folder for the given file name, in the index
+        of the folder (see :meth:`load_resources`).
         
         :param name: The file name
         :type name:  ``str``
@@ -144,14 +266,15 @@ class GameApp(kivy.app.App):
         if type(name) != str:
             return False
         
-        return os.path.exists(cls.fonts+'/'+name)
+        return cls.load_resources().has('font',name)
     
     @classmethod
     def is_sound(cls,name):
         """
         Checks if ``name`` refers to a sound file
         
-        The method searches the **Sounds** folder for the given file name.
+        The method searches the **Sounds** folder for the given file name, in the index
+        of the folder (see :meth:`load_resources`).
         
         :param name: The file name
         :type name:  ``str``
@@ -162,10 +285,30 @@ class GameApp(kivy.app.App):
         if type(name) != str:
             return False
         
-        return os.path.exists(os.path.join(cls.sounds,name))
+        return cls.load_resources().has('sound',name)
+    
+    @classmethod
+    def load_atlas(cls):
+        """
+        Returns: The texture atlas of the **Images** folder, or None if there is none
+        
+        The atlas packs every image in the **Images** folder into one texture (see
+        :mod:`game2d.gatlas`).  It is built the first time it is needed, and kept in
+        the **Cache** folder so that later runs only have to load it.  There is no
+        atlas if :attr:`use_atlas` is False, or if it cannot be built.
+        """
+        if cls.ATLAS is None and cls.use_atlas:
+            atlas = None
+            if cls.cache is not None:
+                from .gatlas import load_atlas
+                atlas = load_atlas(cls.images,cls.cache)
+            if atlas is None:
+                cls.use_atlas = False
+            cls.ATLAS = atlas
+        return cls.ATLAS
     
     @classmethod
-    def load_texture(cls,name):
+    def load_texture(cls,name,atlas=True):
         """
         Returns: The texture for the given file name, or None if it cannot be loaded
         
@@ -173,19 +316,51 @@ class GameApp(kivy.app.App):
         has already been loaded, it will return the cached texture.  Otherwise, it will
         load the texture and cache it before returning it.
         
+        The textures are kept in :attr:`TEXTURE_CACHE`, a :class:`GTextureCache` with a
+        memory budget (set with the keyword ``texture_budget`` of the constructor).  The
+        textures used least recently are dropped from it to fit the budget, unless they
+        are pinned (with ``GameApp.TEXTURE_CACHE.pin(name)``).
+        
+        If the image is in the texture atlas (see :meth:`load_atlas`), the texture is
+        the region of the atlas holding it.  All such textures share the atlas texture.
+        A texture to be repeated (or wrapped in any other way) cannot be a region, so
+        set ``atlas`` to False to get the texture of the file on its own.
+        
+        An image is only decoded the first time the game loads it.  Its pixels are then
+        kept in the **Cache** folder, and later runs make the texture from those (see
+        :mod:`game2d.gpixels`).
+        
         This method will crash if name is not a valid file.
         
         :param name: The file name
         :type name:  ``str``
+        
+        :param atlas: Whether the texture may be a region of the texture atlas
+        :type atlas:  ``bool``
         """
         assert cls.is_image(name), '%s is not an image file' % repr(name)
-        if name in cls.TEXTURE_CACHE:
-            return cls.TEXTURE_CACHE[name]
+        key = name if atlas else name+'|file'
+        texture = cls.TEXTURE_CACHE.get(key)
+        if texture is not None:
+            return texture
+        
+        sheet = cls.load_atlas() if atlas else None
+        if sheet is not None:
+            stem = os.path.splitext(name)[0]
+            if stem in sheet.textures:
+                texture = sheet[stem]
+                cls.TEXTURE_CACHE[key] = texture
+                return texture
         
         try:
             from kivy.core.image import Image
-            texture = Image(name).texture
-            cls.TEXTURE_CACHE[name] = texture
+            from .gpixels import load_image
+            # Kivy must not cache it too, or dropping it from our cache frees nothing
+            resources = cls.load_resources()
+            image = load_image(resources.path('image',name),cls.cache,
+                               resources.digest('image',name))
+            texture = Image(image).texture
+            cls.TEXTURE_CACHE[key] = texture
         except:
             texture = None
         
@@ -200,16 +375,16 @@ class GameApp(kivy.app.App):
         is in the cache, it will return the cached texture before removing it.  Otherwise, 
         it will returning None.
         
+        This removes both the texture of the file and the texture loaded on its own with
+        ``load_texture(name,atlas=False)``, if they are cached.
+        
         :param name: The file name
         :type name:  ``str``
         """
         assert type(name) == str, '%s is not a valid texture name' % repr(name)
-        if name in cls.TEXTURE_CACHE:
-            texture = cls.TEXTURE_CACHE[name]
-            del cls.TEXTURE_CACHE[name]
-            return texture
-        
-        return None
+        texture = cls.TEXTURE_CACHE.pop(name)
+        single  = cls.TEXTURE_CACHE.pop(name+'|file')
+        return single if texture is None else texture
     
     # BUILT-IN METHODS
     def __init__(self,**keywords):
@@ -223,6 +398,19 @@ class GameApp(kivy.app.App):
             
             GameApp(width=400,height=400)
         
+        The keywords ``fps``, ``tick`` and ``max_ticks`` may also be used to control
+        the animation loop.  See those attributes for more information.  The keyword
+        ``atlas`` (default True) says whether to pack the images into a texture atlas
+        (see :meth:`load_atlas`).  The keyword ``capture`` is a file to record a video
+        of the game to, from the very first frame (see :meth:`start_capture`).  The 
+        keyword ``preload`` (default False) says whether to load the images, fonts and 
+        sounds in the background as soon as the game starts (see :meth:`start_preload`).
+        The keyword ``texture_budget`` is the most bytes of textures to keep in memory 
+        (see :meth:`load_texture`), or None for no limit.  The keyword ``checked`` says
+        whether the properties of graphics objects check the values assigned to them
+        (see :func:`game2d.gobject.set_checked`).  By default they do, unless Python is
+        run with ``-O`` (which turns off asserts as well).
+        
         The game window will not show until you start the game. To start the game, use 
         the method ``run()``.
         
@@ -244,6 +432,20 @@ class GameApp(kivy.app.App):
         self._gwidth = w
         self._gheight = h
         self._fps = f
+        self.tick = keywords.pop('tick', None)
+        self.max_ticks = keywords.pop('max_ticks', 5)
+        self._skipped = 0
+        GameApp.use_atlas = bool(keywords.pop('atlas', True))
+        GameApp.TEXTURE_CACHE.budget = keywords.pop('texture_budget', TEXTURE_BUDGET)
+        from .gobject import set_checked
+        set_checked(bool(keywords.pop('checked', __debug__)))
+        self._capture = None
+        self._capturefile = keywords.pop('capture', None)
+        assert self._capturefile is None or type(self._capturefile) == str, \
+            'capture %s is not a file name' % repr(self._capturefile)
+        self._preloader = None
+        self._preload = bool(keywords.pop('preload', False))
+        self._reported = False
         
         Config.set('graphics', 'width', str(self.width))
         Config.set('graphics', 'height', str(self.height))
@@ -251,6 +453,7 @@ class GameApp(kivy.app.App):
         
         # Tell Kivy to build the application
         kivy.app.App.__init__(self,**keywords)
+        self.bind(on_stop=self._shutdown)
     
     
     # PUBLIC METHODS
@@ -327,6 +530,103 @@ class GameApp(kivy.app.App):
         """
         pass
     
+    def start_capture(self,path,format=None,frames=None):
+        """
+        Starts recording every frame of the game to a video file.
+        
+        The format of the file is picked from its extension: ``.y4m`` for a YUV4MPEG2 
+        stream, ``.avi`` for an uncompressed AVI file, and ``.raw`` or ``.rgba`` for the 
+        raw pixels of each frame.  Any other name is a folder of PNG images.  See the 
+        module :mod:`game2d.gcapture` for the details of each format.
+        
+        Each frame is read from the window once it is drawn, and handed off to a 
+        background thread to be written.  If the writer falls behind, frames are dropped
+        rather than slowing the game; the number of frames written and dropped is kept
+        in :attr:`capture`.  Starting a new recording stops the current one.
+        
+        :param path: The file (or folder) to record to
+        :type path:  ``str``
+        
+        :param format: The format, or None to pick it from the file name
+        :type format:  ``str`` or None
+        
+        :param frames: The number of frames that may wait to be written (None for the default)
+        :type frames:  ``int`` > 0 or None
+        
+        :return: The new recording
+        :rtype:  :class:`GCapture`
+        """
+        from kivy.core.window import Window
+        from .gcapture import GCapture, CAPTURE_FRAMES
+        self.stop_capture()
+        width, height = Window.size
+        frames = CAPTURE_FRAMES if frames is None else frames
+        self._capture = GCapture(path,(int(width),int(height)),format,self.fps,frames)
+        Window.bind(on_flip=self._grab)
+        return self._capture
+    
+    def stop_capture(self):
+        """
+        Stops recording the game, and finishes the video file.
+        
+        This method waits for the frames not yet written.  It is called automatically
+        when the game stops.
+        
+        :return: The finished recording, or None if the game was not being recorded
+        :rtype:  :class:`GCapture` or None
+        """
+        capture = self._capture
+        if capture is not None:
+            from kivy.core.window import Window
+            Window.unbind(on_flip=self._grab)
+            self._capture = None
+            capture.close()
+            Logger.info('GameApp: Recorded %d frames to %s (%d dropped)' % 
+                        (capture.written,capture.path,capture.dropped))
+        return capture
+    
+    def start_preload(self,manifest=None,workers=None):
+        """
+        Starts loading the game assets in the background.
+        
+        The files are read and decoded on a pool of threads, and their textures are made
+        at the start of each frame, as the files become ready (see :class:`GPreloader`).
+        The images then come out of the texture cache, rather than off the disk, when 
+        they are first used.  The time taken by each asset is logged (at debug level) 
+        once they are all loaded, and kept in :attr:`preloader`.
+        
+        Preloading is best started while the game waits for the player (in ``start``, 
+        for example).  If the assets are needed before they are all loaded, call 
+        :meth:`finish_preload` first.
+        
+        :param manifest: The assets to load, or None for every file in the asset folders
+        :type manifest:  ``list`` of (kind, name) pairs, or None
+        
+        :param workers: The number of threads to load with (None for the default)
+        :type workers:  ``int`` > 0 or None
+        
+        :return: The new preloader
+        :rtype:  :class:`GPreloader`
+        """
+        from .gpreload import GPreloader, PRELOAD_WORKERS
+        if self._preloader is not None:
+            self._preloader.close()
+        workers = PRELOAD_WORKERS if workers is None else workers
+        self._preloader = GPreloader(manifest,workers)
+        self._reported = False
+        return self._preloader
+    
+    def finish_preload(self):
+        """
+        Waits for the game assets still being preloaded.
+        
+        This method does nothing if the assets are not being preloaded, or if they are 
+        all loaded already.
+        """
+        if self._preloader is not None and not self._preloader.done:
+            self._preloader.finish()
+            self._report()
+    
     
     # HIDDEN METHODS
     def _bootstrap(self,dt):
@@ -340,6 +640,10 @@ class GameApp(kivy.app.App):
             Clock.schedule_interval(self._refresh,1.0/self.fps)
         else:
             Clock.schedule_interval(self._refresh,0)
+        if self._capturefile is not None:
+            self.start_capture(self._capturefile)
+        if self._preload:
+            self.start_preload()
         self.start()
     
     def _refresh(self,dt):
@@ -347,14 +651,81 @@ class GameApp(kivy.app.App):
         Processes a single animation frame.
         
         This method a callback-proxy for the methods `update` and `draw`.  It handles
-        important issues behind the scenes, particularly with clearing the window.
+        important issues behind the scenes, particularly with clearing the window and
+        running fixed steps (if :attr:`tick` is set).  Before the frame, any preloaded 
+        assets that are ready are turned into textures.  Once the frame is drawn, the
+        retained scene of the view is refreshed.
         
         :param dt: time in seconds since last update
         :type dt:  ``int`` or ``float``
         """
+        if self._preloader is not None and not self._reported:
+            self._preloader.poll()
+            self._report()
         self.view.clear()
-        self.update(dt)
+        if self._tick is None:
+            self.update(dt)
+        else:
+            self._accum += dt
+            steps = 0
+            while self._accum >= self._tick and steps < self._maxticks:
+                self.update(self._tick)
+                self._accum -= self._tick
+                steps += 1
+            if self._accum >= self._tick:
+                self._skipped += int(self._accum // self._tick)
+                self._accum %= self._tick
+            self._alpha = self._accum/self._tick
         self.draw()
+        self.view.refresh()
+    
+    def _shutdown(self,app):
+        """
+        Finishes any recording of the game, and stops any preloading, when the 
+        application stops.  The use of the texture cache is logged (at debug level).
+        
+        This method is bound to the event ``on_stop``, so that it is called even if a
+        subclass handles that event itself.
+        
+        :param app: The application
+        :type app:  :class:`GameApp`
+        """
+        self.stop_capture()
+        if self._preloader is not None:
+            self._preloader.close()
+        cache = GameApp.TEXTURE_CACHE
+        Logger.debug('GameApp: Texture cache had %d hits, %d misses and %d evictions (%d bytes)' %
+                     (cache.hits,cache.misses,cache.evictions,cache.size))
+    
+    def _report(self):
+        """
+        Logs the time taken by the preloaded assets, once they are all loaded.
+        
+        The assets are only logged once.
+        """
+        preloader = self._preloader
+        if preloader.done and not self._reported:
+            self._reported = True
+            for kind, name, decode, upload in preloader.timings:
+                if decode is not None:
+                    Logger.debug('GameApp: Preloaded %s %s (%.1f ms decode, %.1f ms upload)' %
+                                 (kind,name,1000*decode,1000*upload))
+            Logger.info('GameApp: Preloaded %d assets in %.3f s (%d failed)' %
+                        (preloader.total,preloader.elapsed,len(preloader.failed)))
+    
+    def _grab(self,window):
+        """
+        Adds the frame just drawn to the recording.
+        
+        This method is called as the window is about to show a new frame, when the frame
+        is complete but not yet on screen.
+        
+        :param window: The game window
+        :type window:  :class:`kivy.core.window.WindowBase`
+        """
+        from kivy.graphics.opengl import glReadPixels, GL_RGBA, GL_UNSIGNED_BYTE
+        width, height = self._capture.size
+        self._capture.push(glReadPixels(0,0,width,height,GL_RGBA,GL_UNSIGNED_BYTE))
     
     def _setpaths(self):
         """
@@ -371,6 +742,7 @@ class GameApp(kivy.app.App):
         GameApp.fonts  = str(os.path.join(path, 'Fonts'))
         GameApp.sounds = str(os.path.join(path, 'Sounds'))
         GameApp.images = str(os.path.join(path, 'Images'))
+        GameApp.cache  = str(os.path.join(path, 'Cache'))
         
         import kivy.resources
         kivy.resources.resource_add_path(GameApp.fonts)
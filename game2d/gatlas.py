@@ -0,0 +1,196 @@
+"""
+A module to pack the images of a game into a texture atlas.
+
+Every image file loaded on its own is its own texture, and drawing a sequence of
+objects with different textures means switching (binding) textures between them.
+An atlas packs all of the images into one large texture, and each image becomes a
+region of it.  Objects using different images then share a texture, so they may be
+drawn together (see :class:`GBatch`).
+
+Packing the images takes time, so the atlas is built once and kept on disk, in the
+format of :class:`kivy.atlas.Atlas`.  It is only rebuilt when the images change.
+Building an atlas requires PIL (Pillow); without it, images are loaded one at a time
+as usual.
+"""
+from kivy.logger import Logger
+import json
+import os
+import os.path
+
+
+# The image file types that may be put in an atlas
+ATLAS_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
+
+# The largest atlas page (in pixels, along either side)
+ATLAS_MAX_SIZE = 4096
+
+# The padding around each image in the atlas (2 or more avoids bleeding)
+ATLAS_PADDING = 2
+
+
+def atlas_sources(folder):
+    """
+    Returns the names of the image files in ``folder`` that can go in an atlas.
+
+    Only files directly in ``folder`` are considered.  An atlas refers to its images
+    by file name without the extension, so files with the same name (but different
+    extensions) are left out.  So are images larger than an atlas page.
+
+    :return: the sorted file names
+    :rtype:  ``list`` of ``str``
+
+    :param folder: The image folder
+    :type folder:  ``str``
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return []
+
+    stems = {}
+    for name in sorted(os.listdir(folder)):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() in ATLAS_EXTENSIONS and os.path.isfile(os.path.join(folder,name)):
+            stems.setdefault(stem,[]).append(name)
+
+    result = []
+    for stem in sorted(stems):
+        if len(stems[stem]) != 1:
+            continue
+        name = stems[stem][0]
+        try:
+            with Image.open(os.path.join(folder,name)) as image:
+                width, height = image.size
+        except Exception:
+            continue
+        if max(width,height)+2*ATLAS_PADDING <= ATLAS_MAX_SIZE:
+            result.append(name)
+    return result
+
+
+def atlas_stamp(folder, names):
+    """
+    Returns a description of the image files, to tell when an atlas is out of date.
+
+    :return: the name, size and modification time of each file
+    :rtype:  ``list``
+
+    :param folder: The image folder
+    :type folder:  ``str``
+
+    :param names: The image file names
+    :type names:  ``list`` of ``str``
+    """
+    stamp = []
+    for name in names:
+        info = os.stat(os.path.join(folder,name))
+        stamp.append([name, info.st_size, info.st_mtime_ns])
+    return {'padding': ATLAS_PADDING, 'files': stamp}
+
+
+def build_atlas(folder, cache, name='images'):
+    """
+    Returns the atlas file for the images in ``folder``, building it if necessary.
+
+    The atlas is kept in the folder ``cache`` (created if missing), as the file
+    ``name.atlas`` with its pages ``name-0.png``, ``name-1.png`` and so on.  If the
+    atlas is already there, and the images have not changed since it was built, it
+    is used as is.  The pages are as small as possible; images only go on a second
+    page if they do not fit on a page of :const:`ATLAS_MAX_SIZE`.
+
+    :return: the path to the atlas file, or None if no atlas could be built
+    :rtype:  ``str`` or None
+
+    :param folder: The image folder
+    :type folder:  ``str``
+
+    :param cache: The folder to keep the atlas in
+    :type cache:  ``str``
+
+    :param name: The base name of the atlas files
+    :type name:  ``str``
+    """
+    names = atlas_sources(folder)
+    if not names:
+        return None
+
+    path  = os.path.join(cache,name+'.atlas')
+    stamp = atlas_stamp(folder,names)
+    stampfile = os.path.join(cache,name+'.stamp')
+    try:
+        with open(stampfile) as file:
+            if json.load(file) == stamp and os.path.exists(path):
+                return path
+    except (OSError, ValueError):
+        pass
+
+    try:
+        from kivy.atlas import Atlas
+        os.makedirs(cache, exist_ok=True)
+        for old in os.listdir(cache):
+            if old.startswith(name+'-') and old.endswith('.png'):
+                os.remove(os.path.join(cache,old))
+        files = [os.path.join(folder,item) for item in names]
+
+        # Grow the page until everything fits on one (or the page is as big as allowed)
+        size = 64
+        area = 0
+        from PIL import Image
+        for item in files:
+            with Image.open(item) as image:
+                area += (image.size[0]+2*ATLAS_PADDING)*(image.size[1]+2*ATLAS_PADDING)
+        while size < ATLAS_MAX_SIZE and size*size < area:
+            size *= 2
+        while True:
+            result = Atlas.create(os.path.join(cache,name),files,size,padding=ATLAS_PADDING)
+            if not result:
+                return None
+            if len(result[1]) == 1 or size >= ATLAS_MAX_SIZE:
+                break
+            size *= 2
+    except Exception as e:
+        Logger.warning('GAtlas: Could not build atlas: %s' % e)
+        return None
+
+    with open(stampfile,'w') as file:
+        json.dump(stamp,file)
+    return path
+
+
+def load_atlas(folder, cache, name='images'):
+    """
+    Returns the atlas for the images in ``folder``, building it if necessary.
+
+    See :func:`build_atlas` for how the atlas is kept.  The textures of the atlas are
+    named after the image files, without their extensions.  The pages are loaded from
+    their pixel files in ``cache`` when they have them (see :mod:`game2d.gpixels`).
+
+    :return: the atlas, or None if no atlas could be built or loaded
+    :rtype:  :class:`kivy.atlas.Atlas` or None
+
+    :param folder: The image folder
+    :type folder:  ``str``
+
+    :param cache: The folder to keep the atlas in
+    :type cache:  ``str``
+
+    :param name: The base name of the atlas files
+    :type name:  ``str``
+    """
+    path = build_atlas(folder,cache,name)
+    if path is None:
+        return None
+    try:
+        from kivy.atlas import Atlas
+        from kivy.cache import Cache
+        from .gpixels import load_image
+        # Atlas loads its pages through Image, which looks in this cache first
+        with open(path) as file:
+            pages = json.load(file)
+        for page in pages:
+            page = os.path.join(os.path.dirname(path),page)
+            Cache.append('kv.image','%s|0|0' % page,load_image(page,cache,nocache=False))
+        return Atlas(path)
+    except Exception as e:
+        Logger.warning('GAtlas: Could not load atlas: %s' % e)
+        return None
@@ -0,0 +1,313 @@
+"""
+A module to support batched drawing of many similar objects.
+
+Drawing a :class:`GObject` adds its own group of Kivy instructions to the view: a
+matrix push, three transforms, a color, a rectangle and a matrix pop.  That is fine
+for a few objects, but a screen full of sprites spends most of its time building
+and walking these instructions.  A :class:`GBatch` instead collects the objects
+that share a texture and color, and draws each such set with a single ``Mesh``.
+"""
+from kivy.graphics import *
+from kivy.graphics.instructions import *
+from .gobject import GObject
+from .grectangle import GRectangle, GEllipse, GImage, GLabel
+from .gsprite import GSprite
+import math
+
+
+def is_batchable(obj):
+    """
+    Checks whether an object can be drawn as part of a batch.
+
+    Only rectangles, images and sprites without a border may be batched.  Everything
+    else (ellipses, labels, paths, polygons, scenes and any object with a border) must
+    be drawn on its own.
+
+    :return: True if obj can be drawn as part of a batch
+    :rtype:  ``bool``
+
+    :param obj: The object to test
+    :type obj:  :class:`GObject`
+    """
+    if not isinstance(obj,GRectangle) or isinstance(obj,(GEllipse,GLabel)):
+        return False
+    return obj._linecolor is None or obj.linewidth == 0
+
+
+# #mark -
+
+class GBatch(object):
+    """
+    A class to draw many rectangles, images and sprites with a few ``Mesh`` instructions.
+
+    Each animation frame, pass the objects to draw to :meth:`draw` instead of calling
+    their own ``draw`` methods.  The objects are split into batches, one for each
+    combination of texture and color.  Sprites (and images) cut from the same image
+    file share a texture, so a whole filmstrip is one batch.  With a texture atlas (see
+    :meth:`GameApp.load_atlas`), every image in the atlas shares one texture as well.
+    Each batch is drawn as one ``Mesh``, with the four corners of every object packed
+    into its vertices.
+    The instructions are kept from one frame to the next, and only their vertex data
+    is replaced, so the cost of a frame grows with the number of objects but the
+    number of canvas instructions does not.  The mesh of a texture and color that is
+    no longer drawn is dropped (along with its hold on the texture), and made again
+    if they come back.
+
+    Batches are drawn in the order in which their first object appears.  Within a
+    batch, the objects are drawn in the order given.  Objects that cannot be batched
+    (see :func:`is_batchable`) are drawn on their own, before any of the batches.
+
+    A batch should be used for one set of objects; use a separate batch (or the usual
+    ``draw`` methods) for anything that must be drawn above or below them.
+
+    Like a :class:`GScene`, a batch has an origin (:attr:`x`, :attr:`y`) and its objects
+    are drawn as if that point were (0,0).  Moving the origin moves every object in the
+    batch with a single ``Translate``, without touching the objects or the meshes.
+    (Objects that cannot be batched are drawn at their own positions, ignoring it.)
+
+    A batch may also be added to the retained scene of a :class:`GView` (see
+    :meth:`GView.add`).  In that case, call :meth:`update` instead of :meth:`draw`
+    whenever the objects change; the meshes are then redrawn in place, and nothing is
+    added to the view at all.  A batch whose objects only move together need not be
+    updated at all; moving its origin is enough.
+    """
+
+    # IMMUTABLE ATTRIBUTES
+    @property
+    def batches(self):
+        """
+        The number of meshes drawn in the last frame.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return len(self._order)
+
+    # MUTABLE PROPERTIES
+    @property
+    def x(self):
+        """
+        The horizontal coordinate of the origin of this batch.
+
+        The objects in the batch are drawn as if (x,y) is the origin.
+
+        **invariant**: Value must be an ``int`` or ``float``
+        """
+        return self._trans.x
+
+    @x.setter
+    def x(self,value):
+        assert type(value) in [int,float], '%s is not a number' % repr(value)
+        self._trans.x = float(value)
+
+    @property
+    def y(self):
+        """
+        The vertical coordinate of the origin of this batch.
+
+        The objects in the batch are drawn as if (x,y) is the origin.
+
+        **invariant**: Value must be an ``int`` or ``float``
+        """
+        return self._trans.y
+
+    @y.setter
+    def y(self,value):
+        assert type(value) in [int,float], '%s is not a number' % repr(value)
+        self._trans.y = float(value)
+
+    @property
+    def visible(self):
+        """
+        Whether this batch is drawn.
+
+        This only matters when the batch is in the retained scene of a view.
+
+        **invariant**: Value must be a ``bool``
+        """
+        return self._visible
+
+    @visible.setter
+    def visible(self,value):
+        assert type(value) == bool, '%s is not a bool' % repr(value)
+        if value != self._visible:
+            self._visible = value
+            for view in self._retainers:
+                view._mark(self)
+
+    # BUILT-IN METHODS
+    def __init__(self, x=0, y=0):
+        """
+        Creates a new, empty batch renderer.
+
+        :param x: The horizontal coordinate of the origin
+        :type x:  ``int`` or ``float``
+
+        :param y: The vertical coordinate of the origin
+        :type y:  ``int`` or ``float``
+        """
+        self._trans = Translate(0,0,0)
+        self._meshgroup = InstructionGroup()
+        self._group = InstructionGroup()
+        self._group.add(PushMatrix())
+        self._group.add(self._trans)
+        self._group.add(self._meshgroup)
+        self._group.add(PopMatrix())
+        self.x = x
+        self.y = y
+        self._meshes = {}
+        self._order = []
+        self._indices = []
+        self._visible = True
+        self._retainers = []
+
+    # PUBLIC METHODS
+    def draw(self, view, objects):
+        """
+        Draws the given objects to the view.
+
+        Entries of ``objects`` that are None are skipped, so a grid with holes (like
+        a formation of aliens) may be passed directly, one row at a time.
+
+        :param view: view to draw to
+        :type view:  :class:`GView`
+
+        :param objects: the objects to draw
+        :type objects:  iterable of :class:`GObject` (or None)
+        """
+        self._build(objects,view)
+        view.draw(self._group)
+
+    def update(self, objects):
+        """
+        Replaces the contents of the batch with the given objects, without drawing.
+
+        This is the method to call for a batch in a retained scene, whenever the objects
+        in it change (other than by moving the origin of the batch).  As with
+        :meth:`draw`, None entries are skipped.  Objects that cannot be batched are
+        skipped as well; they must be drawn (or added to the scene) on their own.
+
+        :param objects: the objects in the batch
+        :type objects:  iterable of :class:`GObject` (or None)
+        """
+        self._build(objects)
+
+    # HIDDEN METHODS
+    @property
+    def _cache(self):
+        """
+        The instructions of this batch, as put in the retained scene of a view.
+        """
+        return self._group
+
+    def _build(self, objects, view=None):
+        """
+        Splits the objects into batches and refills their meshes.
+
+        Objects that cannot be batched are drawn to view on their own, or skipped if
+        view is None.
+
+        :param objects: the objects in the batch
+        :type objects:  iterable of :class:`GObject` (or None)
+
+        :param view: view to draw unbatchable objects to
+        :type view:  :class:`GView` or None
+        """
+        batches = {}
+        order = []
+        for obj in objects:
+            if obj is None:
+                continue
+            if not is_batchable(obj):
+                if view is not None:
+                    obj.draw(view)
+                continue
+            key = self._key(obj)
+            if key is None:
+                continue
+            if not key in batches:
+                batches[key] = []
+                order.append(key)
+            batches[key].append(obj)
+
+        for key in order:
+            self._fill(key,batches[key])
+        if order != self._order:
+            self._meshgroup.clear()
+            for key in order:
+                color, mesh = self._meshes[key]
+                self._meshgroup.add(color)
+                self._meshgroup.add(mesh)
+            # Drop meshes no longer drawn, or they keep their textures alive forever
+            for key in [key for key in self._meshes if not key in batches]:
+                del self._meshes[key]
+            self._order = order
+
+    def _key(self, obj):
+        """
+        Returns the batch key for an object, or None if it draws nothing.
+
+        The key is the id of the texture (None for a plain rectangle) and the color.
+
+        :param obj: The object to key
+        :type obj:  a batchable :class:`GObject`
+        """
+        image = isinstance(obj,(GImage,GSprite))
+        texture = obj._texture if image else None
+        if obj._fillcolor is None:
+            if not image:
+                return None
+            rgba = (1.0,1.0,1.0,1.0)
+        else:
+            rgba = tuple(obj._fillcolor.rgba)
+        return (None if texture is None else texture.id, rgba)
+
+    def _fill(self, key, objects):
+        """
+        Replaces the vertex data of the mesh for ``key`` with the given objects.
+
+        :param key: The batch key
+        :type key:  a key returned by :meth:`_key`
+
+        :param objects: The objects in the batch
+        :type objects:  ``list`` of :class:`GObject`
+        """
+        texture = objects[0]._texture if key[0] is not None else None
+        if not key in self._meshes:
+            mesh = Mesh(mode='triangles',texture=texture)
+            self._meshes[key] = (Color(*key[1]), mesh)
+        color, mesh = self._meshes[key]
+
+        vertices = []
+        for obj in objects:
+            tex = obj._texture if texture is not None else None
+            coords = tex.tex_coords if tex is not None else (0,0,1,0,1,1,0,1)
+            w = obj.width/2.0
+            h = obj.height/2.0
+            sx = obj._scale.x*w
+            sy = obj._scale.y*h
+            x = obj._trans.x
+            y = obj._trans.y
+            if obj._rotate.angle == 0.0:
+                vertices.extend((x-sx,y-sy,coords[0],coords[1],
+                                 x+sx,y-sy,coords[2],coords[3],
+                                 x+sx,y+sy,coords[4],coords[5],
+                                 x-sx,y+sy,coords[6],coords[7]))
+            else:
+                # Same order as the instructions: translate, then rotate, then scale
+                angle = math.radians(obj._rotate.angle)
+                cos = math.cos(angle)
+                sin = math.sin(angle)
+                corners = ((-sx,-sy),(sx,-sy),(sx,sy),(-sx,sy))
+                for n in range(4):
+                    cx, cy = corners[n]
+                    vertices.extend((x+cx*cos-cy*sin,y+cx*sin+cy*cos,
+                                     coords[2*n],coords[2*n+1]))
+
+        count = len(objects)
+        while len(self._indices) < 6*count:
+            n = len(self._indices)//6
+            self._indices.extend((4*n,4*n+1,4*n+2,4*n,4*n+2,4*n+3))
+        mesh.vertices = vertices
+        mesh.indices = self._indices[:6*count]
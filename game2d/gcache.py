@@ -0,0 +1,374 @@
+"""
+A module for the texture cache shared by every game2d class.
+
+Every texture loaded from an image file is kept in one :class:`GTextureCache`, so that
+objects with the same image share its texture (see :meth:`GameApp.load_texture`).  So
+is the text rendered by every :class:`GLabel`.  The cache has a memory budget.  It
+counts the bytes of each texture, and once they add up to more than the budget, it
+drops the textures used least recently.  Textures in use by an object stay alive, of
+course, but are loaded again the next time they are needed.
+Assets that should never be dropped, such as those of the current level, may be pinned.
+A :class:`GBatch` also lets go of the textures it no longer draws, so a texture dropped
+from the cache is freed as soon as nothing on screen uses it.
+
+A texture region (a frame of a filmstrip, or an image in the texture atlas) shares the
+memory of its texture, so the bytes of each texture are counted once, no matter how
+many regions of it are in the cache.  Note that the texture atlas keeps its own pages,
+so dropping images of the atlas only frees their memory once the atlas is unloaded.
+"""
+from kivy.logger import Logger
+import collections
+
+
+# The default memory budget of the texture cache, in bytes
+TEXTURE_BUDGET = 256 << 20
+
+# The bytes per pixel of each texture color format
+TEXTURE_DEPTHS = {'rgba': 4, 'bgra': 4, 'rgb': 3, 'bgr': 3, 'luminance_alpha': 2, 'rg': 2,
+                  'luminance': 1, 'alpha': 1, 'red': 1}
+
+
+def texture_bytes(texture):
+    """
+    Returns the number of bytes of memory used by a texture.
+
+    For a texture region, this is the memory of the whole texture it is part of.  A
+    texture with mipmaps uses a third more memory than one without.
+
+    :return: the size of the texture in bytes
+    :rtype:  ``int``
+
+    :param texture: The texture
+    :type texture:  :class:`kivy.graphics.texture.Texture`
+    """
+    u, v = texture.uvsize
+    width  = round(texture.width/abs(u))  if u else texture.width
+    height = round(texture.height/abs(v)) if v else texture.height
+    size = width*height*TEXTURE_DEPTHS.get(texture.colorfmt,4)
+    if texture.mipmap:
+        size += size//3
+    return size
+
+
+# #mark -
+
+class GTextureCache(object):
+    """
+    A class for a cache of textures with a memory budget.
+
+    A cache maps names (normally image file names) to textures, like a dictionary.  Any
+    hashable value may be a name; rendered text is named by a tuple of the text and its
+    style, which can never clash with a file name.
+    Looking up a texture with :meth:`get` marks it as used, and counts a hit or a miss.
+    Adding a texture that takes the cache over its :attr:`budget` drops the textures
+    used least recently, until the cache fits its budget again.  Pinned textures (see
+    :meth:`pin`) are never dropped; neither is the texture just added, even if it does
+    not fit the budget on its own.
+
+    Along with its texture, an entry may hold values made from the texture, such as the
+    frames of a filmstrip (see :meth:`attach`).  They are dropped with it.
+    """
+
+    # MUTABLE PROPERTIES
+    @property
+    def budget(self):
+        """
+        The most bytes of textures to keep, or None for no limit.
+
+        Lowering the budget drops textures at once, if needed.
+
+        **Invariant**: Must be None or an int >= 0.
+        """
+        return self._budget
+
+    @budget.setter
+    def budget(self,value):
+        assert value is None or (type(value) == int and value >= 0), \
+            '%s is not a valid budget' % repr(value)
+        self._budget = value
+        self._evict()
+
+    # IMMUTABLE ATTRIBUTES
+    @property
+    def size(self):
+        """
+        The bytes of all the textures in the cache.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._size
+
+    @property
+    def hits(self):
+        """
+        The number of lookups that found their texture in the cache.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._hits
+
+    @property
+    def misses(self):
+        """
+        The number of lookups that did not find their texture in the cache.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._misses
+
+    @property
+    def evictions(self):
+        """
+        The number of textures dropped to keep the cache within its budget.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._evictions
+
+    @property
+    def pinned(self):
+        """
+        The names pinned in the cache.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be a frozenset of names.
+        """
+        return frozenset(self._pinned)
+
+    # BUILT-IN METHODS
+    def __init__(self, budget=TEXTURE_BUDGET):
+        """
+        Creates a new, empty texture cache.
+
+        :param budget: The most bytes of textures to keep, or None for no limit
+        :type budget:  ``int`` >= 0 or None
+        """
+        self._entries = collections.OrderedDict()   # name -> [texture, attached values]
+        self._textures = {}                         # texture id -> [bytes, entries]
+        self._pinned = set()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._budget = None
+        self.budget = budget
+
+    def __len__(self):
+        """
+        Returns the number of textures in the cache.
+        """
+        return len(self._entries)
+
+    def __contains__(self, name):
+        """
+        Returns True if ``name`` is in the cache.
+
+        This does not mark the texture as used, nor count as a lookup.
+
+        :param name: The name of the texture
+        :type name:  ``str``
+        """
+        return name in self._entries
+
+    def __iter__(self):
+        """
+        Returns an iterator over the names in the cache, used least recently first.
+        """
+        return iter(list(self._entries))
+
+    def __getitem__(self, name):
+        """
+        Returns the texture for ``name``, marking it as used.
+
+        :param name: The name of the texture
+        :type name:  ``str``
+        """
+        texture = self.get(name)
+        if texture is None:
+            raise KeyError(name)
+        return texture
+
+    def __setitem__(self, name, texture):
+        """
+        Adds (or replaces) the texture for ``name``, dropping others to fit the budget.
+
+        :param name: The name of the texture
+        :type name:  ``str``
+
+        :param texture: The texture
+        :type texture:  :class:`kivy.graphics.texture.Texture`
+        """
+        assert texture is not None, 'the texture for %s is None' % repr(name)
+        if name in self._entries:
+            self._remove(name)
+        self._entries[name] = [texture,{}]
+        record = self._textures.get(texture.id)
+        if record is None:
+            record = [texture_bytes(texture),0]
+            self._textures[texture.id] = record
+            self._size += record[0]
+        record[1] += 1
+        self._evict(name)
+
+    def __delitem__(self, name):
+        """
+        Removes the texture for ``name``.
+
+        :param name: The name of the texture
+        :type name:  ``str``
+        """
+        if not name in self._entries:
+            raise KeyError(name)
+        self._remove(name)
+
+    # PUBLIC METHODS
+    def get(self, name, default=None):
+        """
+        Returns the texture for ``name``, or ``default`` if it is not in the cache.
+
+        The lookup counts as a hit or a miss, and a texture found is marked as used.
+
+        :param name: The name of the texture
+        :type name:  ``str``
+
+        :param default: The value to return for a miss
+        :type default:  any value
+        """
+        entry = self._entries.get(name)
+        if entry is None:
+            self._misses += 1
+            return default
+        self._hits += 1
+        self._entries.move_to_end(name)
+        return entry[0]
+
+    def pop(self, name, default=None):
+        """
+        Removes the texture for ``name`` and returns it, or ``default`` if it is not in
+        the cache.
+
+        The name stays pinned if it was.
+
+        :param name: The name of the texture
+        :type name:  ``str``
+
+        :param default: The value to return if the texture is not in the cache
+        :type default:  any value
+        """
+        if not name in self._entries:
+            return default
+        return self._remove(name)
+
+    def pin(self, name):
+        """
+        Pins ``name``, so that its texture is never dropped to fit the budget.
+
+        A name may be pinned before its texture is loaded.  Pinning a name twice has
+        no further effect.
+
+        :param name: The name of the texture
+        :type name:  ``str``
+        """
+        self._pinned.add(name)
+
+    def unpin(self, name):
+        """
+        Unpins ``name``, so that its texture may be dropped again.
+
+        Textures over the budget are dropped at once.
+
+        :param name: The name of the texture
+        :type name:  ``str``
+        """
+        self._pinned.discard(name)
+        self._evict()
+
+    def attach(self, name, key, value):
+        """
+        Attaches a value made from the texture for ``name``, such as its frames.
+
+        The value is dropped along with the texture.  Nothing is attached if ``name`` is
+        not in the cache.
+
+        :param name: The name of the texture
+        :type name:  ``str``
+
+        :param key: The key of the value, among the values attached to this texture
+        :type key:  any hashable value
+
+        :param value: The value to attach
+        :type value:  any value
+        """
+        entry = self._entries.get(name)
+        if entry is not None:
+            entry[1][key] = value
+
+    def attached(self, name, key):
+        """
+        Returns the value attached to the texture for ``name`` under ``key``, or None.
+
+        This does not mark the texture as used, nor count as a lookup.
+
+        :param name: The name of the texture
+        :type name:  ``str``
+
+        :param key: The key of the value
+        :type key:  any hashable value
+        """
+        entry = self._entries.get(name)
+        return None if entry is None else entry[1].get(key)
+
+    def clear(self):
+        """
+        Removes every texture from the cache.
+
+        The pins and the counters are kept.
+        """
+        for name in list(self._entries):
+            self._remove(name)
+
+    # HIDDEN METHODS
+    def _remove(self, name):
+        """
+        Removes the entry for ``name``, and returns its texture.
+
+        :param name: The name of the texture
+        :type name:  ``str``
+        """
+        texture = self._entries.pop(name)[0]
+        record = self._textures[texture.id]
+        record[1] -= 1
+        if record[1] == 0:
+            del self._textures[texture.id]
+            self._size -= record[0]
+        return texture
+
+    def _evict(self, keep=None):
+        """
+        Drops the textures used least recently until the cache fits its budget.
+
+        Pinned textures are never dropped, and neither is the texture ``keep``.
+
+        :param keep: The name of a texture to keep, or None
+        :type keep:  ``str`` or None
+        """
+        if self._budget is None or self._size <= self._budget:
+            return
+        for name in list(self._entries):
+            if self._size <= self._budget:
+                break
+            if name != keep and not name in self._pinned:
+                self._remove(name)
+                self._evictions += 1
+        if self._size > self._budget:
+            Logger.debug('GTextureCache: %d bytes of textures in use exceed the budget of %d' %
+                         (self._size,self._budget))
@@ -0,0 +1,454 @@
+"""
+A module to record the frames of a game to a video file.
+
+A :class:`GCapture` takes the pixels of each frame as they are grabbed from the window,
+and writes them out on a background thread.  The frames wait in a ring buffer of fixed
+size between the two.  Grabbing a frame only puts it in the buffer, so recording never
+holds up the animation loop; if the writer falls behind and the buffer fills up, new
+frames are dropped (and counted in :attr:`GCapture.dropped`) rather than waited on.
+
+There are four formats, picked by the file name (or given explicitly):
+
+* ``'y4m'`` (``.y4m``): an uncompressed YUV4MPEG2 stream (4:4:4 chroma), as read by
+  ffmpeg, mpv and most video encoders.
+* ``'avi'`` (``.avi``): an uncompressed (24-bit RGB) AVI file, limited to 1 GB.
+* ``'raw'`` (``.raw`` or ``.rgba``): the RGBA pixels of each frame, top row first, one
+  frame after another with no header.
+* ``'png'`` (any other name): a folder with one PNG image per frame.  This requires PIL
+  (Pillow), and is the slowest of the formats to write.
+
+See :meth:`GameApp.start_capture` for recording a game.
+"""
+from kivy.logger import Logger
+import numpy as np
+import threading
+import struct
+import os
+import os.path
+
+
+# The number of frames the ring buffer holds by default
+CAPTURE_FRAMES = 30
+
+# The largest AVI file (in bytes) written by :class:`GCapture`
+AVI_MAX_SIZE = 1 << 30
+
+# The file extensions of each capture format (other names are PNG folders)
+CAPTURE_EXTENSIONS = {'.y4m': 'y4m', '.avi': 'avi', '.raw': 'raw', '.rgba': 'raw'}
+
+
+def capture_format(path):
+    """
+    Returns the capture format for a file name, based on its extension.
+
+    :return: one of ``'y4m'``, ``'avi'``, ``'raw'`` or ``'png'``
+    :rtype:  ``str``
+
+    :param path: The file name
+    :type path:  ``str``
+    """
+    ext = os.path.splitext(path)[1].lower()
+    return CAPTURE_EXTENSIONS.get(ext,'png')
+
+
+# #mark -
+
+class _RawWriter(object):
+    """
+    A writer for RGBA frames, one after the other.
+
+    Every writer is given the frames bottom row first, as they come from OpenGL, and
+    writes them in its own format.  Writers are only used on the capture thread.
+    """
+
+    def __init__(self, path, size, fps):
+        """
+        Creates a writer, opening the file for the frames.
+
+        :param path: The file name
+        :type path:  ``str``
+
+        :param size: The frame size (width, height) in pixels
+        :type size:  ``tuple``
+
+        :param fps: The frame rate
+        :type fps:  ``int`` or ``float``
+        """
+        self._size = size
+        self._file = open(path,'wb')
+
+    def write(self, frame):
+        """
+        Writes a frame.
+
+        :return: False if the frame would not fit in the file; True otherwise
+        :rtype:  ``bool``
+
+        :param frame: The pixels, bottom row first
+        :type frame:  ``numpy.ndarray`` of shape (height, width, 4)
+        """
+        self._file.write(frame[::-1].tobytes())
+        return True
+
+    def close(self):
+        """
+        Finishes the file.
+        """
+        self._file.close()
+
+
+class _Y4MWriter(_RawWriter):
+    """
+    A writer for YUV4MPEG2 streams (BT.601 colors, 4:4:4 chroma).
+    """
+
+    def __init__(self, path, size, fps):
+        _RawWriter.__init__(self,path,size,fps)
+        rate = (int(fps),1) if fps == int(fps) else (int(round(fps*1000)),1000)
+        header = 'YUV4MPEG2 W%d H%d F%d:%d Ip A1:1 C444\n' % (size[0],size[1],rate[0],rate[1])
+        self._file.write(header.encode('ascii'))
+
+    def write(self, frame):
+        rgb = frame[::-1,:,:3].astype(np.int32)
+        r = rgb[:,:,0]
+        g = rgb[:,:,1]
+        b = rgb[:,:,2]
+        planes = np.empty((3,)+r.shape,np.int32)
+        planes[0] = (( 66*r+129*g+ 25*b+128) >> 8)+16
+        planes[1] = ((-38*r- 74*g+112*b+128) >> 8)+128
+        planes[2] = ((112*r- 94*g- 18*b+128) >> 8)+128
+        self._file.write(b'FRAME\n')
+        self._file.write(planes.astype(np.uint8).tobytes())
+        return True
+
+
+class _AVIWriter(_RawWriter):
+    """
+    A writer for uncompressed AVI files (24-bit BGR frames, bottom row first).
+
+    The headers are written with a length of zero, and filled in by :meth:`close`,
+    along with the index of the frames.
+    """
+
+    def __init__(self, path, size, fps):
+        _RawWriter.__init__(self,path,size,fps)
+        width, height = size
+        self._stride = (3*width+3) & ~3
+        self._bytes  = self._stride*height
+        self._frames = 0
+        scale, rate = (1,int(fps)) if fps == int(fps) else (1000,int(round(fps*1000)))
+
+        avih = struct.pack('<14I',int(round(1000000.0/fps)),int(self._bytes*fps),0,0x10,
+                           0,0,1,self._bytes,width,height,0,0,0,0)
+        strh = struct.pack('<4s4sI2H8I4h',b'vids',b'DIB ',0,0,0,0,scale,rate,0,0,
+                           self._bytes,0xFFFFFFFF,0,0,0,width,height)
+        strf = struct.pack('<IiiHHIIiiII',40,width,height,1,24,0,self._bytes,0,0,0,0)
+        strl = self._chunk(b'strh',strh)+self._chunk(b'strf',strf)
+        hdrl = self._chunk(b'avih',avih)+self._list(b'strl',strl)
+        head = b'AVI '+self._list(b'hdrl',hdrl)
+
+        # Positions of the fields to fill in later
+        self._total  = 12+12+8+16
+        self._length = 12+12+8+56+12+8+32
+        self._movi   = 12+len(head)-4
+        self._file.write(b'RIFF'+struct.pack('<I',0)+head)
+        self._file.write(b'LIST'+struct.pack('<I',0)+b'movi')
+        self._index = []
+
+    def write(self, frame):
+        offset = self._file.tell()-(self._movi+8)
+        if offset+8+self._bytes+16*(self._frames+1)+8 > AVI_MAX_SIZE:
+            return False
+        width = frame.shape[1]
+        data = np.zeros((frame.shape[0],self._stride),np.uint8)
+        data[:,:3*width] = frame[:,:,2::-1].reshape(frame.shape[0],3*width)
+        self._file.write(b'00db'+struct.pack('<I',self._bytes))
+        self._file.write(data.tobytes())
+        self._index.append(struct.pack('<4sIII',b'00db',0x10,offset,self._bytes))
+        self._frames += 1
+        return True
+
+    def close(self):
+        end = self._file.tell()
+        self._file.write(self._chunk(b'idx1',b''.join(self._index)))
+        size = self._file.tell()
+        self._file.seek(4)
+        self._file.write(struct.pack('<I',size-8))
+        self._file.seek(self._movi+4)
+        self._file.write(struct.pack('<I',end-(self._movi+8)))
+        self._file.seek(self._total)
+        self._file.write(struct.pack('<I',self._frames))
+        self._file.seek(self._length)
+        self._file.write(struct.pack('<I',self._frames))
+        self._file.close()
+
+    @staticmethod
+    def _chunk(fourcc, data):
+        """
+        Returns a RIFF chunk with the given data (padded to an even length).
+        """
+        pad = b'\0' if len(data) % 2 else b''
+        return fourcc+struct.pack('<I',len(data))+data+pad
+
+    @staticmethod
+    def _list(fourcc, data):
+        """
+        Returns a RIFF list of the given type, holding the given chunks.
+        """
+        return b'LIST'+struct.pack('<I',len(data)+4)+fourcc+data
+
+
+class _PNGWriter(_RawWriter):
+    """
+    A writer for a folder of PNG images, named ``frame-000000.png`` and so on.
+    """
+
+    def __init__(self, path, size, fps):
+        from PIL import Image
+        self._image = Image
+        self._path  = path
+        self._frames = 0
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, frame):
+        name = os.path.join(self._path,'frame-%06d.png' % self._frames)
+        self._image.fromarray(frame[::-1]).save(name,compress_level=1)
+        self._frames += 1
+        return True
+
+    def close(self):
+        pass
+
+
+# #mark -
+
+class GCapture(object):
+    """
+    A class to record frames to a video file on a background thread.
+
+    Frames are given to :meth:`push`, which only stores them in a ring buffer and
+    returns at once.  A thread takes the frames from the buffer and writes them to the
+    file.  If the buffer is full when a frame arrives, because the writer cannot keep
+    up, that frame is dropped.  The video then skips a frame, but the game never waits
+    on the disk.  The frame rate of the video is a nominal one; a video of a game that
+    ran slow (or dropped frames) plays back faster than the game did.
+
+    A capture must be closed with :meth:`close` once recording is done.  That writes
+    out the frames still in the buffer, and finishes the file.
+    """
+
+    # IMMUTABLE ATTRIBUTES
+    @property
+    def path(self):
+        """
+        The file (or folder) the frames are written to.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be a ``str``.
+        """
+        return self._path
+
+    @property
+    def format(self):
+        """
+        The format of the frames, one of ``'y4m'``, ``'avi'``, ``'raw'`` or ``'png'``.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be a ``str``.
+        """
+        return self._format
+
+    @property
+    def size(self):
+        """
+        The size (width, height) of each frame in pixels.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be a tuple of two ints > 0.
+        """
+        return self._size
+
+    @property
+    def captured(self):
+        """
+        The number of frames put in the ring buffer.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._captured
+
+    @property
+    def written(self):
+        """
+        The number of frames written to the file so far.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._written
+
+    @property
+    def dropped(self):
+        """
+        The number of frames dropped, because the buffer was full or the file could not
+        be written.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._dropped
+
+    @property
+    def pending(self):
+        """
+        The number of frames waiting in the ring buffer.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._count
+
+    @property
+    def closed(self):
+        """
+        Whether this capture has been closed.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be a ``bool``.
+        """
+        return self._closed
+
+    # BUILT-IN METHODS
+    def __init__(self, path, size, format=None, fps=60, frames=CAPTURE_FRAMES):
+        """
+        Creates a new capture, and starts its writer thread.
+
+        :param path: The file (or folder, for PNG images) to write to
+        :type path:  ``str``
+
+        :param size: The size (width, height) of each frame in pixels
+        :type size:  ``tuple`` of two ints > 0
+
+        :param format: The format, or None to pick it from the file name
+        :type format:  ``str`` or None
+
+        :param fps: The (nominal) frame rate of the video
+        :type fps:  ``int`` or ``float`` > 0
+
+        :param frames: The number of frames the ring buffer holds
+        :type frames:  ``int`` > 0
+        """
+        assert type(path) == str, '%s is not a string' % repr(path)
+        assert len(size) == 2 and all(type(x) == int and x > 0 for x in size), \
+            '%s is not a valid frame size' % repr(size)
+        assert format is None or format in ('y4m','avi','raw','png'), \
+            '%s is not a capture format' % repr(format)
+        assert type(fps) in [int,float] and fps > 0, '%s is not a valid frame rate' % repr(fps)
+        assert type(frames) == int and frames > 0, '%s is not a valid buffer size' % repr(frames)
+
+        self._path = path
+        self._format = capture_format(path) if format is None else format
+        self._size = (size[0],size[1])
+        self._ring = [None]*frames
+        self._head = 0
+        self._count = 0
+        self._captured = 0
+        self._written = 0
+        self._dropped = 0
+        self._closed = False
+        self._failed = False
+        self._lock = threading.Condition()
+
+        writers = {'y4m': _Y4MWriter, 'avi': _AVIWriter, 'raw': _RawWriter, 'png': _PNGWriter}
+        self._writer = writers[self._format](path,self._size,fps)
+        self._thread = threading.Thread(target=self._run,name='GCapture',daemon=True)
+        self._thread.start()
+
+    # PUBLIC METHODS
+    def push(self, data):
+        """
+        Adds a frame to the ring buffer, without waiting.
+
+        The frame is dropped if the buffer is full, if it is the wrong size, or if this
+        capture is closed (or its file could not be written).  The data is not copied,
+        so it must not be changed after it is pushed.
+
+        :return: True if the frame was added; False if it was dropped
+        :rtype:  ``bool``
+
+        :param data: The RGBA pixels of the frame, bottom row first
+        :type data:  ``bytes``
+        """
+        with self._lock:
+            if (self._closed or self._failed or self._count == len(self._ring) or
+                len(data) != 4*self._size[0]*self._size[1]):
+                self._dropped += 1
+                return False
+            self._ring[(self._head+self._count) % len(self._ring)] = data
+            self._count += 1
+            self._captured += 1
+            self._lock.notify()
+        return True
+
+    def close(self):
+        """
+        Stops recording, and waits for the remaining frames to be written.
+
+        Closing a capture a second time has no effect.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._lock.notify()
+        self._thread.join()
+
+    # HIDDEN METHODS
+    def _run(self):
+        """
+        Writes the frames in the ring buffer, until the capture is closed.
+
+        This method is the body of the writer thread.
+        """
+        width, height = self._size
+        while True:
+            with self._lock:
+                while self._count == 0 and not self._closed:
+                    self._lock.wait()
+                if self._count == 0:
+                    break
+                data = self._ring[self._head]
+                self._ring[self._head] = None
+                self._head = (self._head+1) % len(self._ring)
+                self._count -= 1
+
+            written = False
+            if not self._failed:
+                try:
+                    frame = np.frombuffer(data,np.uint8).reshape(height,width,4)
+                    written = self._writer.write(frame)
+                    if not written:
+                        Logger.warning('GCapture: %s is full' % self._path)
+                        self._failed = True
+                except Exception as e:
+                    Logger.warning('GCapture: Could not write %s: %s' % (self._path,e))
+                    self._failed = True
+            with self._lock:
+                if written:
+                    self._written += 1
+                else:
+                    self._dropped += 1
+
+        try:
+            self._writer.close()
+        except Exception as e:
+            Logger.warning('GCapture: Could not finish %s: %s' % (self._path,e))
@@ -139,7 +139,7 @@ class GObject(object):
         assert value > 0, '%s is not positive' % repr(value)
         self._width = float(value)
         if self._defined:
-            self._reset()
+            self._update('width')
 
     @property
     def height(self):
@@ -158,7 +158,7 @@ class GObject(object):
         assert value > 0, '%s is not positive' % repr(value)
         self._height = float(value)
         if self._defined:
-            self._reset()
+            self._update('height')
 
     @property
     def scale(self):
@@ -243,9 +243,7 @@ class GObject(object):
             else:
                 value = introcs.RGB.CreateName(value).glColor()
 
-        self._linecolor = None if value is None else Color(value[0],value[1],value[2],value[3])
-        if self._defined:
-            self._reset()
+        self._recolor('_linecolor',value)
 
     @property
     def fillcolor(self):
@@ -281,9 +279,27 @@ class GObject(object):
             else:
                 value = introcs.RGB.CreateName(value).glColor()
 
-        self._fillcolor = None if value is None else Color(value[0],value[1],value[2],value[3])
-        if self._defined:
-            self._reset()
+        self._recolor('_fillcolor',value)
+
+    @property
+    def visible(self):
+        """
+        Whether this object is drawn.
+
+        An invisible object is skipped by :meth:`draw`, and is not shown in any view
+        whose retained scene it belongs to.
+
+        **invariant**: Value must be a ``bool``
+        """
+        return self._visible
+
+    @visible.setter
+    def visible(self,value):
+        assert type(value) == bool, '%s is not a bool' % repr(value)
+        if value != self._visible:
+            self._visible = value
+            for view in self._retainers:
+                view._mark(self)
 
     @property
     def name(self):
@@ -480,6 +496,8 @@ class GObject(object):
         """
         # Set the properties.
         self._defined = False
+        self._visible = True
+        self._retainers = []
 
         # Create the Kivy transforms for position and size
         self._trans  = Translate(0,0,0)
@@ -590,11 +608,14 @@ class GObject(object):
         """
         Draws this shape in the provide view.
 
-        Ideally, the view should be the one provided by :class:`GameApp`.
+        Ideally, the view should be the one provided by :class:`GameApp`.  Nothing
+        is drawn if the object is not :attr:`visible`.
 
         :param view: view to draw to
         :type view:  :class:`GView`
         """
+        if not self._visible:
+            return
         try:
             view.draw(self._cache)
         except:
@@ -604,12 +625,51 @@ class GObject(object):
     def _reset(self):
         """
         Resets the drawing cache.
+
+        Any view with this object in its retained scene is told to pick up the new
+        cache.
         """
         self._cache = InstructionGroup()
         self._cache.add(PushMatrix())
         self._cache.add(self._trans)
         self._cache.add(self._rotate)
         self._cache.add(self._scale)
+        for view in self._retainers:
+            view._mark(self)
+
+    def _update(self,name):
+        """
+        Updates the drawing cache after the attribute ``name`` has changed.
+
+        By default, this rebuilds the cache with :meth:`_reset`.  Subclasses that keep
+        handles to their instructions may instead change them in place, as long as the
+        change leaves the same instructions in the cache.
+
+        :param name: The name of the attribute that changed (e.g. ``'width'``)
+        :type name:  ``str``
+        """
+        self._reset()
+
+    def _recolor(self,attr,rgba):
+        """
+        Sets one of the colors of this object, and updates the drawing cache.
+
+        If the object already has a color there, its Kivy ``Color`` is changed in
+        place; a new one is only made when a color is added.
+
+        :param attr: The color attribute, ``'_linecolor'`` or ``'_fillcolor'``
+        :type attr:  ``str``
+
+        :param rgba: The new color, or None for no color
+        :type rgba:  4-element sequence of floats, or None
+        """
+        color = getattr(self,attr,None)
+        if rgba is None or color is None:
+            setattr(self,attr,None if rgba is None else Color(rgba[0],rgba[1],rgba[2],rgba[3]))
+        else:
+            color.rgba = rgba
+        if self._defined:
+            self._update(attr[1:])
 
     def _build_matrix(self):
         """
@@ -765,3 +825,244 @@ class GScene(GObject):
         for x in self.children:
             self._cache.add(x._cache)
         self._cache.add(PopMatrix())
+
+
+# #mark -
+
+# The colors named by strings so far, as rgba tuples (used when properties are unchecked)
+COLOR_CACHE = {}
+
+# The properties of GObject that have unchecked versions
+FAST_PROPERTIES = ('x', 'y', 'width', 'height', 'angle', 'linecolor', 'fillcolor',
+                   'left', 'right', 'top', 'bottom')
+
+
+def is_checked():
+    """
+    Checks whether the properties of :class:`GObject` check the values assigned to them.
+
+    :return: True if the properties are checked (the default)
+    :rtype:  ``bool``
+    """
+    return _CHECKED[0]
+
+
+def set_checked(checked):
+    """
+    Chooses whether the properties of :class:`GObject` check the values assigned to them.
+
+    The properties of a graphics object are checked by default: every assignment asserts
+    that the value satisfies the invariant, and colors are parsed from scratch.  That is
+    what you want while writing a game, but the checks are most of the cost of moving an
+    object.  Once a game is finished, this function may be called (once, at startup) to
+    replace the properties in :const:`FAST_PROPERTIES` with versions that check nothing:
+
+    * ``x``, ``y``, ``width`` and ``height`` only store the value.
+    * ``left``, ``right``, ``top`` and ``bottom`` move the object directly when it is not
+      rotated.
+    * ``angle`` compares the new angle to the old one with ``!=``, rather than with
+      ``numpy.allclose``.
+    * ``linecolor`` and ``fillcolor`` parse each color string once, and keep the result
+      in :const:`COLOR_CACHE`.
+
+    An invalid value is then no longer reported where it is assigned, but fails later
+    (if at all), so only turn off the checks in a game that already works.  Subclasses
+    that override these properties (such as :class:`GLabel`) are not affected.
+
+    :param checked: Whether to check the properties
+    :type checked:  ``bool``
+    """
+    assert type(checked) == bool, '%s is not a bool' % repr(checked)
+    if checked == _CHECKED[0]:
+        return
+    source = _CHECKED_IMPL if checked else _UNCHECKED_IMPL
+    for name in FAST_PROPERTIES:
+        setattr(GObject,name,source[name])
+    _CHECKED[0] = checked
+
+
+def _rgba(value):
+    """
+    Returns the rgba values of a valid color value, without checking it.
+
+    :param value: The color
+    :type value:  a value satisfying :func:`is_color`, or None
+    """
+    if value is None:
+        return None
+    if type(value) == str:
+        rgba = COLOR_CACHE.get(value)
+        if rgba is None:
+            if value[0] == '#':
+                rgba = tuple(introcs.RGB.CreateWebColor(value).glColor())
+            else:
+                rgba = tuple(introcs.RGB.CreateName(value).glColor())
+            COLOR_CACHE[value] = rgba
+        return rgba
+    if type(value) in [introcs.RGB, introcs.HSV]:
+        return value.glColor()
+    if len(value) == 3:
+        return (value[0],value[1],value[2],1.0)
+    return value
+
+
+def _set_x(self,value):
+    """
+    Sets the x coordinate without checking it.
+    """
+    self._trans.x = value
+    self._mtrue = False
+
+
+def _set_y(self,value):
+    """
+    Sets the y coordinate without checking it.
+    """
+    self._trans.y = value
+    self._mtrue = False
+
+
+def _set_width(self,value):
+    """
+    Sets the width without checking it.
+    """
+    self._width = float(value)
+    if self._defined:
+        self._update('width')
+
+
+def _set_height(self,value):
+    """
+    Sets the height without checking it.
+    """
+    self._height = float(value)
+    if self._defined:
+        self._update('height')
+
+
+def _set_angle(self,value):
+    """
+    Sets the angle without checking it.
+    """
+    if value != self._rotate.angle:
+        self._rotate.angle = value
+        self._mtrue = False
+
+
+def _set_linecolor(self,value):
+    """
+    Sets the line color without checking it.
+    """
+    self._recolor('_linecolor',_rgba(value))
+
+
+def _set_fillcolor(self,value):
+    """
+    Sets the fill color without checking it.
+    """
+    self._recolor('_fillcolor',_rgba(value))
+
+
+def _get_left(self):
+    """
+    Returns the left edge, without going through other properties.
+    """
+    if self._rotate.angle == 0.0:
+        return self._trans.x-self.width/2.0
+    return _CHECKED_IMPL['left'].fget(self)
+
+
+def _set_left(self,value):
+    """
+    Moves the left edge without checking the value.
+    """
+    if self._rotate.angle == 0.0:
+        self._trans.x = value+self.width/2.0
+    else:
+        self._trans.x += value-_CHECKED_IMPL['left'].fget(self)
+    self._mtrue = False
+
+
+def _get_right(self):
+    """
+    Returns the right edge, without going through other properties.
+    """
+    if self._rotate.angle == 0.0:
+        return self._trans.x+self.width/2.0
+    return _CHECKED_IMPL['right'].fget(self)
+
+
+def _set_right(self,value):
+    """
+    Moves the right edge without checking the value.
+    """
+    if self._rotate.angle == 0.0:
+        self._trans.x = value-self.width/2.0
+    else:
+        self._trans.x += value-_CHECKED_IMPL['right'].fget(self)
+    self._mtrue = False
+
+
+def _get_top(self):
+    """
+    Returns the top edge, without going through other properties.
+    """
+    if self._rotate.angle == 0.0:
+        return self._trans.y+self.height/2.0
+    return _CHECKED_IMPL['top'].fget(self)
+
+
+def _set_top(self,value):
+    """
+    Moves the top edge without checking the value.
+    """
+    if self._rotate.angle == 0.0:
+        self._trans.y = value-self.height/2.0
+    else:
+        self._trans.y += value-_CHECKED_IMPL['top'].fget(self)
+    self._mtrue = False
+
+
+def _get_bottom(self):
+    """
+    Returns the bottom edge, without going through other properties.
+    """
+    if self._rotate.angle == 0.0:
+        return self._trans.y-self.height/2.0
+    return _CHECKED_IMPL['bottom'].fget(self)
+
+
+def _set_bottom(self,value):
+    """
+    Moves the bottom edge without checking the value.
+    """
+    if self._rotate.angle == 0.0:
+        self._trans.y = value+self.height/2.0
+    else:
+        self._trans.y += value-_CHECKED_IMPL['bottom'].fget(self)
+    self._mtrue = False
+
+
+# Whether the properties are checked (in a list, so that it can be changed)
+_CHECKED = [True]
+
+# The checked (original) and unchecked versions of each property in FAST_PROPERTIES
+_CHECKED_IMPL = dict((name, GObject.__dict__[name]) for name in FAST_PROPERTIES)
+_UNCHECKED_IMPL = {
+    'x':         property(_CHECKED_IMPL['x'].fget,_set_x,doc=_CHECKED_IMPL['x'].__doc__),
+    'y':         property(_CHECKED_IMPL['y'].fget,_set_y,doc=_CHECKED_IMPL['y'].__doc__),
+    'width':     property(_CHECKED_IMPL['width'].fget,_set_width,
+                          doc=_CHECKED_IMPL['width'].__doc__),
+    'height':    property(_CHECKED_IMPL['height'].fget,_set_height,
+                          doc=_CHECKED_IMPL['height'].__doc__),
+    'angle':     property(_CHECKED_IMPL['angle'].fget,_set_angle,
+                          doc=_CHECKED_IMPL['angle'].__doc__),
+    'linecolor': property(_CHECKED_IMPL['linecolor'].fget,_set_linecolor,
+                          doc=_CHECKED_IMPL['linecolor'].__doc__),
+    'fillcolor': property(_CHECKED_IMPL['fillcolor'].fget,_set_fillcolor,
+                          doc=_CHECKED_IMPL['fillcolor'].__doc__),
+    'left':      property(_get_left,_set_left,doc=_CHECKED_IMPL['left'].__doc__),
+    'right':     property(_get_right,_set_right,doc=_CHECKED_IMPL['right'].__doc__),
+    'top':       property(_get_top,_set_top,doc=_CHECKED_IMPL['top'].__doc__),
+    'bottom':    property(_get_bottom,_set_bottom,doc=_CHECKED_IMPL['bottom'].__doc__),
+}
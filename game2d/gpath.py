@@ -120,7 +120,7 @@ class GPath(GObject):
         assert is_point_tuple(value,2),'value %s is not a valid list of points' %  repr(value)
         self._points = tuple(value)
         if self._defined:
-            self._reset()
+            self._update('points')
     
     @property
     def linewidth(self):
@@ -139,7 +139,7 @@ class GPath(GObject):
         assert value >= 0, 'value %s is negative' % repr(value)
         self._linewidth = value
         if self._defined:
-            self._reset()
+            self._update('linewidth')
     
     
     # IMMUTABLE PROPERTIES
@@ -255,11 +255,30 @@ class GPath(GObject):
         Resets the drawing cache
         """
         GObject._reset(self)
+        self._line = None
         if not self._linecolor is None:
             self._cache.add(self._linecolor)
-            line = Line(points=self.points,cap='round',joint='round',width=self.linewidth)
-            self._cache.add(line)
+            self._line = Line(points=self.points,cap='round',joint='round',width=self.linewidth)
+            self._cache.add(self._line)
         self._cache.add(PopMatrix())
+        self._built = self._linecolor is None
+    
+    def _update(self,name):
+        """
+        Updates the drawing cache after the attribute ``name`` has changed.
+        
+        The cache is only rebuilt when the line color is added or removed.  Otherwise
+        the points and width of the line are changed in place.
+        
+        :param name: The name of the attribute that changed (e.g. ``'points'``)
+        :type name:  ``str``
+        """
+        if (self._linecolor is None) != self._built:
+            self._reset()
+        elif name == 'points' and not self._line is None:
+            self._line.points = self.points
+        elif name == 'linewidth' and not self._line is None:
+            self._line.width = self.linewidth
 
 
 # #mark -
@@ -349,6 +368,17 @@ class GTriangle(GPath):
     
     
     # HIDDEN METHODS
+    def _update(self,name):
+        """
+        Updates the drawing cache after the attribute ``name`` has changed.
+        
+        As the fill is a mesh, the cache is always rebuilt.
+        
+        :param name: The name of the attribute that changed (e.g. ``'points'``)
+        :type name:  ``str``
+        """
+        self._reset()
+    
     def _reset(self):
         """
         Resets the drawing cache
@@ -540,13 +570,27 @@ class GPolygon(GPath):
     
     
     # HIDDEN METHODS
+    def _update(self,name):
+        """
+        Updates the drawing cache after the attribute ``name`` has changed.
+        
+        As the fill is a mesh, the cache is always rebuilt.
+        
+        :param name: The name of the attribute that changed (e.g. ``'points'``)
+        :type name:  ``str``
+        """
+        self._reset()
+    
     def _make_mesh(self):
         """
         Creates the mesh for this polygon
         """
-        size = len(self.points)/2
-        try:
-            texture = Image(source=self.source).texture
+        size = len(self.points)//2
+        texture = None
+        if not self.source is None:
+            from .app import GameApp
+            texture = GameApp.load_texture(self.source,atlas=False)
+        if not texture is None:
             texture.wrap = 'repeat'
             tw = float(texture.width)  if self.source_width is None else self.source_width
             th = float(texture.height) if self.source_height is None else self.source_height
@@ -557,13 +601,13 @@ class GPolygon(GPath):
             # Create the fan.
             for x in range(size):
                 pt = self.points[2*x:2*x+2]
-                self._verts += pt+(pt[0]/tw+0.5,pt[1]/th+0.5)
+                verts += pt+(pt[0]/tw+0.5,pt[1]/th+0.5)
             
             # Come back to the beginning
             pt = self.points[0:2]
             verts += pt+(pt[0]/tw+0.5,pt[1]/th+0.5)
             self._mesh = Mesh(vertices=verts, indices=range(size+2), mode='triangle_fan', texture=texture)
-        except BaseException as e:
+        else:
             # Make all texture coordinates degnerate
             verts = (0,0,0,0) 
             for x in range(size):
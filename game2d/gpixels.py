@@ -0,0 +1,188 @@
+"""
+A module to keep decoded images on disk, so that they need not be decoded again.
+
+Decoding an image file (a PNG, say) takes much longer than making a texture from its
+pixels, and it happens again every time the game starts.  So the first time an image is
+decoded, its pixels are saved in a file of their own, in the **Cache** folder.  On later
+runs, :func:`load_image` maps that file into memory, and the texture is made straight
+from the mapped bytes without decoding anything.
+
+The pixel files are named after a hash of the contents of their image file (see
+:func:`game2d.gregistry.file_digest`), so an image that changes gets a new pixel file,
+and two files with the same image share one.  A pixel file is a short header followed
+by the pixels, as the image loader decoded them (RGBA for most images).
+"""
+from kivy.core.image import ImageLoader, ImageLoaderBase, ImageData
+from kivy.logger import Logger
+from .gregistry import file_digest
+import mmap
+import os
+import os.path
+import struct
+
+
+# The first bytes of every pixel file (the version is the last byte)
+PIXEL_MAGIC = b'G2DPIX\x00\x01'
+
+# The pixel formats that may be kept (compressed formats are left alone)
+PIXEL_FORMATS = ('rgba', 'bgra', 'rgb', 'bgr', 'luminance_alpha', 'luminance', 'alpha')
+
+# The folder for pixel files, inside the cache folder
+PIXEL_FOLDER = 'pixels'
+
+# The header of a pixel file: magic, format, width, height, row length, size, flip
+_HEADER = struct.Struct('<8s16sIIIIB3x')
+
+
+def pixel_file(cache, digest):
+    """
+    Returns the path of the pixel file for the image with the given content hash.
+
+    :param cache: The cache folder
+    :type cache:  ``str``
+
+    :param digest: The hash of the contents of the image file
+    :type digest:  ``str``
+    """
+    return os.path.join(cache,PIXEL_FOLDER,digest+'.raw')
+
+
+def save_pixels(path, data):
+    """
+    Saves decoded image data as the pixel file ``path``, and returns True if it did.
+
+    Only single images in one of :const:`PIXEL_FORMATS` can be saved.  The file is
+    written under another name and then renamed, so that a reader (or another thread
+    saving the same image) never sees a partial file.
+
+    :param path: The pixel file
+    :type path:  ``str``
+
+    :param data: The decoded image
+    :type data:  :class:`kivy.core.image.ImageData`
+    """
+    pixels = data.data
+    if not data.fmt in PIXEL_FORMATS or len(data.mipmaps) != 1 or pixels is None:
+        return False
+    header = _HEADER.pack(PIXEL_MAGIC,data.fmt.encode('ascii'),data.width,data.height,
+                          data.rowlength,len(pixels),bool(data.flip_vertical))
+    temp = '%s.%d.%d' % (path,os.getpid(),id(data))
+    try:
+        os.makedirs(os.path.dirname(path),exist_ok=True)
+        with open(temp,'wb') as file:
+            file.write(header)
+            file.write(pixels)
+        os.replace(temp,path)
+        return True
+    except OSError as e:
+        Logger.warning('GPixels: Could not save %s: %s' % (path,e))
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+        return False
+
+
+def load_pixels(path):
+    """
+    Returns the decoded image in the pixel file ``path``, or None if it cannot be read.
+
+    The pixels are not read, but mapped into memory (copy on write, as textures need a
+    writable buffer).  The mapping is closed once the image data is released.
+
+    :param path: The pixel file
+    :type path:  ``str``
+    """
+    try:
+        with open(path,'rb') as file:
+            mapped = mmap.mmap(file.fileno(),0,access=mmap.ACCESS_COPY)
+    except (OSError,ValueError):
+        return None
+    if len(mapped) < _HEADER.size:
+        return None
+    magic, fmt, width, height, rowlength, size, flip = _HEADER.unpack_from(mapped)
+    if magic != PIXEL_MAGIC or len(mapped) != _HEADER.size+size:
+        return None
+    fmt = fmt.rstrip(b'\x00').decode('ascii')
+    pixels = memoryview(mapped)[_HEADER.size:]
+    return ImageData(width,height,fmt,pixels,source=path,flip_vertical=bool(flip),
+                     rowlength=rowlength)
+
+
+def load_image(path, cache, digest=None, nocache=True):
+    """
+    Returns the decoded image in the file ``path``, ready to become a texture.
+
+    If the image has a pixel file in ``cache``, the image is loaded from that, without
+    decoding.  Otherwise the image is decoded, and its pixel file saved for next time.
+    No pixel file is used if ``cache`` is None.
+
+    By default, the image is never kept in the caches of Kivy, so that dropping its
+    texture frees it.  An image to be found by :class:`kivy.core.image.Image` in the
+    cache ``'kv.image'`` (such as the page of an atlas) must set ``nocache`` to False,
+    or the cache ignores it.
+
+    This function does not touch OpenGL, and is safe to call from a worker thread.
+
+    :param path: The image file
+    :type path:  ``str``
+
+    :param cache: The cache folder, or None for no pixel files
+    :type cache:  ``str`` or None
+
+    :param digest: The hash of the contents of the image file, if known
+    :type digest:  ``str`` or None
+
+    :param nocache: Whether to keep the image out of the caches of Kivy
+    :type nocache:  ``bool``
+    """
+    if cache is not None and digest is None:
+        digest = file_digest(path)
+    if cache is None or digest is None:
+        return ImageLoader.load(path,nocache=nocache)
+
+    pixels = pixel_file(cache,digest)
+    data = load_pixels(pixels)
+    if data is not None:
+        return GPixelLoader(path,data,nocache=nocache)
+    image = ImageLoader.load(path,nocache=nocache)
+    if len(image._data) == 1:
+        save_pixels(pixels,image._data[0])
+    return image
+
+
+# #mark -
+
+class GPixelLoader(ImageLoaderBase):
+    """
+    A class for an image loaded from a pixel file (see :func:`load_image`).
+
+    It may be used in place of any image decoded by :class:`kivy.core.image.ImageLoader`.
+    Its file name is that of the image file, not of the pixel file.
+    """
+
+    def __init__(self, filename, data, **keywords):
+        """
+        Creates an image from the given decoded image data.
+
+        :param filename: The image file
+        :type filename:  ``str``
+
+        :param data: The decoded image
+        :type data:  :class:`kivy.core.image.ImageData`
+
+        :param keywords: The keywords of :class:`kivy.core.image.ImageLoaderBase`
+        :type keywords:  keys and values
+        """
+        self._pixels = data
+        super().__init__(filename,**keywords)
+
+    def load(self, filename):
+        """
+        Returns the decoded image data, as a list of one image.
+
+        :param filename: The image file (not used)
+        :type filename:  ``str``
+        """
+        data, self._pixels = self._pixels, None
+        return [data]
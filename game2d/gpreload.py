@@ -0,0 +1,435 @@
+"""
+A module to load the assets of a game in the background.
+
+The first object made with an image loads that image from disk, decodes it, and
+uploads it as a texture, all in the middle of whatever frame made the object.  A
+:class:`GPreloader` does that work ahead of time.  The files listed in an asset
+manifest (see :func:`asset_manifest`) are read and decoded on a pool of threads, and
+the decoded images are handed to the main thread, which only has to upload them as
+textures (OpenGL may only be used from the main thread).  The textures go in the
+texture cache of :class:`GameApp`, so :meth:`GameApp.load_texture` finds them there.
+
+When the images are packed in a texture atlas (see :mod:`game2d.gatlas`), the atlas is
+built and its pages are decoded on the pool instead, and only the images left out of
+the atlas are loaded on their own.  Fonts and sounds cannot be decoded ahead of time,
+as Kivy opens them itself; they are only read, so that the files are in memory (in the
+disk cache of the operating system) by the time they are opened.
+
+See :meth:`GameApp.start_preload` for preloading the assets of a game.
+"""
+from kivy.logger import Logger
+import concurrent.futures
+import queue
+import json
+import time
+import os
+import os.path
+
+
+# The file extensions of each kind of asset in the manifest
+ASSET_EXTENSIONS = {'image': ('.png', '.jpg', '.jpeg', '.gif', '.bmp'),
+                    'font':  ('.ttf', '.otf'),
+                    'sound': ('.wav', '.ogg', '.mp3')}
+
+# The number of threads that read and decode assets
+PRELOAD_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def asset_manifest(resources):
+    """
+    Returns the assets in an index of the asset folders, as a list of (kind, file name)
+    pairs.
+
+    The kind is one of ``'image'``, ``'font'`` or ``'sound'``.  Only files with one of
+    the extensions in :const:`ASSET_EXTENSIONS` are listed.
+
+    :return: the assets, sorted by kind and then by name
+    :rtype:  ``list`` of ``tuple``
+
+    :param resources: The index of the asset folders
+    :type resources:  :class:`GRegistry`
+    """
+    result = []
+    for kind in ('image','font','sound'):
+        for name in resources.names(kind):
+            if os.path.splitext(name)[1].lower() in ASSET_EXTENSIONS[kind]:
+                result.append((kind,name))
+    return result
+
+
+def _decode_image(path, cache):
+    """
+    Returns the decoded image in the file ``path``, ready to become a texture.
+
+    The image is loaded from its pixel file in ``cache``, if it has one, rather than
+    decoded (see :mod:`game2d.gpixels`).  This function runs on a worker thread, and
+    does not touch OpenGL.
+
+    :param path: The image file
+    :type path:  ``str``
+
+    :param cache: The cache folder, or None for no pixel files
+    :type cache:  ``str`` or None
+    """
+    from .gpixels import load_image
+    return load_image(path,cache)
+
+
+def _read_file(path):
+    """
+    Reads the file ``path``, so that it is in the disk cache, and returns None.
+
+    This function runs on a worker thread.
+
+    :param path: The file to read
+    :type path:  ``str``
+    """
+    with open(path,'rb') as file:
+        while file.read(1 << 20):
+            pass
+    return None
+
+
+def _decode_atlas(images, cache):
+    """
+    Returns the atlas file for the folder ``images`` and its decoded pages.
+
+    The atlas is built if necessary (see :func:`game2d.gatlas.build_atlas`).  The
+    result is a pair of the atlas file (None if there is no atlas) and a list of
+    (page file, decoded image) pairs.  This function runs on a worker thread, and does
+    not touch OpenGL.
+
+    :param images: The image folder
+    :type images:  ``str``
+
+    :param cache: The folder to keep the atlas in
+    :type cache:  ``str``
+    """
+    from .gatlas import build_atlas
+    from .gpixels import load_image
+    path = build_atlas(images,cache)
+    if path is None:
+        return (None,[])
+    with open(path) as file:
+        pages = json.load(file)
+    folder = os.path.dirname(path)
+    pages = [os.path.join(folder,page) for page in pages]
+    # The cache of Kivy ignores images loaded with nocache, and Atlas must find these
+    return (path,[(page,load_image(page,cache,nocache=False)) for page in pages])
+
+
+# #mark -
+
+class GPreloader(object):
+    """
+    A class to load the assets in a manifest on a pool of threads.
+
+    The preloader starts as soon as it is made.  Files are read and decoded by the
+    threads, in the order of the manifest.  The main thread must call :meth:`poll` (once
+    a frame, say) to turn the decoded images into textures; polling only takes the
+    assets that are ready, and never waits for the others.  Use :meth:`finish` to wait
+    for every asset instead, when they are needed right away.
+
+    The preloader keeps the time taken by each asset (see :attr:`timings`).  An asset
+    that cannot be loaded is logged and skipped; it will be loaded (or fail) again when
+    it is first used, as if it had never been preloaded.
+    """
+
+    # IMMUTABLE ATTRIBUTES
+    @property
+    def total(self):
+        """
+        The number of assets to load.
+
+        This includes the texture atlas (if any) as an asset of its own.  Images left out
+        of the atlas are only added once the atlas is loaded, so this value may grow.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._total
+
+    @property
+    def loaded(self):
+        """
+        The number of assets loaded (or failed) and handed to the main thread.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be an int in 0..total.
+        """
+        return self._loaded
+
+    @property
+    def progress(self):
+        """
+        The fraction of the assets loaded so far.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be a float in 0..1.
+        """
+        return 1.0 if self._total == 0 else self._loaded/self._total
+
+    @property
+    def done(self):
+        """
+        Whether every asset has been loaded.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be a ``bool``.
+        """
+        return self._loaded == self._total
+
+    @property
+    def elapsed(self):
+        """
+        The time in seconds from the start of preloading until it was done (or until
+        now, if it is not done yet).
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be a float >= 0.
+        """
+        end = time.perf_counter() if self._finished is None else self._finished
+        return end-self._started
+
+    @property
+    def timings(self):
+        """
+        The time taken by each asset loaded so far, in the order they were loaded.
+
+        Each entry is a tuple (kind, name, decode, upload).  The decode time (in seconds)
+        is the time taken on a worker thread, to read and decode the file.  The upload
+        time is the time taken on the main thread, to make its texture (next to nothing
+        for fonts and sounds, which have no texture).  Both are None for an asset that
+        could not be loaded.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be a list of tuples.
+        """
+        return list(self._timings)
+
+    @property
+    def failed(self):
+        """
+        The names of the assets that could not be loaded.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be a list of ``str``.
+        """
+        return [name for (kind,name,decode,upload) in self._timings if decode is None]
+
+    # BUILT-IN METHODS
+    def __init__(self, manifest=None, workers=PRELOAD_WORKERS):
+        """
+        Creates a new preloader, and starts loading.
+
+        The folders of the assets are those of :class:`GameApp`.  The images are packed
+        into a texture atlas if :attr:`GameApp.use_atlas` is True and the atlas is not
+        loaded yet.  Images that are already in the texture cache are skipped.
+
+        :param manifest: The assets to load, or None for everything in the asset folders
+        :type manifest:  ``list`` of (kind, name) pairs, or None
+
+        :param workers: The number of threads to load with
+        :type workers:  ``int`` > 0
+        """
+        from .app import GameApp
+        assert type(workers) == int and workers > 0, '%s is not a valid thread count' % repr(workers)
+        if manifest is None:
+            manifest = asset_manifest(GameApp.load_resources())
+        assert all(len(item) == 2 and item[0] in ASSET_EXTENSIONS for item in manifest), \
+            '%s is not a valid manifest' % repr(manifest)
+
+        self._started = time.perf_counter()
+        self._finished = None
+        self._total = 0
+        self._loaded = 0
+        self._timings = []
+        self._ready = queue.SimpleQueue()
+        self._pool = concurrent.futures.ThreadPoolExecutor(workers,thread_name_prefix='GPreloader')
+
+        images = []
+        for kind, name in manifest:
+            if kind == 'image':
+                if not name in GameApp.TEXTURE_CACHE:
+                    images.append(name)
+            else:
+                folder = GameApp.fonts if kind == 'font' else GameApp.sounds
+                self._submit(kind,name,_read_file,os.path.join(folder,name))
+
+        if images and GameApp.ATLAS is None and GameApp.use_atlas and GameApp.cache is not None:
+            self._images = images
+            self._submit('atlas','images.atlas',_decode_atlas,
+                         GameApp.images,GameApp.cache)
+        else:
+            self._images = []
+            self._load_images(images)
+        self._check()
+
+    # PUBLIC METHODS
+    def poll(self):
+        """
+        Hands the assets that are ready to the main thread, without waiting.
+
+        This method must be called from the main thread.
+
+        :return: The number of assets handed over
+        :rtype:  ``int``
+        """
+        count = 0
+        while True:
+            try:
+                item = self._ready.get_nowait()
+            except queue.Empty:
+                break
+            self._handoff(*item)
+            count += 1
+        return count
+
+    def finish(self):
+        """
+        Waits for every asset to load, and hands them all to the main thread.
+
+        This method must be called from the main thread.
+        """
+        while not self.done:
+            self._handoff(*self._ready.get())
+
+    def close(self):
+        """
+        Stops loading.
+
+        Assets not started yet are dropped, and assets already decoded are not handed
+        over.  They will be loaded when first used, as usual.
+        """
+        self._pool.shutdown(wait=False,cancel_futures=True)
+
+    # HIDDEN METHODS
+    def _submit(self, kind, name, task, *args):
+        """
+        Adds an asset to be loaded by the threads.
+
+        The asset is put in the ready queue (with its result and time) once ``task`` is
+        done with it.
+
+        :param kind: The kind of asset
+        :type kind:  ``str``
+
+        :param name: The file name of the asset
+        :type name:  ``str``
+
+        :param task: The function to read (and decode) the asset on a thread
+        :type task:  callable
+        """
+        def work():
+            start = time.perf_counter()
+            try:
+                result = task(*args)
+            except Exception as e:
+                self._ready.put((kind,name,None,e))
+            else:
+                self._ready.put((kind,name,time.perf_counter()-start,result))
+
+        self._total += 1
+        self._pool.submit(work)
+
+    def _load_images(self, names):
+        """
+        Adds the images ``names`` to be loaded by the threads, one texture each.
+
+        :param names: The image file names
+        :type names:  ``list`` of ``str``
+        """
+        from .app import GameApp
+        for name in names:
+            self._submit('image',name,_decode_image,os.path.join(GameApp.images,name),
+                         GameApp.cache)
+
+    def _handoff(self, kind, name, decode, result):
+        """
+        Makes the texture (if any) for an asset that is ready.
+
+        :param kind: The kind of asset
+        :type kind:  ``str``
+
+        :param name: The file name of the asset
+        :type name:  ``str``
+
+        :param decode: The time taken to decode the asset, or None if it failed
+        :type decode:  ``float`` or None
+
+        :param result: The decoded asset, or the exception if it failed
+        :type result:  any value
+        """
+        from .app import GameApp
+        start = time.perf_counter()
+        if decode is None:
+            Logger.warning('GPreloader: Could not load %s: %s' % (name,result))
+            if kind == 'atlas':
+                GameApp.use_atlas = False
+                self._load_images(self._images)
+        elif kind == 'image':
+            if not name in GameApp.TEXTURE_CACHE:
+                from kivy.core.image import Image
+                GameApp.TEXTURE_CACHE[name] = Image(result).texture
+        elif kind == 'atlas':
+            self._handoff_atlas(*result)
+        upload = None if decode is None else time.perf_counter()-start
+        
+        self._timings.append((kind,name,decode,upload))
+        self._loaded += 1
+        self._check()
+
+    def _handoff_atlas(self, path, pages):
+        """
+        Loads the texture atlas from its decoded pages, and caches its textures.
+
+        The images left out of the atlas are then added to be loaded on their own.
+
+        :param path: The atlas file, or None if there is no atlas
+        :type path:  ``str`` or None
+
+        :param pages: The pages of the atlas, as (page file, decoded image) pairs
+        :type pages:  ``list``
+        """
+        from .app import GameApp
+        if GameApp.ATLAS is None and GameApp.use_atlas:
+            atlas = None
+            if path is not None:
+                # Atlas loads its pages through Image, which looks in this cache first
+                from kivy.cache import Cache
+                from kivy.atlas import Atlas
+                for page, image in pages:
+                    Cache.append('kv.image','%s|0|0' % page,image)
+                try:
+                    atlas = Atlas(path)
+                except Exception as e:
+                    Logger.warning('GPreloader: Could not load atlas: %s' % e)
+            if atlas is None:
+                GameApp.use_atlas = False
+            GameApp.ATLAS = atlas
+
+        rest = []
+        for name in self._images:
+            if name in GameApp.TEXTURE_CACHE:
+                continue
+            key = os.path.splitext(name)[0]
+            if GameApp.ATLAS is not None and key in GameApp.ATLAS.textures:
+                GameApp.TEXTURE_CACHE[name] = GameApp.ATLAS[key]
+            else:
+                rest.append(name)
+        self._load_images(rest)
+
+    def _check(self):
+        """
+        Notes the time that preloading finished, once every asset is loaded.
+        """
+        if self.done and self._finished is None:
+            self._finished = time.perf_counter()
+            self._pool.shutdown(wait=False)
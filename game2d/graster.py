@@ -0,0 +1,940 @@
+"""
+A module to draw 2D scenes on the CPU, into NumPy arrays.
+
+Drawing to a :class:`GView` requires a window and an OpenGL context.  A :class:`GRaster`
+needs neither: it is a framebuffer in memory, and everything drawn to it is rasterized
+with NumPy.  This is meant for machines with no display, for things like pixel
+observations in batch simulations and golden-image regression tests.
+
+A raster can draw the usual game objects (:class:`GRectangle`, :class:`GEllipse`,
+:class:`GImage`, :class:`GSprite`, :class:`GLabel`, :class:`GPath`, :class:`GTriangle`,
+:class:`GPolygon` and :class:`GScene`), reading their positions, transforms, colors
+and sources.  However, making those objects at all requires a graphics context, since
+they build their Kivy instructions as they go.  So a raster also has drawing methods
+of its own (:meth:`GRaster.rect`, :meth:`GRaster.image` and so on) that need no game
+objects, for drawing straight from a simulation.
+
+Images and fonts are read with PIL (Pillow), from the **Images** and **Fonts** folders
+given to the raster (by default, the ones next to this package, as in a game).  Images
+are sampled at the nearest pixel rather than smoothed, so the results are close to (but
+not exactly) what the GPU draws.
+
+This module does not need a :class:`GameApp`, and does not import the Kivy graphics
+classes until a game object is drawn, so a headless program can use it cheaply.
+"""
+from kivy.logger import Logger
+import numpy as np
+import math
+import os.path
+
+
+# The folder holding this package; the default **Images** and **Fonts** are in it
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The folder that images are read from by default
+RASTER_IMAGES = os.path.join(_ROOT,'Images')
+
+# The folder that fonts are read from by default
+RASTER_FONTS = os.path.join(_ROOT,'Fonts')
+
+
+def raster_color(value):
+    """
+    Returns a color as a 4-element tuple of floats between 0 and 1.
+
+    The color may be given in any of the forms accepted by :attr:`GObject.fillcolor`:
+    a 3 or 4-element sequence of floats, an ``RGB`` or ``HSV`` object from
+    ``introcs``, or a string naming a color (or a web color, starting with '#').
+
+    :return: The color as (r,g,b,a), or None if value is None
+    :rtype:  ``tuple`` or None
+
+    :param value: The color to convert
+    :type value:  any valid color, or None
+    """
+    if value is None:
+        return None
+    import introcs
+    if type(value) in [introcs.RGB, introcs.HSV]:
+        value = value.glColor()
+    elif type(value) == str:
+        if value[0] == '#':
+            value = introcs.RGB.CreateWebColor(value).glColor()
+        else:
+            value = introcs.RGB.CreateName(value).glColor()
+    value = tuple(float(c) for c in value)
+    if len(value) == 3:
+        value += (1.0,)
+    assert len(value) == 4, '%s is not a valid color' % repr(value)
+    return value
+
+
+def raster_matrix(x, y, angle=0.0, sx=1.0, sy=1.0):
+    """
+    Returns the 3x3 affine matrix for a translation, rotation and scale (in that order).
+
+    This is the same transform that a :class:`GObject` applies to its shape.
+
+    :return: The transform matrix
+    :rtype:  ``numpy.ndarray``
+
+    :param x: The horizontal translation
+    :type x:  ``int`` or ``float``
+
+    :param y: The vertical translation
+    :type y:  ``int`` or ``float``
+
+    :param angle: The rotation in degrees, counter-clockwise
+    :type angle:  ``int`` or ``float``
+
+    :param sx: The horizontal scale
+    :type sx:  ``int`` or ``float``
+
+    :param sy: The vertical scale
+    :type sy:  ``int`` or ``float``
+    """
+    if angle:
+        radians = math.radians(angle)
+        cos = math.cos(radians)
+        sin = math.sin(radians)
+    else:
+        cos = 1.0
+        sin = 0.0
+    return np.array([[cos*sx,-sin*sy,x],[sin*sx,cos*sy,y],[0.0,0.0,1.0]])
+
+
+# #mark -
+class GRaster(object):
+    """
+    A framebuffer in memory, drawn to on the CPU.
+
+    The frame is :attr:`width` by :attr:`height` pixels, with the same coordinates as
+    a :class:`GView`: the origin is at the bottom left, and y goes up.  The contents
+    are read back as :attr:`pixels`, a ``uint8`` RGBA array whose first row is the
+    **top** of the frame (the usual order for image files).
+
+    Shapes are blended over the frame as the GPU blends them, using the alpha of the
+    color being drawn, and the frame is kept (like a GPU framebuffer) as 8 bits a
+    channel.  Each shape is drawn in one pass over the pixels it covers, with NumPy
+    doing the work for all of those pixels at once.
+
+    Images and rendered text are loaded once and shared by all rasters (they are keyed
+    by the paths of their files).  An image or font that cannot be loaded is logged and
+    skipped, and tried again the next time it is drawn.
+    """
+
+    # Class attribute for the images (and frames of filmstrips) read from image folders
+    IMAGE_CACHE = {}
+
+    # Class attribute for rendered text
+    TEXT_CACHE = {}
+
+    # IMMUTABLE ATTRIBUTES
+    @property
+    def width(self):
+        """
+        The width of the frame in pixels.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be an int > 0.
+        """
+        return self._width
+
+    @property
+    def height(self):
+        """
+        The height of the frame in pixels.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be an int > 0.
+        """
+        return self._height
+
+    @property
+    def image_folder(self):
+        """
+        The folder that images are read from.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be a ``str``.
+        """
+        return self._images
+
+    @property
+    def font_folder(self):
+        """
+        The folder that fonts are read from.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be a ``str``.
+        """
+        return self._fonts
+
+    @property
+    def pixels(self):
+        """
+        A copy of the frame as an array of shape (height, width, 4) of ``uint8``.
+
+        The first row of the array is the top of the frame.
+
+        **Immutable**: This value cannot be altered.
+        """
+        return self._buffer.copy()
+
+    # MUTABLE ATTRIBUTES
+    @property
+    def background(self):
+        """
+        The color the frame is cleared to.
+
+        **Invariant**: Must be a 4-element tuple of floats between 0 and 1.
+        """
+        return self._background
+
+    @background.setter
+    def background(self,value):
+        self._background = raster_color(value)
+        # Clearing fills the frame one pixel (four channels) at a time
+        color = np.array([int(c*255.0+0.5) for c in self._background],dtype=np.uint8)
+        self._clearcolor = color.view(np.uint32)[0]
+
+    # BUILT-IN METHODS
+    def __init__(self,width,height,background=(1,1,1,1),image_folder=None,
+                 font_folder=None):
+        """
+        Creates a new frame, cleared to the background color.
+
+        The default background is white, as in a :class:`GView`.  The default folders
+        are :const:`RASTER_IMAGES` and :const:`RASTER_FONTS`, the **Images** and
+        **Fonts** folders next to this package.
+
+        :param width: The width of the frame in pixels
+        :type width:  ``int`` > 0
+
+        :param height: The height of the frame in pixels
+        :type height:  ``int`` > 0
+
+        :param background: The color to clear the frame to
+        :type background:  any valid color
+
+        :param image_folder: The folder to read images from (None for the default)
+        :type image_folder:  ``str`` or None
+
+        :param font_folder: The folder to read fonts from (None for the default)
+        :type font_folder:  ``str`` or None
+        """
+        assert type(width) == int and width > 0, '%s is not a valid width' % repr(width)
+        assert type(height) == int and height > 0, '%s is not a valid height' % repr(height)
+        assert image_folder is None or type(image_folder) == str, \
+            '%s is not a folder' % repr(image_folder)
+        assert font_folder is None or type(font_folder) == str, \
+            '%s is not a folder' % repr(font_folder)
+        self._width = width
+        self._height = height
+        self._images = RASTER_IMAGES if image_folder is None else image_folder
+        self._fonts  = RASTER_FONTS if font_folder is None else font_folder
+        self._buffer = np.empty((height,width,4),dtype=np.uint8)
+        self.background = background
+        self.clear()
+
+    # PUBLIC METHODS
+    def clear(self):
+        """
+        Fills the frame with the background color.
+        """
+        self._buffer.view(np.uint32).fill(self._clearcolor)
+
+    def render(self,objects):
+        """
+        Clears the frame, draws the objects in order and returns the pixels.
+
+        Entries of ``objects`` that are None are skipped.
+
+        :return: the frame (see :attr:`pixels`)
+        :rtype:  ``numpy.ndarray``
+
+        :param objects: the objects to draw
+        :type objects:  iterable of :class:`GObject` (or None)
+        """
+        self.clear()
+        for obj in objects:
+            if obj is not None:
+                self.draw(obj)
+        return self.pixels
+
+    def save(self,filename):
+        """
+        Writes the frame to an image file (the format is chosen by the extension).
+
+        :param filename: The file to write
+        :type filename:  ``str``
+        """
+        from PIL import Image
+        Image.fromarray(self.pixels,'RGBA').save(filename)
+
+    def draw(self,obj,matrix=None):
+        """
+        Draws a game object to the frame.
+
+        Objects that are not :attr:`GObject.visible` are skipped.  The children of a
+        :class:`GScene` are drawn with the transform of the scene.
+
+        :param obj: The object to draw
+        :type obj:  :class:`GObject`
+
+        :param matrix: The transform of the parent of the object (None for the frame)
+        :type matrix:  3x3 ``numpy.ndarray`` or None
+        """
+        from .gobject import GScene
+        from .grectangle import GRectangle, GEllipse, GImage, GLabel
+        from .gsprite import GSprite
+        from .gpath import GPath, GTriangle, GPolygon
+        if not obj.visible:
+            return
+        transform = raster_matrix(obj.x,obj.y,obj.angle,obj._scale.x,obj._scale.y)
+        if matrix is not None:
+            transform = np.dot(matrix,transform)
+
+        if isinstance(obj,GScene):
+            for child in obj.children:
+                self.draw(child,transform)
+        elif isinstance(obj,GLabel):
+            self._label(transform,obj)
+        elif isinstance(obj,GSprite):
+            self._image(transform,obj.width,obj.height,obj.source,obj.frame,obj._format,
+                        obj.fillcolor)
+        elif isinstance(obj,GImage):
+            self._image(transform,obj.width,obj.height,obj.source,0,(1,1),obj.fillcolor)
+        elif isinstance(obj,GEllipse):
+            self._ellipse(transform,obj.width,obj.height,obj.fillcolor,obj.linecolor,
+                          obj.linewidth)
+        elif isinstance(obj,GRectangle):
+            self._rect(transform,obj.width,obj.height,obj.fillcolor,obj.linecolor,
+                       obj.linewidth)
+        elif isinstance(obj,(GTriangle,GPolygon)):
+            self._polygon(transform,obj.points,obj.fillcolor,obj.linecolor,
+                          obj.linewidth)
+        elif isinstance(obj,GPath):
+            self._path(transform,obj.points,obj.linecolor,obj.linewidth,False)
+
+    def rect(self,x,y,width,height,fillcolor=None,linecolor=None,linewidth=0,angle=0):
+        """
+        Draws a rectangle centered at (x,y), as a :class:`GRectangle` would.
+
+        :param x: The horizontal coordinate of the center
+        :type x:  ``int`` or ``float``
+
+        :param y: The vertical coordinate of the center
+        :type y:  ``int`` or ``float``
+
+        :param width: The width of the rectangle
+        :type width:  ``int`` or ``float`` >= 0
+
+        :param height: The height of the rectangle
+        :type height:  ``int`` or ``float`` >= 0
+
+        :param fillcolor: The interior color (None for no interior)
+        :type fillcolor:  any valid color, or None
+
+        :param linecolor: The border color (None for no border)
+        :type linecolor:  any valid color, or None
+
+        :param linewidth: The width of the border
+        :type linewidth:  ``int`` or ``float`` >= 0
+
+        :param angle: The rotation about the center, in degrees
+        :type angle:  ``int`` or ``float``
+        """
+        self._rect(raster_matrix(x,y,angle),width,height,raster_color(fillcolor),
+                   raster_color(linecolor),linewidth)
+
+    def ellipse(self,x,y,width,height,fillcolor=None,linecolor=None,linewidth=0,angle=0):
+        """
+        Draws an ellipse centered at (x,y), as a :class:`GEllipse` would.
+
+        See :meth:`rect` for the parameters.
+        """
+        self._ellipse(raster_matrix(x,y,angle),width,height,raster_color(fillcolor),
+                      raster_color(linecolor),linewidth)
+
+    def image(self,x,y,width,height,source,frame=0,format=(1,1),fillcolor=None,angle=0):
+        """
+        Draws an image (or a frame of a filmstrip) centered at (x,y).
+
+        This is how a :class:`GImage` or :class:`GSprite` is drawn.  The image is
+        scaled to the given size, and tinted by ``fillcolor`` if it is not None.
+
+        :param x: The horizontal coordinate of the center
+        :type x:  ``int`` or ``float``
+
+        :param y: The vertical coordinate of the center
+        :type y:  ``int`` or ``float``
+
+        :param width: The width to draw the image
+        :type width:  ``int`` or ``float`` >= 0
+
+        :param height: The height to draw the image
+        :type height:  ``int`` or ``float`` >= 0
+
+        :param source: The image file, in the **Images** folder
+        :type source:  ``str``
+
+        :param frame: The frame of the filmstrip to draw
+        :type frame:  ``int`` >= 0
+
+        :param format: The rows and columns of the filmstrip
+        :type format:  2-element ``tuple`` of ``int``
+
+        :param fillcolor: The tint color (None for no tint)
+        :type fillcolor:  any valid color, or None
+
+        :param angle: The rotation about the center, in degrees
+        :type angle:  ``int`` or ``float``
+        """
+        self._image(raster_matrix(x,y,angle),width,height,source,frame,format,
+                    raster_color(fillcolor))
+
+    def images(self,xs,ys,width,height,source,frame=0,format=(1,1),fillcolor=None):
+        """
+        Draws copies of an image (or a frame of a filmstrip) centered at each (x,y).
+
+        This draws the same pixels as calling :meth:`image` (with no angle) for each
+        copy, but draws every copy in one pass.  It is the way to draw many sprites of
+        the same kind, such as a formation of aliens.  The copies should not overlap:
+        where they do, only one of them is drawn.
+
+        :param xs: The horizontal coordinates of the centers
+        :type xs:  sequence of ``int`` or ``float``
+
+        :param ys: The vertical coordinates of the centers
+        :type ys:  sequence of ``int`` or ``float``
+
+        See :meth:`image` for the other parameters.
+        """
+        frame = self._frame(source,frame,format)
+        xs = np.asarray(xs,dtype=float).reshape(-1)
+        ys = np.asarray(ys,dtype=float).reshape(-1)
+        if frame is None or len(xs) == 0 or width <= 0 or height <= 0:
+            return
+        texture, opaque = frame
+        tint = raster_color(fillcolor)
+        th, tw = texture.shape[:2]
+        w = width/2.0
+        h = height/2.0
+
+        # The pixels that each copy might cover, as (copy, row) and (copy, column)
+        cols = np.floor(xs-w).astype(np.intp)[:,None]+np.arange(int(math.ceil(width))+2)
+        rows = np.floor(self._height-ys-h).astype(np.intp)[:,None]
+        rows = rows+np.arange(int(math.ceil(height))+2)
+        tx = np.floor((cols+0.5-xs[:,None]+w)*(tw/float(width))).astype(np.intp)
+        ty = np.floor((h-(self._height-rows-0.5-ys[:,None]))*(th/float(height)))
+        ty = ty.astype(np.intp)
+        okx = (tx >= 0) & (tx < tw) & (cols >= 0) & (cols < self._width)
+        oky = (ty >= 0) & (ty < th) & (rows >= 0) & (rows < self._height)
+
+        # Work with flat indices, and skip the texels that are fully transparent
+        texels = (np.clip(ty,0,th-1)*tw)[:,:,None]+np.clip(tx,0,tw-1)[:,None,:]
+        mask = oky[:,:,None] & okx[:,None,:] & opaque[texels]
+        if not mask.any():
+            return
+        pixels = (rows*self._width)[:,:,None]+cols[:,None,:]
+        texels = texels[mask]
+        pixels = pixels[mask]
+
+        colors = texture.reshape(-1,4)[texels]
+        if tint is not None:
+            colors = colors*np.array(tint,dtype=np.float32)
+        frame = self._buffer.reshape(-1,4)
+        result = frame[pixels].astype(np.float32)
+        result += colors[:,3:4]*(colors*255.0-result)
+        result += 0.5
+        frame[pixels] = result.astype(np.uint8)
+
+    def path(self,points,linecolor,linewidth=1.0,closed=False):
+        """
+        Draws a sequence of line segments, as a :class:`GPath` would.
+
+        :param points: The points of the path, as a flat sequence x0, y0, x1, y1, ...
+        :type points:  sequence of ``int`` or ``float``
+
+        :param linecolor: The color of the path
+        :type linecolor:  any valid color
+
+        :param linewidth: The width of the path
+        :type linewidth:  ``int`` or ``float`` >= 0
+
+        :param closed: Whether to join the last point back to the first
+        :type closed:  ``bool``
+        """
+        self._path(raster_matrix(0,0),points,raster_color(linecolor),linewidth,closed)
+
+    def polygon(self,points,fillcolor,linecolor=None,linewidth=0):
+        """
+        Draws a solid polygon, as a :class:`GPolygon` would.
+
+        :param points: The vertices, as a flat sequence x0, y0, x1, y1, ...
+        :type points:  sequence of ``int`` or ``float``
+
+        :param fillcolor: The interior color (None for no interior)
+        :type fillcolor:  any valid color, or None
+
+        :param linecolor: The border color (None for no border)
+        :type linecolor:  any valid color, or None
+
+        :param linewidth: The width of the border
+        :type linewidth:  ``int`` or ``float`` >= 0
+        """
+        self._polygon(raster_matrix(0,0),points,raster_color(fillcolor),
+                      raster_color(linecolor),linewidth)
+
+    def text(self,x,y,text,font_name='Roboto',font_size=15,color=(0,0,0,1),bold=False,
+             halign='center'):
+        """
+        Draws text centered at (x,y), as a :class:`GLabel` would.
+
+        :param x: The horizontal coordinate of the center
+        :type x:  ``int`` or ``float``
+
+        :param y: The vertical coordinate of the center
+        :type y:  ``int`` or ``float``
+
+        :param text: The text (which may have several lines)
+        :type text:  ``str``
+
+        :param font_name: The font: a .ttf file in the **Fonts** folder, or a Kivy font
+        :type font_name:  ``str``
+
+        :param font_size: The size of the font in pixels
+        :type font_size:  ``int`` or ``float`` > 0
+
+        :param color: The color of the text
+        :type color:  any valid color
+
+        :param bold: Whether to use the bold version of a Kivy font
+        :type bold:  ``bool``
+
+        :param halign: The alignment of the lines: 'left', 'right' or 'center'
+        :type halign:  ``str``
+        """
+        texture = self._text(text,font_name,font_size,raster_color(color),bold,halign)
+        if texture is not None:
+            self._blit(raster_matrix(x,y),texture.shape[1],texture.shape[0],texture,None)
+
+    # HIDDEN METHODS
+    def _area(self,matrix,left,bottom,right,top):
+        """
+        Returns the pixels covered by a box in local coordinates, as local coordinates.
+
+        The result is a tuple (rows, cols, u, v), where rows and cols are the slices of
+        the frame to draw to, and u and v are the local coordinates of the centers of
+        those pixels.  When the transform has no rotation, u is a single row and v is a
+        single column (which NumPy broadcasts); otherwise, both are full 2d arrays.  The
+        result is None if nothing is covered.
+
+        :param matrix: The transform from local coordinates to the frame
+        :type matrix:  3x3 ``numpy.ndarray``
+
+        :param left: The smallest local x coordinate
+        :type left:  ``float``
+
+        :param bottom: The smallest local y coordinate
+        :type bottom:  ``float``
+
+        :param right: The largest local x coordinate
+        :type right:  ``float``
+
+        :param top: The largest local y coordinate
+        :type top:  ``float``
+        """
+        det = matrix[0,0]*matrix[1,1]-matrix[0,1]*matrix[1,0]
+        if det == 0:
+            return None
+
+        corners = np.dot(matrix,[[left,right,right,left],[bottom,bottom,top,top],[1,1,1,1]])
+        c0 = max(int(math.floor(corners[0].min())),0)
+        c1 = min(int(math.ceil(corners[0].max())),self._width)
+        r0 = max(int(math.floor(self._height-corners[1].max())),0)
+        r1 = min(int(math.ceil(self._height-corners[1].min())),self._height)
+        if c0 >= c1 or r0 >= r1:
+            return None
+
+        px = np.arange(c0,c1)+0.5
+        py = self._height-(np.arange(r0,r1)+0.5)
+        if matrix[0,1] == 0 and matrix[1,0] == 0:
+            u = ((px-matrix[0,2])/matrix[0,0])[None,:]
+            v = ((py-matrix[1,2])/matrix[1,1])[:,None]
+        else:
+            inverse = np.linalg.inv(matrix)
+            u = inverse[0,0]*px[None,:]+inverse[0,1]*py[:,None]+inverse[0,2]
+            v = inverse[1,0]*px[None,:]+inverse[1,1]*py[:,None]+inverse[1,2]
+        return (slice(r0,r1),slice(c0,c1),u,v)
+
+    def _blend(self,rows,cols,color,mask):
+        """
+        Blends a color over the frame, where mask is True.
+
+        :param rows: The rows of the frame to draw to
+        :type rows:  ``slice``
+
+        :param cols: The columns of the frame to draw to
+        :type cols:  ``slice``
+
+        :param color: One color, or an array of colors with one per pixel
+        :type color:  4-element sequence, or ``numpy.ndarray`` of shape (h,w,4)
+
+        :param mask: Where to draw
+        :type mask:   ``numpy.ndarray`` of ``bool`` of shape (h,w)
+        """
+        target = self._buffer[rows,cols]
+        if not isinstance(color,np.ndarray):
+            color = np.array(color,dtype=np.float32)
+            alpha = mask[...,None]*color[3]
+        else:
+            alpha = mask[...,None]*color[...,3:4]
+        result = target.astype(np.float32)
+        result += alpha*(color*255.0-result)
+        result += 0.5
+        np.copyto(target,result,casting='unsafe')
+
+    def _rect(self,matrix,width,height,fillcolor,linecolor,linewidth):
+        """
+        Draws a rectangle with the given transform.
+
+        :param matrix: The transform of the rectangle
+        :type matrix:  3x3 ``numpy.ndarray``
+
+        See :meth:`rect` for the other parameters (with colors already converted).
+        """
+        w = width/2.0
+        h = height/2.0
+        border = linecolor is not None and linewidth > 0
+        band = max(linewidth,0.5) if border else 0
+        area = self._area(matrix,-w-band,-h-band,w+band,h+band)
+        if area is None:
+            return
+        rows, cols, u, v = area
+        u = np.abs(u)
+        v = np.abs(v)
+        if fillcolor is not None:
+            self._blend(rows,cols,fillcolor,(u <= w) & (v <= h))
+        if border:
+            outer = (u <= w+band) & (v <= h+band)
+            inner = (u < w-band) & (v < h-band)
+            self._blend(rows,cols,linecolor,outer & ~inner)
+
+    def _ellipse(self,matrix,width,height,fillcolor,linecolor,linewidth):
+        """
+        Draws an ellipse with the given transform.
+
+        :param matrix: The transform of the ellipse
+        :type matrix:  3x3 ``numpy.ndarray``
+
+        See :meth:`rect` for the other parameters (with colors already converted).
+        """
+        rx = width/2.0
+        ry = height/2.0
+        border = linecolor is not None and linewidth > 0
+        band = max(linewidth,0.5) if border else 0
+        area = self._area(matrix,-rx-band,-ry-band,rx+band,ry+band)
+        if area is None or rx == 0 or ry == 0:
+            return
+        rows, cols, u, v = area
+        if fillcolor is not None:
+            self._blend(rows,cols,fillcolor,(u/rx)**2+(v/ry)**2 <= 1.0)
+        if border:
+            outer = (u/(rx+band))**2+(v/(ry+band))**2 <= 1.0
+            if rx > band and ry > band:
+                inner = (u/(rx-band))**2+(v/(ry-band))**2 < 1.0
+                outer = outer & ~inner
+            self._blend(rows,cols,linecolor,outer)
+
+    def _image(self,matrix,width,height,source,frame,format,fillcolor):
+        """
+        Draws an image, or a frame of a filmstrip, with the given transform.
+
+        :param matrix: The transform of the image
+        :type matrix:  3x3 ``numpy.ndarray``
+
+        See :meth:`image` for the other parameters (with colors already converted).
+        """
+        frame = self._frame(source,frame,format)
+        if frame is not None:
+            self._blit(matrix,width,height,frame[0],fillcolor)
+
+    def _frame(self,source,frame,format):
+        """
+        Returns one frame of a filmstrip, or None if the image cannot be loaded.
+
+        The result is a tuple (texture, opaque), where texture is the frame as a
+        (contiguous) array like those returned by :meth:`_load`, and opaque is a flat
+        array saying which of its texels are drawn at all (alpha > 0).  The frames are
+        arranged left-to-right, top-to-bottom, as in :class:`GSprite`.
+
+        :param source: The image file name
+        :type source:  ``str``
+
+        :param frame: The frame to return
+        :type frame:  ``int`` >= 0
+
+        :param format: The rows and columns of the filmstrip
+        :type format:  2-element ``tuple`` of ``int``
+        """
+        key = (os.path.join(self._images,source),frame,tuple(format))
+        if key in GRaster.IMAGE_CACHE:
+            return GRaster.IMAGE_CACHE[key]
+        texture = self._load(source)
+        if texture is None:
+            return None
+        fh = texture.shape[0]//format[0]
+        fw = texture.shape[1]//format[1]
+        row, col = divmod(frame,format[1])
+        texture = np.ascontiguousarray(texture[row*fh:(row+1)*fh,col*fw:(col+1)*fw])
+        result = (texture,(texture[...,3] > 0).reshape(-1))
+        GRaster.IMAGE_CACHE[key] = result
+        return result
+
+    def _blit(self,matrix,width,height,texture,tint):
+        """
+        Draws a texture stretched over a rectangle with the given transform.
+
+        :param matrix: The transform of the rectangle
+        :type matrix:  3x3 ``numpy.ndarray``
+
+        :param width: The width of the rectangle
+        :type width:  ``int`` or ``float`` >= 0
+
+        :param height: The height of the rectangle
+        :type height:  ``int`` or ``float`` >= 0
+
+        :param texture: The colors to draw, with the first row at the top
+        :type texture:  ``numpy.ndarray`` of shape (h,w,4) of ``float32``
+
+        :param tint: The color to multiply the texture by (None for no tint)
+        :type tint:  4-element ``tuple`` or None
+        """
+        w = width/2.0
+        h = height/2.0
+        area = self._area(matrix,-w,-h,w,h)
+        if area is None or width == 0 or height == 0:
+            return
+        rows, cols, u, v = area
+        th, tw = texture.shape[:2]
+        tx = np.floor((u+w)*(tw/float(width))).astype(np.intp)
+        ty = np.floor((h-v)*(th/float(height))).astype(np.intp)
+        mask = (tx >= 0) & (tx < tw) & (ty >= 0) & (ty < th)
+        mask = np.broadcast_to(mask,np.broadcast(u,v).shape)
+        colors = texture[np.clip(ty,0,th-1),np.clip(tx,0,tw-1)]
+        if tint is not None:
+            colors = colors*np.array(tint,dtype=np.float32)
+        self._blend(rows,cols,colors,mask)
+
+    def _segments(self,u,v,points,closed,band):
+        """
+        Returns where the local coordinates (u,v) are within band of a path.
+
+        :param u: The local x coordinates
+        :type u:  ``numpy.ndarray``
+
+        :param v: The local y coordinates
+        :type v:  ``numpy.ndarray``
+
+        :param points: The points of the path
+        :type points:  ``numpy.ndarray`` of shape (n,2)
+
+        :param closed: Whether to join the last point back to the first
+        :type closed:  ``bool``
+
+        :param band: The distance from the path to include
+        :type band:  ``float``
+        """
+        mask = np.zeros(np.broadcast(u,v).shape,dtype=bool)
+        ends = np.vstack([points[1:],points[:1]]) if closed else points[1:]
+        for (ax, ay), (bx, by) in zip(points,ends):
+            dx = bx-ax
+            dy = by-ay
+            length = dx*dx+dy*dy
+            if length == 0:
+                t = 0.0
+            else:
+                t = np.clip(((u-ax)*dx+(v-ay)*dy)/length,0.0,1.0)
+            mask |= (u-ax-t*dx)**2+(v-ay-t*dy)**2 <= band*band
+        return mask
+
+    def _path(self,matrix,points,linecolor,linewidth,closed):
+        """
+        Draws a sequence of line segments with the given transform.
+
+        :param matrix: The transform of the path
+        :type matrix:  3x3 ``numpy.ndarray``
+
+        See :meth:`path` for the other parameters (with colors already converted).
+        """
+        if linecolor is None or len(points) < 2:
+            return
+        points = np.array(points,dtype=float).reshape(-1,2)
+        band = max(linewidth,0.5)
+        left, bottom = points.min(axis=0)-band
+        right, top = points.max(axis=0)+band
+        area = self._area(matrix,left,bottom,right,top)
+        if area is None:
+            return
+        rows, cols, u, v = area
+        self._blend(rows,cols,linecolor,self._segments(u,v,points,closed,band))
+
+    def _polygon(self,matrix,points,fillcolor,linecolor,linewidth):
+        """
+        Draws a solid polygon with the given transform.
+
+        The interior is filled by the even-odd rule.
+
+        :param matrix: The transform of the polygon
+        :type matrix:  3x3 ``numpy.ndarray``
+
+        See :meth:`polygon` for the other parameters (with colors already converted).
+        """
+        points = np.array(points,dtype=float).reshape(-1,2)
+        border = linecolor is not None and linewidth > 0
+        band = max(linewidth,0.5) if border else 0
+        left, bottom = points.min(axis=0)-band
+        right, top = points.max(axis=0)+band
+        area = self._area(matrix,left,bottom,right,top)
+        if area is None:
+            return
+        rows, cols, u, v = area
+        if fillcolor is not None:
+            inside = np.zeros(np.broadcast(u,v).shape,dtype=bool)
+            for (ax, ay), (bx, by) in zip(points,np.roll(points,-1,axis=0)):
+                if ay == by:
+                    continue
+                crosses = (ay > v) != (by > v)
+                inside ^= crosses & (u < ax+(v-ay)*(bx-ax)/(by-ay))
+            self._blend(rows,cols,fillcolor,inside)
+        if border:
+            self._blend(rows,cols,linecolor,self._segments(u,v,points,True,band))
+
+    def _label(self,matrix,obj):
+        """
+        Draws a text label with the given transform.
+
+        The text is placed inside the label rectangle according to the alignment of
+        the label, as :class:`GLabel` places it.
+
+        :param matrix: The transform of the label
+        :type matrix:  3x3 ``numpy.ndarray``
+
+        :param obj: The label to draw
+        :type obj:  :class:`GLabel`
+        """
+        width = obj.width
+        height = obj.height
+        if obj.fillcolor is not None:
+            self._rect(matrix,width,height,obj.fillcolor,None,0)
+
+        color = obj.linecolor if obj.linecolor else (0,0,0,1)
+        texture = self._text(obj.text,obj.font_name,obj._label.font_size,tuple(color),
+                             obj.bold,obj.halign)
+        if texture is not None:
+            th, tw = texture.shape[:2]
+            x = 0.0
+            y = 0.0
+            if obj.halign == 'left':
+                x = (tw-width)/2.0
+            elif obj.halign == 'right':
+                x = (width-tw)/2.0
+            if obj.valign == 'top':
+                y = (height-th)/2.0
+            elif obj.valign == 'bottom':
+                y = (th-height)/2.0
+            self._blit(np.dot(matrix,raster_matrix(x,y)),tw,th,texture,None)
+
+        if obj.linecolor is not None and obj.linewidth > 0:
+            self._rect(matrix,width,height,None,tuple(obj.linecolor),obj.linewidth)
+
+    def _load(self,source):
+        """
+        Returns an image from the :attr:`image_folder` as an array, or None on failure.
+
+        The array has shape (h,w,4), holds ``float32`` colors between 0 and 1, and has
+        its first row at the top of the image.  Failures are logged, but not cached.
+
+        :param source: The image file name
+        :type source:  ``str``
+        """
+        path = os.path.join(self._images,source)
+        if path in GRaster.IMAGE_CACHE:
+            return GRaster.IMAGE_CACHE[path]
+        try:
+            from PIL import Image
+            with Image.open(path) as image:
+                texture = np.asarray(image.convert('RGBA'),dtype=np.float32)/255.0
+        except Exception as e:
+            Logger.warning('GRaster: Could not load %s: %s' % (repr(path),e))
+            return None
+        GRaster.IMAGE_CACHE[path] = texture
+        return texture
+
+    def _font(self,name,bold):
+        """
+        Returns the path to the font file called name.
+
+        The name is either a font file in the :attr:`font_folder` or a font registered
+        with Kivy (like the default, 'Roboto').
+
+        :param name: The font name
+        :type name:  ``str``
+
+        :param bold: Whether to use the bold version of a Kivy font
+        :type bold:  ``bool``
+        """
+        path = os.path.join(self._fonts,name)
+        if os.path.isfile(path):
+            return path
+        from kivy.core.text import LabelBase
+        fonts = getattr(LabelBase,'_fonts',{})
+        if name in fonts:
+            return fonts[name][2 if bold else 0]
+        import kivy.resources
+        found = kivy.resources.resource_find(name)
+        return found if found else path
+
+    def _text(self,text,font_name,font_size,color,bold,halign):
+        """
+        Returns rendered text as an array, or None if there is nothing to draw.
+
+        The array has the same form as an image returned by :meth:`_load`, with the
+        text in the given color on a transparent background.
+
+        See :meth:`text` for the parameters (with the color already converted).
+        """
+        if not text:
+            return None
+        key = (text,self._fonts,font_name,font_size,color,bold,halign)
+        if key in GRaster.TEXT_CACHE:
+            return GRaster.TEXT_CACHE[key]
+
+        from PIL import Image, ImageDraw, ImageFont
+        path = self._font(font_name,bold)
+        try:
+            font = ImageFont.truetype(path,int(round(font_size)))
+        except Exception as e:
+            Logger.warning('GRaster: Could not load font %s: %s' % (repr(path),e))
+            return None
+        draw = ImageDraw.Draw(Image.new('L',(1,1)))
+        box = draw.multiline_textbbox((0,0),text,font=font,align=halign)
+        ascent, descent = font.getmetrics()
+        lines = text.count('\n')+1
+        size = (max(int(math.ceil(box[2])),1),
+                max(lines*(ascent+descent),int(math.ceil(box[3])),1))
+        mask = Image.new('L',size,0)
+        ImageDraw.Draw(mask).multiline_text((0,0),text,fill=255,font=font,align=halign)
+
+        coverage = np.asarray(mask,dtype=np.float32)/255.0
+        texture = np.empty(coverage.shape+(4,),dtype=np.float32)
+        texture[...,:3] = color[:3]
+        texture[...,3] = coverage*color[3]
+        GRaster.TEXT_CACHE[key] = texture
+        return texture
@@ -12,6 +12,7 @@ from kivy.graphics import *
 from kivy.graphics.instructions import *
 from kivy.uix.label import Label
 from kivy.uix.image import Image
+from kivy.core.text.markup import MarkupLabel as CoreMarkupLabel
 from .gobject import GObject
 from .app import GameApp
 
@@ -47,7 +48,7 @@ class GRectangle(GObject):
         assert value >= 0, '%s is negative' % repr(value)
         self._linewidth = value
         if self._defined:
-            self._reset()
+            self._update('linewidth')
     
     
     # BUILT-IN METHODS
@@ -84,18 +85,60 @@ class GRectangle(GObject):
         x = -self.width/2.0
         y = -self.height/2.0
         
+        self._fill = None
         if not self._fillcolor is None:
-            fill = Rectangle(pos=(x,y), size=(self.width, self.height))
+            self._fill = Rectangle(pos=(x,y), size=(self.width, self.height))
             self._cache.add(self._fillcolor)
-            self._cache.add(fill)
+            self._cache.add(self._fill)
         
+        self._line = None
         if not self._linecolor is None and self.linewidth > 0:
-            line = Line(rectangle=(x,y,self.width,self.height),joint='miter',
-                        close=True,width=self.linewidth)
+            self._line = Line(rectangle=(x,y,self.width,self.height),joint='miter',
+                              close=True,width=self.linewidth)
             self._cache.add(self._linecolor)
-            self._cache.add(line)
+            self._cache.add(self._line)
         
         self._cache.add(PopMatrix())
+        self._built = self._layout()
+    
+    def _layout(self):
+        """
+        Returns a description of the instructions the drawing cache needs.
+        
+        The description says which of the fill and the border there are.  As long as it
+        stays the same, the instructions may be changed in place.
+        """
+        return (self._fillcolor is None, self._linecolor is None or self.linewidth == 0)
+    
+    def _update(self,name):
+        """
+        Updates the drawing cache after the attribute ``name`` has changed.
+        
+        The cache is only rebuilt when the change adds or removes the fill or the
+        border.  Otherwise the instructions are changed in place (colors are changed in
+        place by the color setters, so they need nothing more).
+        
+        :param name: The name of the attribute that changed (e.g. ``'width'``)
+        :type name:  ``str``
+        """
+        if self._layout() != self._built:
+            self._reset()
+        elif name in ('width','height'):
+            self._resize()
+        elif name == 'linewidth' and not self._line is None:
+            self._line.width = self.linewidth
+    
+    def _resize(self):
+        """
+        Changes the size of the fill and the border in place.
+        """
+        x = -self.width/2.0
+        y = -self.height/2.0
+        if not self._fill is None:
+            self._fill.pos  = (x,y)
+            self._fill.size = (self.width,self.height)
+        if not self._line is None:
+            self._line.rectangle = (x,y,self.width,self.height)
 
 
 # #mark -
@@ -170,17 +213,33 @@ class GEllipse(GRectangle):
         x = -self.width/2.0
         y = -self.height/2.0
         
+        self._fill = None
         if not self._fillcolor is None:
-            fill = Ellipse(pos=(x,y), size=(self.width,self.height))
+            self._fill = Ellipse(pos=(x,y), size=(self.width,self.height))
             self._cache.add(self._fillcolor)
-            self._cache.add(fill)
+            self._cache.add(self._fill)
         
+        self._line = None
         if not self._linecolor is None and self.linewidth > 0:
-            line = Line(ellipse=(x,y,self.width,self.height),close=True,width=self.linewidth)
+            self._line = Line(ellipse=(x,y,self.width,self.height),close=True,
+                              width=self.linewidth)
             self._cache.add(self._linecolor)
-            self._cache.add(line)
+            self._cache.add(self._line)
         
         self._cache.add(PopMatrix())
+        self._built = self._layout()
+    
+    def _resize(self):
+        """
+        Changes the size of the fill and the border in place.
+        """
+        x = -self.width/2.0
+        y = -self.height/2.0
+        if not self._fill is None:
+            self._fill.pos  = (x,y)
+            self._fill.size = (self.width,self.height)
+        if not self._line is None:
+            self._line.ellipse = (x,y,self.width,self.height)
 
 
 # #mark -
@@ -220,7 +279,7 @@ class GImage(GRectangle):
         assert value is None or GameApp.is_image(value), '%s is not an image file' % repr(value)
         self._source = value
         if self._defined:
-            self._reset()
+            self._update('source')
     
     
     # BUILT-IN METHODS
@@ -258,19 +317,94 @@ class GImage(GRectangle):
         y = -self.height/2.0
         
         self._texture = GameApp.load_texture(self.source)
-        fill = Rectangle(pos=(x,y), size=(self.width, self.height),texture=self._texture)
+        self._fill = Rectangle(pos=(x,y), size=(self.width, self.height),texture=self._texture)
         if not self._fillcolor is None:
             self._cache.add(self._fillcolor)
         else:
             self._cache.add(Color(1,1,1))
-        self._cache.add(fill)
+        self._cache.add(self._fill)
         
+        self._line = None
         if not self._linecolor is None and self.linewidth > 0:
-            line = Line(rectangle=(x,y,self.width,self.height),joint='miter',close=True,width=self.linewidth)
+            self._line = Line(rectangle=(x,y,self.width,self.height),joint='miter',close=True,
+                              width=self.linewidth)
             self._cache.add(self._linecolor)
-            self._cache.add(line)
+            self._cache.add(self._line)
         
         self._cache.add(PopMatrix())
+        self._built = self._layout()
+    
+    def _update(self,name):
+        """
+        Updates the drawing cache after the attribute ``name`` has changed.
+        
+        A new source only replaces the texture of the image.  See
+        :meth:`GRectangle._update` for the other attributes.
+        
+        :param name: The name of the attribute that changed (e.g. ``'width'``)
+        :type name:  ``str``
+        """
+        if name == 'source' and self._layout() == self._built:
+            self._texture = GameApp.load_texture(self.source)
+            self._fill.texture = self._texture
+        else:
+            GRectangle._update(self,name)
+
+
+# #mark -
+def text_key(text,options):
+    """
+    Returns the texture cache key for some text and its rendering options.
+
+    The key is a tuple, so it can never be mistaken for the name of an image file in
+    :attr:`GameApp.TEXTURE_CACHE`.
+
+    :param text: The text to render
+    :type text:  ``str``
+
+    :param options: The options of the Kivy core label rendering the text
+    :type options:  ``dict``
+    """
+    items = []
+    for name in sorted(options):
+        value = options[name]
+        if isinstance(value,list):
+            value = tuple(value)
+        items.append((name,value))
+    return ('text',text,tuple(items))
+
+
+class _TextLabel(Label):
+    """
+    A Kivy label that takes its texture from :attr:`GameApp.TEXTURE_CACHE` when it can.
+
+    Text with markup is always rendered, as its references are part of the label.
+    """
+
+    def texture_update(self, *largs):
+        """
+        Updates the texture to match the current label properties.
+        """
+        core = self._label
+        if isinstance(core,CoreMarkupLabel) or not core.text:
+            Label.texture_update(self,*largs)
+            return
+
+        key = text_key(core.text,dict(core.options,text_size=core.usersize))
+        texture = GameApp.TEXTURE_CACHE.get(key)
+        if texture is None:
+            Label.texture_update(self,*largs)
+            if self.texture is not None:
+                # The core label fills its texture on the first bind, and later draws
+                # over it if the size is unchanged.  So fill it now, then let it go.
+                self.texture.bind()
+                GameApp.TEXTURE_CACHE[key] = self.texture
+                core.texture = None
+            return
+
+        self.texture = texture
+        self.texture_size = list(texture.size)
+        self.is_shortened = False
 
 
 # #mark -
@@ -296,7 +430,11 @@ class GLabel(GRectangle):
     to the font by filename, including the .ttf. If you give no name, it will use the 
     default Kivy font.  The `bold` attribute only works for the default Kivy font; for 
     other fonts you will need the .ttf file for the bold version of that font.  See the
-    provided `ComicSans.ttf` and `ComicSansBold.ttf` for an example."""
+    provided `ComicSans.ttf` and `ComicSansBold.ttf` for an example.
+    
+    Rendered text is shared between labels through :attr:`GameApp.TEXTURE_CACHE`, so
+    labels that show the same text in the same style only render it once.  The text
+    counts against the memory budget of the cache like any other texture."""
     
     # MUTABLE PROPERTIES
     @property
@@ -600,7 +738,7 @@ class GLabel(GRectangle):
             if not key in excludes:
                 sanitized[key] = keywords[key]
         
-        self._label = Label(**sanitized)
+        self._label = _TextLabel(**sanitized)
         self._label.size_hint = (None,None)
         
         self.linewidth = keywords['linewidth'] if 'linewidth' in keywords else 0.0
@@ -627,6 +765,18 @@ class GLabel(GRectangle):
                 % (s,repr(self.text),repr(self.x),repr(self.y),repr(self.angle))
     
     # HIDDEN METHODS
+    def _update(self,name):
+        """
+        Updates the drawing cache after the attribute ``name`` has changed.
+        
+        The text of a label depends on nearly every attribute, so the cache is always
+        rebuilt.
+        
+        :param name: The name of the attribute that changed (e.g. ``'width'``)
+        :type name:  ``str``
+        """
+        self._reset()
+    
     def _callback(self,instance=None,value=None):
         """
         A workaround to deal with parameter requirements for callbacks
@@ -0,0 +1,257 @@
+"""
+A module for an index of the asset files of a game.
+
+The properties of graphics objects check that each image, font or sound they are given
+is a file in the right folder.  Checking the file system every time makes every new
+object with an image cost a system call, and a wave of aliens costs dozens of them.
+A :class:`GRegistry` scans the **Images**, **Fonts** and **Sounds** folders once
+instead, and answers from its index after that.
+
+The index is only rescanned when it is invalidated (see :meth:`GRegistry.invalidate`),
+or when a file is looked up that is not in it and the folder has changed since it was
+scanned.  So looking up files that are there never touches the file system, but a file
+added to a folder while the game runs is still found.  Files changed in place are not
+noticed until the index is invalidated.
+
+Each file may also be looked up by a hash of its contents (see :meth:`GRegistry.digest`),
+to tell when two names hold the same asset.  The hashes are only computed when asked for.
+"""
+import hashlib
+import os
+import os.path
+
+
+# The kinds of asset in a registry, in the order of the folders
+REGISTRY_KINDS = ('image', 'font', 'sound')
+
+
+def file_digest(path):
+    """
+    Returns the hash of the contents of the file ``path``, or None if it cannot be read.
+
+    The hash is a SHA-1 digest as a hex string.
+
+    :param path: The file
+    :type path:  ``str``
+    """
+    try:
+        sha = hashlib.sha1()
+        with open(path,'rb') as file:
+            for block in iter(lambda: file.read(1 << 16),b''):
+                sha.update(block)
+        return sha.hexdigest()
+    except OSError:
+        return None
+
+
+# #mark -
+
+class GRegistry(object):
+    """
+    A class for an index of the files in the asset folders of a game.
+
+    The files of each kind are scanned (with the folders inside the asset folder) the
+    first time a file of that kind is looked up.  Files are named by their path from
+    the asset folder, with ``/`` between folder names, as in ``'aliens/alien1.png'``.
+    """
+
+    # IMMUTABLE ATTRIBUTES
+    @property
+    def folders(self):
+        """
+        The folders of images, fonts and sounds (None for a kind without one).
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be a tuple of three ``str`` (or None).
+        """
+        return self._folders
+
+    @property
+    def scans(self):
+        """
+        The number of times a folder has been scanned.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be an int >= 0.
+        """
+        return self._scans
+
+    # BUILT-IN METHODS
+    def __init__(self, images, fonts, sounds):
+        """
+        Creates a new registry for the given folders.
+
+        No folder is scanned until it is needed.
+
+        :param images: The image folder
+        :type images:  ``str`` or None
+
+        :param fonts: The font folder
+        :type fonts:  ``str`` or None
+
+        :param sounds: The sound folder
+        :type sounds:  ``str`` or None
+        """
+        self._folders = (images,fonts,sounds)
+        self._entries = {}      # kind -> {name: [path, digest or None]}
+        self._stamps  = {}      # kind -> {folder: modification time or None}
+        self._digests = None    # digest -> [(kind, name)], made when first needed
+        self._scans = 0
+
+    # PUBLIC METHODS
+    def has(self, kind, name):
+        """
+        Checks whether ``name`` is a file of the given kind.
+
+        :return: True if ``name`` is in the folder for ``kind``
+        :rtype:  ``bool``
+
+        :param kind: The kind of file, one of ``'image'``, ``'font'`` or ``'sound'``
+        :type kind:  ``str``
+
+        :param name: The file name
+        :type name:  ``str``
+        """
+        return self._find(kind,name) is not None
+
+    def path(self, kind, name):
+        """
+        Returns the full path of the file ``name``, or None if there is no such file.
+
+        :param kind: The kind of file, one of ``'image'``, ``'font'`` or ``'sound'``
+        :type kind:  ``str``
+
+        :param name: The file name
+        :type name:  ``str``
+        """
+        entry = self._find(kind,name)
+        return None if entry is None else entry[0]
+
+    def names(self, kind):
+        """
+        Returns the names of the files of the given kind, sorted.
+
+        :param kind: The kind of file, one of ``'image'``, ``'font'`` or ``'sound'``
+        :type kind:  ``str``
+        """
+        return sorted(self._index(kind))
+
+    def digest(self, kind, name):
+        """
+        Returns the hash of the contents of the file ``name``, or None if there is no
+        such file (or it cannot be read).
+
+        The hash is a SHA-1 digest as a hex string.  It is computed the first time it
+        is asked for, and kept until the registry is invalidated.
+
+        :param kind: The kind of file, one of ``'image'``, ``'font'`` or ``'sound'``
+        :type kind:  ``str``
+
+        :param name: The file name
+        :type name:  ``str``
+        """
+        entry = self._find(kind,name)
+        if entry is None:
+            return None
+        if entry[1] is None:
+            entry[1] = file_digest(entry[0])
+        return entry[1]
+
+    def lookup(self, digest):
+        """
+        Returns the files with the given content hash, as a list of (kind, name) pairs.
+
+        This computes the hash of every file the first time it is called.
+
+        :param digest: The content hash (see :meth:`digest`)
+        :type digest:  ``str``
+        """
+        if self._digests is None:
+            self._digests = {}
+            for kind in REGISTRY_KINDS:
+                for name in self.names(kind):
+                    value = self.digest(kind,name)
+                    if value is not None:
+                        self._digests.setdefault(value,[]).append((kind,name))
+        return list(self._digests.get(digest,[]))
+
+    def invalidate(self, kind=None):
+        """
+        Drops the index of the given kind of file, so that it is scanned again when
+        next needed.
+
+        :param kind: The kind of file, or None for every kind
+        :type kind:  ``str`` or None
+        """
+        assert kind is None or kind in REGISTRY_KINDS, '%s is not a kind of asset' % repr(kind)
+        for item in (REGISTRY_KINDS if kind is None else (kind,)):
+            self._entries.pop(item,None)
+            self._stamps.pop(item,None)
+        self._digests = None
+
+    # HIDDEN METHODS
+    def _find(self, kind, name):
+        """
+        Returns the index entry for ``name``, or None if there is no such file.
+
+        A name that is not in the index is looked for again if the folder has changed.
+
+        :param kind: The kind of file
+        :type kind:  ``str``
+
+        :param name: The file name
+        :type name:  ``str``
+        """
+        entries = self._index(kind)
+        entry = entries.get(name)
+        if entry is None and self._changed(kind):
+            self.invalidate(kind)
+            entry = self._index(kind).get(name)
+        return entry
+
+    def _index(self, kind):
+        """
+        Returns the index of the files of the given kind, scanning their folder if it
+        has not been scanned yet.
+
+        :param kind: The kind of file
+        :type kind:  ``str``
+        """
+        entries = self._entries.get(kind)
+        if entries is None:
+            entries = {}
+            stamps  = {}
+            root = self._folders[REGISTRY_KINDS.index(kind)]
+            if root is not None and os.path.isdir(root):
+                for folder, subfolders, files in os.walk(root):
+                    stamps[folder] = os.stat(folder).st_mtime_ns
+                    prefix = os.path.relpath(folder,root)
+                    prefix = '' if prefix == os.curdir else prefix.replace(os.sep,'/')+'/'
+                    for file in files:
+                        entries[prefix+file] = [os.path.join(folder,file),None]
+            elif root is not None:
+                stamps[root] = None
+            self._entries[kind] = entries
+            self._stamps[kind] = stamps
+            self._scans += 1
+        return entries
+
+    def _changed(self, kind):
+        """
+        Checks whether a folder of the given kind has changed since it was scanned.
+
+        A folder changes when files are added to it, or removed or renamed in it.
+
+        :param kind: The kind of file
+        :type kind:  ``str``
+        """
+        for folder, stamp in self._stamps.get(kind,{}).items():
+            try:
+                if os.stat(folder).st_mtime_ns != stamp:
+                    return True
+            except OSError:
+                if stamp is not None:
+                    return True
+        return False
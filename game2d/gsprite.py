@@ -33,8 +33,11 @@ class GSprite(GRectangle):
     
     If the image supports transparency, then this object can be used to represent irregular 
     shapes.  However, the :meth:`contains` method still treats this shape as a  rectangle.
-    """
     
+    The frames of a filmstrip are cut from the image once, and shared by every sprite
+    with the same source and format (see :meth:`load_frames`).  Changing the frame of a
+    sprite only picks a different one of these regions.
+    """
     # MUTABLE PROPERTIES
     @property
     def source(self):
@@ -50,7 +53,7 @@ class GSprite(GRectangle):
         assert value is None or GameApp.is_image(value), '%s is not an image file' % repr(value)
         self._source = value
         if self._defined:
-            self._reset()
+            self._update('source')
     
     @property
     def count(self):
@@ -80,6 +83,45 @@ class GSprite(GRectangle):
             self._bounds.texture = self._texture
     
     
+    # CLASS METHODS
+    @classmethod
+    def load_frames(cls,source,format):
+        """
+        Returns: The frames of the filmstrip ``source``, as a tuple of textures
+        
+        The frames are regions of the texture for ``source`` (see 
+        :meth:`GameApp.load_texture`), arranged left-to-right, top-to-bottom in a grid 
+        of the given size.  They are cut the first time they are needed, and kept with
+        the texture in the texture cache (see :class:`GTextureCache`), until the texture
+        is dropped from it.  If the image cannot be loaded, every frame is None.
+        
+        :param source: The image file name
+        :type source:  ``str``
+        
+        :param format: The rows and columns of the filmstrip
+        :type format:  2-element ``tuple`` of ``int`` > 0
+        """
+        texture = GameApp.load_texture(source)
+        frames = GameApp.TEXTURE_CACHE.attached(source,('frames',format))
+        if frames is not None:
+            return frames
+        
+        rows, cols = format
+        if texture:
+            width  = texture.width/cols
+            height = texture.height/rows
+            frames = []
+            for row in range(rows):
+                for col in range(cols):
+                    frames.append(texture.get_region(int(col*width),
+                                                     texture.height-int(row*height)-int(height),
+                                                     int(width),int(height)))
+            frames = tuple(frames)
+        else:
+            frames = (None,)*(rows*cols)
+        GameApp.TEXTURE_CACHE.attach(source,('frames',format),frames)
+        return frames
+    
     # BUILT-IN METHODS
     def __init__(self,**keywords):
         """
@@ -103,7 +145,7 @@ class GSprite(GRectangle):
         self.source  = keywords['source'] if 'source' in keywords else None
         self._setFormat(keywords['format'] if 'format' in keywords else (1,1))
         self._frame  = 0
-        self._images = [None]*self.count
+        self._images = (None,)*self.count
         self._bounds = None
         self._texture = None
         GRectangle.__init__(self,**keywords)
@@ -130,19 +172,8 @@ class GSprite(GRectangle):
         x = -self.width/2.0
         y = -self.height/2.0
         
-        texture = GameApp.load_texture(self.source)
-        if texture:
-            width  = texture.width/self._format[1]
-            height = texture.height/self._format[0]
-            
-            ty = 0
-            for row in range(self._format[0]):
-                tx = 0
-                for col in range(self._format[1]):
-                    self._images[row*self._format[1]+col] = texture.get_region(int(tx),texture.height-int(ty)-int(height),int(width),int(height))
-                    tx += width
-                ty += width
-        else:
+        self._images = GSprite.load_frames(self.source,self._format)
+        if self._images[0] is None:
             print('Failed to load',repr(self.source))
         
         self._texture = self._images[self._frame]
@@ -152,11 +183,34 @@ class GSprite(GRectangle):
         else:
             self._cache.add(Color(1,1,1))
         self._cache.add(self._bounds)
+        self._fill = self._bounds
         
+        self._line = None
         if not self._linecolor is None and self.linewidth > 0:
-            line = Line(rectangle=(x,y,self.width,self.height),joint='miter',close=True,width=self.linewidth)
+            self._line = Line(rectangle=(x,y,self.width,self.height),joint='miter',close=True,
+                              width=self.linewidth)
             self._cache.add(self._linecolor)
-            self._cache.add(line)
+            self._cache.add(self._line)
         
         self._cache.add(PopMatrix())
+        self._built = self._layout()
+    
+    def _update(self,name):
+        """
+        Updates the drawing cache after the attribute ``name`` has changed.
+        
+        A new source only replaces the frames of the filmstrip.  See
+        :meth:`GRectangle._update` for the other attributes.
+        
+        :param name: The name of the attribute that changed (e.g. ``'width'``)
+        :type name:  ``str``
+        """
+        if name == 'source' and self._layout() == self._built:
+            self._images = GSprite.load_frames(self.source,self._format)
+            if self._images[0] is None:
+                print('Failed to load',repr(self.source))
+            self._texture = self._images[self._frame]
+            self._bounds.texture = self._texture
+        else:
+            GRectangle._update(self,name)
 
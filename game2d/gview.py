@@ -319,6 +319,15 @@ class GView(FloatLayout):
     :class:`GObject` instances to the :meth:`draw` method.  You must do this every
     animation frame, as the game is constantly clearing the window.
 
+    The view also has a retained scene, which is not cleared.  An object added to the
+    scene with :meth:`add` is drawn every frame until it is taken out with
+    :meth:`remove`, without any calls to :meth:`draw`.  Moving, rotating or scaling an
+    object in the scene (or changing the frame of a sprite) costs nothing extra, as
+    the scene holds the object's own Kivy instructions.  Only the objects whose
+    instructions are rebuilt (e.g. by a change of size, color or source) or whose
+    visibility changes are touched, once per frame, by :meth:`refresh`.  The scene is
+    drawn below anything drawn with :meth:`draw`.
+
     **You should never construct an object of this class**.  Creating a new instance
     of this class will not properly display it on the screen.  Instead, you should
     only use the one provided in the `view` attribute of :class:`GameApp`.
@@ -336,11 +345,27 @@ class GView(FloatLayout):
         :class:`GameApp`. See the documentation of that class for more information.
         """
         FloatLayout.__init__(self)
+        self._scene = InstructionGroup()
         self._frame = InstructionGroup()
         self.bind(pos=self._reset)
         self.bind(size=self._reset)
         self._reset()
         self._contents = set()
+        self._holders = {}
+        self._dirty = set()
+
+
+    # IMMUTABLE ATTRIBUTES
+    @property
+    def scene(self):
+        """
+        The objects in the retained scene, in the order they were added.
+
+        **Immutable**: This value cannot be altered.
+
+        **Invariant**: Must be a tuple of :class:`GObject` or :class:`GBatch`
+        """
+        return tuple(self._holders)
 
 
     # PUBLIC METHODS
@@ -363,12 +388,74 @@ class GView(FloatLayout):
         Clears the contents of the view.
 
         This method is called for you automatically at the start of the animation
-        frame.  That way, you are not drawing images on top of one another.
+        frame.  That way, you are not drawing images on top of one another.  It does
+        not remove the objects in the retained scene.
         """
         self._frame.clear()
         self._contents.clear()
 
+    def add(self,obj):
+        """
+        Adds an object to the retained scene of this view.
+
+        The object is drawn every frame (while it is visible) until it is removed.
+        Adding an object that is already in the scene does nothing.
+
+        :param obj: the object to add
+        :type obj:  :class:`GObject` or :class:`GBatch`
+        """
+        if obj in self._holders:
+            return
+        holder = InstructionGroup()
+        if obj.visible:
+            holder.add(obj._cache)
+        self._holders[obj] = holder
+        self._scene.add(holder)
+        obj._retainers.append(self)
+
+    def remove(self,obj):
+        """
+        Removes an object from the retained scene of this view.
+
+        Removing an object that is not in the scene does nothing.
+
+        :param obj: the object to remove
+        :type obj:  :class:`GObject` or :class:`GBatch`
+        """
+        if not obj in self._holders:
+            return
+        self._scene.remove(self._holders[obj])
+        del self._holders[obj]
+        self._dirty.discard(obj)
+        obj._retainers.remove(self)
+
+    def refresh(self):
+        """
+        Brings the retained scene up to date with its objects.
+
+        Only the objects that have been marked as changed since the last refresh are
+        touched.  This method is called for you automatically at the end of the
+        animation frame.
+        """
+        for obj in self._dirty:
+            holder = self._holders[obj]
+            holder.clear()
+            if obj.visible:
+                holder.add(obj._cache)
+        self._dirty.clear()
+
     # HIDDEN METHODS
+    def _mark(self,obj):
+        """
+        Marks an object in the retained scene as changed.
+
+        Objects call this when they rebuild their drawing cache or change visibility.
+
+        :param obj: the object that changed
+        :type obj:  :class:`GObject` or :class:`GBatch`
+        """
+        self._dirty.add(obj)
+
     def _reset(self,obj=None,value=None):
         """
         Resets the view canvas in response to a resizing event
@@ -378,4 +465,5 @@ class GView(FloatLayout):
         self.canvas.add(Rectangle(pos=self.pos,size=self.size))
         # Work-around for Retina Macs
         self.canvas.add(Scale(dp(1),dp(1),dp(1)))
+        self.canvas.add(self._scene)
         self.canvas.add(self._frame)
@@ -121,7 +121,7 @@ class Ship(GSprite):
         """
         if self.atLeftEdge():
             self.x = (SHIP_WIDTH/2)
-        if self.AtRightEdge():
+        if self.atRightEdge():
             self.x = GAME_WIDTH-(SHIP_WIDTH/2)
 
     # COROUTINE METHOD TO ANIMATE THE SHIP
@@ -156,43 +156,66 @@ class Alien(GImage):
     However, there is no need for any more attributes other than those
     inherited by GImage. You would only add attributes if you needed them
     for extra gameplay features (like giving each alien a score value).
+
+    An alien may be drawn as part of a formation: a node (like a GBatch) that
+    moves all of its aliens at once.  The attributes left and top are then
+    relative to the position of the formation, while the getters, setters
+    and collision methods below still work in window coordinates.
     """
     #  IF YOU ADD ATTRIBUTES, LIST THEM BELOW
+    # Attribute _formation: the node this alien is drawn in
+    # Invariant: _formation is None, or an object with attributes x and y
+    # (ints or floats) that are added to the position of the alien
 
     # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
     def getTop(self):
         """
-        Returns top attribute
+        Returns the top edge of the alien in the window.
         """
-        return self.top
+        return self.top + self.getOffset()[1]
 
     def getLeft(self):
         """
-        Returns left attribute
+        Returns the left edge of the alien in the window.
         """
-        return self.left
+        return self.left + self.getOffset()[0]
 
     def setLeft(self, left):
         """
-        Sets left attribute.
+        Moves the alien so that its left edge in the window is left.
 
         Precondition: left is an int or float
         """
-        self.left = left
+        self.left = left - self.getOffset()[0]
+
+    def getOffset(self):
+        """
+        Returns the position (x, y) of the formation of the alien, or (0, 0)
+        if it is not in a formation.
+        """
+        if self._formation is None:
+            return (0, 0)
+        return (self._formation.x, self._formation.y)
 
     # INITIALIZER TO CREATE AN ALIEN
-    def __init__(self, top, left, width, height, source):
+    def __init__(self, top, left, width, height, source, formation=None):
         """
         Initializes an alien.
 
+        If formation is not None, top and left are relative to the position
+        of formation.
+
         Precondition: top is an int or float
         Precondition: left is an int or float
         Precondition: width is an int or float
         Precondition: height is an int or float
         Precondition: source is a string refering to a valid file
+        Precondition: formation is None, or an object with attributes x and y
+        that are ints or floats
         """
         super().__init__(top=top, left=left, width=width, height=height, \
         source=source)
+        self._formation = formation
 
     # METHOD TO CHECK FOR COLLISION (IF DESIRED)
     def collides(self,bolt):
@@ -205,14 +228,16 @@ class Alien(GImage):
         Precondition: bolt is of class Bolt
         """
         if bolt.isPlayerBolt():
-            if self.contains((bolt.getLeft(),bolt.getBottom())):
+            dx, dy = self.getOffset()
+            left = bolt.getLeft() - dx
+            bottom = bolt.getBottom() - dy
+            if self.contains((left,bottom)):
                 return True
-            if self.contains((bolt.getLeft(),bolt.getBottom()+BOLT_HEIGHT)):
+            if self.contains((left,bottom+BOLT_HEIGHT)):
                 return True
-            if self.contains((bolt.getLeft()+BOLT_WIDTH,bolt.getBottom())):
+            if self.contains((left+BOLT_WIDTH,bottom)):
                 return True
-            if self.contains((bolt.getLeft()+BOLT_WIDTH,bolt.getBottom()+\
-            BOLT_HEIGHT)):
+            if self.contains((left+BOLT_WIDTH,bottom+BOLT_HEIGHT)):
                 return True
 
         return False
@@ -237,7 +262,7 @@ class Alien(GImage):
         Returns True if alien's left edge is at ALIEN_H_SEP (as defined in
         module consts). Else returns False.
         """
-        if self.left <= ALIEN_H_SEP:
+        if self.getLeft() <= ALIEN_H_SEP:
             return True
 
         return False
@@ -247,7 +272,7 @@ class Alien(GImage):
         Returns True if alien's left edge is at GAME_WIDTH - ALIEN_H_SEP -
         ALIEN_WIDTH (as defined in module consts). Else returns False.
         """
-        if self.left >= (GAME_WIDTH - ALIEN_H_SEP - ALIEN_WIDTH):
+        if self.getLeft() >= (GAME_WIDTH - ALIEN_H_SEP - ALIEN_WIDTH):
             return True
 
         return False
@@ -256,14 +281,15 @@ class Alien(GImage):
         """
         Returns True if alien is ALIEN_H_WALK away or less from left edge.
         """
-        if (self.left - ALIEN_H_WALK) < ALIEN_H_SEP and not self.atLeftEdge():
+        if (self.getLeft() - ALIEN_H_WALK) < ALIEN_H_SEP and \
+        not self.atLeftEdge():
             return True
 
     def nearRightEdge(self):
         """
         Returns True if alien is ALIEN_H_WALK away or less from right edge.
         """
-        if (self.left + ALIEN_WIDTH + ALIEN_H_WALK) > (GAME_WIDTH - \
+        if (self.getLeft() + ALIEN_WIDTH + ALIEN_H_WALK) > (GAME_WIDTH - \
         ALIEN_H_SEP) and not self.atRightEdge():
             return True
 
@@ -280,7 +306,7 @@ class Alien(GImage):
         edge is at GAME_HEIGHT - ALIEN_CEILING
         (as defined in module consts). Else returns False.
         """
-        if self.left == ALIEN_H_SEP and self.top == GAME_HEIGHT - \
+        if self.getLeft() == ALIEN_H_SEP and self.getTop() == GAME_HEIGHT - \
         ALIEN_CEILING - ((ALIEN_ROWS-1)*ALIEN_HEIGHT) - \
         ((ALIEN_ROWS-1)*ALIEN_V_SEP):
             return True
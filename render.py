@@ -0,0 +1,42 @@
+"""
+Headless drawing module for Alien Invaders
+
+This module draws a WaveSim to a GRaster, a frame drawn on the CPU.  It needs
+no game2d objects (and so no window), which makes it the way to get pixels of
+a headless game, e.g. as observations in a batch.  For example
+
+    raster = GRaster(GAME_WIDTH,GAME_HEIGHT)
+    drawSim(raster,sim)
+    pixels = raster.pixels
+
+Unlike wave.py, this module does not import the rest of game2d, so a worker
+process that only draws does not load the Kivy graphics or audio.
+"""
+from consts import *
+from simulation import WaveSim
+from game2d.graster import GRaster
+
+
+def drawSim(raster, sim):
+    """
+    Draws the simulated wave sim to raster, as Wave.draw would draw it.
+
+    Precondition: raster is a GRaster object
+    Precondition: sim is a WaveSim object
+    """
+    raster.path([0,DEFENSE_LINE,GAME_WIDTH,DEFENSE_LINE], 'red', 2)
+    ship = sim.getShip()
+    if ship is not None:
+        raster.image(ship.x, ship.bottom+SHIP_HEIGHT/2, SHIP_WIDTH, \
+        SHIP_HEIGHT, SHIP_IMAGE, ship.frame, (2,4))
+    formation = sim.getAliens()
+    for sprite in range(len(ALIEN_IMAGES)):
+        cells = formation.alive & (formation.sprite == sprite)
+        raster.images(formation.left[cells]+ALIEN_WIDTH/2, \
+        formation.top[cells]-ALIEN_HEIGHT/2, ALIEN_WIDTH, ALIEN_HEIGHT, \
+        ALIEN_IMAGES[sprite])
+    pool = sim.getBolts()
+    for slot in pool.active():
+        color = 'yellow' if pool.player[slot] else 'purple'
+        raster.rect(float(pool.left[slot])+BOLT_WIDTH/2, \
+        float(pool.bottom[slot])+BOLT_HEIGHT/2, BOLT_WIDTH, BOLT_HEIGHT, color)
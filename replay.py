@@ -0,0 +1,372 @@
+"""
+Replay module for Alien Invaders
+
+This module records the keys held down on every update of a game to a
+replay file, and plays replay files back through the headless simulation.
+A replay plays back as fast as the machine allows, with no window and no
+rendering, and ends in exactly the same state as the recorded game.  This is
+how we reproduce bug reports, and recorded games make good workloads for
+timing the simulation.
+
+A replay file is a text file.  The first line is a JSON object with the seed
+and settings of the game.  Every other line is either a run of updates, as
+two ints "keys count" (the keys held down, as a sum of KEY_BITS, and the
+number of updates they were held for), or the JSON object written by outcome
+when the recording was closed.  The last line is missing if the game did not
+shut down cleanly; such a replay still plays, but it cannot be checked.
+
+To play back replays from the command line, type
+
+    python replay.py Replays/replay-20211209-120000-1234.txt
+
+To check that playback is faithful, without a recorded game at hand, type
+
+    python replay.py --check 10
+
+which records 10 seeded games with random keys and plays each one back.
+Type python replay.py --help for the complete list of options.
+
+Playing back needs the fixed timestep in consts.SIM_TICK.  A game run with a
+variable timestep cannot be replayed.
+"""
+from consts import *
+from simulation import SimInput, GameSim
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+
+# the version of the replay file format
+REPLAY_VERSION = 1
+
+# the bit used to record each key that the game checks
+KEY_BITS = (('left', 1), ('right', 2), ('up', 4))
+
+# the bit recording that some key is held down (the state machine only
+# checks for this, so the other keys are not recorded by name)
+ANY_KEY = 8
+
+# the name given to a held key that is not in KEY_BITS on playback
+OTHER_KEY = 'other'
+
+# the keys held down at random by verify ('space' is not in KEY_BITS, so it
+# plays back as OTHER_KEY)
+VERIFY_KEYS = ('left', 'right', 'up', 'space')
+
+# the number of updates in each game recorded by verify (a minute of play)
+VERIFY_TICKS = int(60/SIM_TICK)
+
+
+def keymask(input):
+    """
+    Returns the keys held down in input as a sum of KEY_BITS and ANY_KEY.
+
+    Precondition: input has the attribute key_count and the method
+    is_key_down (e.g. GInput, SimInput)
+    """
+    mask = 0
+    for key, bit in KEY_BITS:
+        if input.is_key_down(key):
+            mask += bit
+    if input.key_count > 0:
+        mask += ANY_KEY
+    return mask
+
+
+def keyinput(mask):
+    """
+    Returns a SimInput holding down the keys recorded in mask.
+
+    Precondition: mask is an int >= 0 returned by keymask
+    """
+    keys = [key for key, bit in KEY_BITS if mask & bit]
+    if mask & ANY_KEY and not keys:
+        keys.append(OTHER_KEY)
+    return SimInput(keys)
+
+
+def outcome(state, wave, ticks):
+    """
+    Returns a dictionary summing up a game after ticks updates.
+
+    The same summary is computed for the recorded game and for its playback,
+    so comparing the two checks that the playback is faithful.
+
+    Precondition: state is one of the STATE constants in consts
+    Precondition: wave is a WaveSim object, or None
+    Precondition: ticks is an int >= 0
+    """
+    result = {'ticks': ticks, 'state': state, 'lives': None, 'aliens': None, \
+    'ship': None, 'time': None}
+    if wave is not None:
+        result['lives'] = wave.getLives()
+        result['aliens'] = int(wave.getAliens().count())
+        result['time'] = float(wave.getTime())
+        ship = wave.getShip()
+        if ship is not None:
+            result['ship'] = float(ship.x)
+    return result
+
+
+class ReplayWriter(object):
+    """
+    A class to record a game to a replay file.
+
+    Call record once at the start of every update of the game, and close
+    when the game is over (or the application quits).  Consecutive updates
+    with the same keys are written as a single line.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _file: the open replay file
+    # Invariant: _file is a text file open for writing, or None once closed
+    #
+    # Attribute _mask: the keys held down in the current run of updates
+    # Invariant: _mask is an int >= 0, or None before the first update
+    #
+    # Attribute _run: the number of updates in the current run
+    # Invariant: _run is an int >= 0
+    #
+    # Attribute _ticks: the number of updates recorded
+    # Invariant: _ticks is an int >= 0
+
+    # GETTERS
+    def getTicks(self):
+        """
+        Returns _ticks attribute.
+        """
+        return self._ticks
+
+    def isClosed(self):
+        """
+        Returns True if the replay file has been closed.
+        """
+        return self._file is None
+
+    # INITIALIZER
+    def __init__(self, path, seed, rows=ALIEN_ROWS, cols=ALIENS_IN_ROW, \
+    speed=ALIEN_SPEED, tick=SIM_TICK):
+        """
+        Creates the replay file path and writes the settings of the game.
+
+        Any missing folders in path are created.
+
+        Precondition: path is a string naming a file that can be written
+        Precondition: seed is an int, the seed of the wave
+        Precondition: rows is an int > 0
+        Precondition: cols is an int > 0
+        Precondition: speed is an int or float >= 0
+        Precondition: tick is a float > 0, the length of each update
+        """
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._file = open(path, 'w')
+        self._mask = None
+        self._run = 0
+        self._ticks = 0
+        header = {'version': REPLAY_VERSION, 'seed': seed, 'rows': rows, \
+        'cols': cols, 'speed': speed, 'tick': tick}
+        self._file.write(json.dumps(header)+'\n')
+
+    # RECORDING METHODS
+    def record(self, input):
+        """
+        Records the keys held down in input for one update.
+
+        Recording after the file is closed does nothing.
+
+        Precondition: input has the attribute key_count and the method
+        is_key_down (e.g. GInput, SimInput)
+        """
+        if self._file is None:
+            return
+        mask = keymask(input)
+        if mask != self._mask:
+            self.flushRun()
+            self._mask = mask
+        self._run += 1
+        self._ticks += 1
+
+    def flushRun(self):
+        """
+        Writes the current run of updates, if any.
+        """
+        if self._run > 0:
+            self._file.write('%d %d\n' % (self._mask, self._run))
+            self._run = 0
+
+    def close(self, result=None):
+        """
+        Writes the last run of updates and closes the file.
+
+        If result is not None, it is written as the last line so that the
+        playback can be checked against it.  Closing twice does nothing.
+
+        Precondition: result is a dictionary returned by outcome, or None
+        """
+        if self._file is None:
+            return
+        self.flushRun()
+        if result is not None:
+            self._file.write(json.dumps(result)+'\n')
+        self._file.close()
+        self._file = None
+
+
+def load(path):
+    """
+    Returns the contents of the replay file path as a tuple.
+
+    The tuple is (header, runs, result), where header is the dictionary of
+    settings, runs is a list of (keys, count) pairs and result is the
+    dictionary written by outcome (or None if it is missing).
+
+    Precondition: path is a string naming a replay file
+    """
+    with open(path) as file:
+        lines = [line.strip() for line in file if line.strip()]
+    assert len(lines) > 0, '%s is not a replay file' % repr(path)
+    header = json.loads(lines[0])
+    assert header.get('version') == REPLAY_VERSION, \
+    '%s has unsupported replay version %s' % (repr(path), \
+    repr(header.get('version')))
+    runs = []
+    result = None
+    for line in lines[1:]:
+        if line.startswith('{'):
+            result = json.loads(line)
+        else:
+            mask, count = line.split()
+            runs.append((int(mask), int(count)))
+    return (header, runs, result)
+
+
+def play(path):
+    """
+    Plays back the replay file path and returns a tuple (actual, expected).
+
+    actual is the outcome of the playback, and expected is the outcome that
+    was recorded (or None if it is missing).  The playback is identical to
+    the recorded game exactly when the two are equal.
+
+    Precondition: path is a string naming a replay file
+    """
+    header, runs, expected = load(path)
+    game = GameSim(header['seed'], header['rows'], header['cols'], \
+    header['speed'])
+    tick = header['tick']
+    inputs = {}
+    ticks = 0
+    for mask, count in runs:
+        if mask not in inputs:
+            inputs[mask] = keyinput(mask)
+        input = inputs[mask]
+        for n in range(count):
+            game.update(input, tick)
+        ticks += count
+    return (outcome(game.getState(), game.getWave(), ticks), expected)
+
+
+def verify(seed, ticks=VERIFY_TICKS):
+    """
+    Records a game with random keys, plays it back and returns a tuple
+    (actual, expected), as play does.
+
+    The game is a GameSim (the state machine that Invaders plays through)
+    with the given seed, updated ticks times, and the keys are held in runs
+    of random length drawn from the same seed.  It is recorded with a
+    ReplayWriter, just as Invaders records a game, to a temporary file that
+    is removed afterwards.
+
+    Precondition: seed is an int
+    Precondition: ticks is an int >= 0
+    """
+    rng = random.Random(seed)
+    game = GameSim(seed)
+    result = None
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'replay.txt')
+        writer = ReplayWriter(path, seed)
+        input = SimInput()
+        held = 0
+        for n in range(ticks):
+            if held == 0:
+                input = SimInput(rng.sample(VERIFY_KEYS, rng.randint(0, 2)))
+                held = rng.randint(1, 30)
+            held -= 1
+            writer.record(input)
+            game.update(input, SIM_TICK)
+        writer.close(outcome(game.getState(), game.getWave(), ticks))
+        result = play(path)
+    return result
+
+
+def report(name, actual, expected, elapsed):
+    """
+    Prints how fast a playback ran and whether it matched the recorded game,
+    and returns True if it did not match.
+
+    Precondition: name is a string naming the replay
+    Precondition: actual, expected are as returned by play
+    Precondition: elapsed is the time taken in seconds (for verify, this
+    includes recording the game)
+    """
+    rate = actual['ticks']/elapsed if elapsed > 0 else float('inf')
+    mismatch = False
+    if expected is None:
+        verdict = 'unchecked'
+    elif actual == expected:
+        verdict = 'ok'
+    else:
+        verdict = 'MISMATCH (recorded %s)' % json.dumps(expected)
+        mismatch = True
+    print('%s: %d ticks in %.3fs (%.0f ticks/s) %s %s' % (name, \
+    actual['ticks'], elapsed, rate, json.dumps(actual), verdict))
+    return mismatch
+
+
+def main(argv):
+    """
+    Plays back the replays named in the command line arguments argv (or
+    checks seeded games, with --check), printing how fast each one ran and
+    whether it matched the recorded game.
+
+    Returns 0 if every replay with a recorded outcome matched, and 1 if not.
+
+    Precondition: argv is a list of strings (without the program name)
+    """
+    parser = argparse.ArgumentParser(prog='replay.py', \
+    description='Plays back recorded games of Alien Invaders.')
+    parser.add_argument('paths', nargs='*', \
+    help='the replay files to play back')
+    parser.add_argument('--check', type=int, default=0, metavar='GAMES', \
+    help='record GAMES seeded games with random keys and play them back')
+    parser.add_argument('--seed', type=int, default=0, \
+    help='the seed of the first game checked')
+    parser.add_argument('--ticks', type=int, default=VERIFY_TICKS, \
+    help='the number of updates in each game checked')
+    args = parser.parse_args(argv)
+    if not args.paths and args.check <= 0:
+        parser.error('give replay files to play back, or --check')
+
+    status = 0
+    for path in args.paths:
+        start = time.perf_counter()
+        actual, expected = play(path)
+        if report(path, actual, expected, time.perf_counter() - start):
+            status = 1
+    for seed in range(args.seed, args.seed + args.check):
+        start = time.perf_counter()
+        actual, expected = verify(seed, args.ticks)
+        if report('seed %d' % seed, actual, expected, \
+        time.perf_counter() - start):
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,1186 @@
+"""
+Headless simulation module for Alien Invaders
+
+This module contains a pure-data version of a single wave of Alien Invaders.
+It follows exactly the same rules as the subcontroller Wave (ship movement,
+alien marching, bolt firing and collisions), but it never touches game2d or
+Kivy.  That means a wave can be stepped without a window, textures or any
+graphics instructions, which is what we want for balancing runs and
+regression tests.
+
+The class Wave in wave.py is now a thin adapter around WaveSim that mirrors
+the simulated state into game2d objects so that Invaders can draw it.  The
+class GameSim is the Invaders state machine.  Invaders plays its game through
+one, and so does replay.py to play a whole game back without a window.
+"""
+from consts import *
+import numpy as np
+import random
+import math
+
+
+class SimInput(object):
+    """
+    A minimal, Kivy-free stand-in for GInput.
+
+    WaveSim only ever asks its input whether a key is held down, so any
+    object with an is_key_down method will do.  This class is the one to
+    use when there is no GameApp (e.g. scripted or batch runs).
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _keys: the keys currently held down
+    # Invariant: _keys is a frozenset of strings
+
+    @property
+    def key_count(self):
+        """
+        The number of keys currently held down.
+        """
+        return len(self._keys)
+
+    @property
+    def keys(self):
+        """
+        The keys currently held down, as a tuple of strings.
+        """
+        return tuple(self._keys)
+
+    def __init__(self, keys=()):
+        """
+        Initializes an input with the given keys held down.
+
+        Precondition: keys is an iterable of strings (possibly empty)
+        """
+        self._keys = frozenset(keys)
+
+    def is_key_down(self, key):
+        """
+        Returns True if key is currently held down.
+
+        Precondition: key is a string
+        """
+        return key in self._keys
+
+
+class SimShip(object):
+    """
+    The simulated state of the player ship.
+
+    Attribute x: the horizontal coordinate of the ship center
+    Invariant: x is a float
+
+    Attribute bottom: the vertical coordinate of the bottom of the ship
+    Invariant: bottom is a float
+
+    Attribute frame: the current frame of the ship filmstrip
+    Invariant: frame is an int in 0..7
+    """
+
+    def __init__(self, x, bottom):
+        """
+        Initializes a ship centered at x with its bottom edge at bottom.
+
+        Precondition: x is an int or float
+        Precondition: bottom is an int or float
+        """
+        self.x = float(x)
+        self.bottom = float(bottom)
+        self.frame = 0
+
+
+class Formation(object):
+    """
+    The alien formation, stored as a struct of arrays.
+
+    Every alien cell has a left edge, a top edge, an alive flag and a sprite
+    index.  Each of these is a contiguous NumPy array of shape (rows, cols),
+    with row 0 being the bottom row.  Dead cells keep moving with the rest of
+    the formation; they are simply masked out of every query.  This way a
+    step of the whole formation is a single array addition, no matter how
+    many aliens there are.
+
+    The formation also keeps the number of survivors in every row and column
+    and the bounding box of the survivors.  These are only updated when an
+    alien dies or the formation moves, so the edge, win and defense line
+    queries never scan the grid.
+
+    Attribute left: the left edge of each cell
+    Invariant: left is a float array of shape (rows, cols)
+
+    Attribute top: the top edge of each cell
+    Invariant: top is a float array of shape (rows, cols)
+
+    Attribute alive: whether the alien in each cell is still alive
+    Invariant: alive is a bool array of shape (rows, cols)
+
+    Attribute sprite: the index into ALIEN_IMAGES for each cell
+    Invariant: sprite is an int array of shape (rows, cols)
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _count: the number of living aliens
+    # Invariant: _count is an int equal to the number of True cells in alive
+    #
+    # Attribute _rowcount: the number of living aliens in each row
+    # Invariant: _rowcount is a list of rows ints >= 0
+    #
+    # Attribute _colcount: the number of living aliens in each column
+    # Invariant: _colcount is a list of cols ints >= 0
+    #
+    # Attribute _first: the leftmost column with a living alien
+    # Invariant: _first is an int in 0..cols-1 (meaningless if _count is 0)
+    #
+    # Attribute _last: the rightmost column with a living alien
+    # Invariant: _last is an int in 0..cols-1 (meaningless if _count is 0)
+    #
+    # Attribute _lowest: the lowest row with a living alien
+    # Invariant: _lowest is an int in 0..rows-1 (meaningless if _count is 0)
+    #
+    # Attribute _leftedge: the left edge of the column _first
+    # Invariant: _leftedge is a float
+    #
+    # Attribute _rightedge: the left edge of the column _last
+    # Invariant: _rightedge is a float
+    #
+    # Attribute _bottomedge: the top edge of the row _lowest
+    # Invariant: _bottomedge is a float
+
+    @property
+    def rows(self):
+        """
+        The number of rows in the formation.
+        """
+        return self.alive.shape[0]
+
+    @property
+    def cols(self):
+        """
+        The number of columns in the formation.
+        """
+        return self.alive.shape[1]
+
+    def __init__(self, rows, cols):
+        """
+        Initializes a full formation laid out exactly as in Wave.aliens.
+
+        The top row sits ALIEN_CEILING below the top of the window, and the
+        images cycle through ALIEN_IMAGES every two rows.
+
+        Precondition: rows is an int > 0
+        Precondition: cols is an int > 0
+        """
+        top_start = GAME_HEIGHT - ALIEN_CEILING - ((rows-1)*ALIEN_HEIGHT) - \
+        ((rows-1)*ALIEN_V_SEP)
+        col = np.arange(cols, dtype=float)
+        row = np.arange(rows, dtype=float)
+        self.left = np.empty((rows,cols))
+        self.left[:] = ALIEN_H_SEP + col*(ALIEN_H_SEP + ALIEN_WIDTH)
+        self.top = np.empty((rows,cols))
+        self.top[:] = (top_start + row*(ALIEN_V_SEP + ALIEN_HEIGHT))[:,None]
+        self.alive = np.ones((rows,cols), dtype=bool)
+        self.sprite = np.empty((rows,cols), dtype=int)
+        self.sprite[:] = (np.arange(rows)//2 % len(ALIEN_IMAGES))[:,None]
+        self.recount()
+
+    def recount(self):
+        """
+        Recomputes the survivor counts and bounding box from the arrays.
+
+        This is a full scan, so it is only used when the arrays have been
+        replaced wholesale (e.g. on construction).
+        """
+        self._count = int(np.count_nonzero(self.alive))
+        self._rowcount = self.alive.sum(axis=1).tolist()
+        self._colcount = self.alive.sum(axis=0).tolist()
+        self._first = 0
+        self._last = self.cols-1
+        self._lowest = 0
+        if self._count:
+            while not self._colcount[self._first]:
+                self._first += 1
+            while not self._colcount[self._last]:
+                self._last -= 1
+            while not self._rowcount[self._lowest]:
+                self._lowest += 1
+        self._leftedge = float(self.left[0,self._first])
+        self._rightedge = float(self.left[0,self._last])
+        self._bottomedge = float(self.top[self._lowest,0])
+
+    def snapshot(self):
+        """
+        Returns a copy of the state of this formation, for restore.
+
+        The result is a tuple of arrays.  It shares nothing with the
+        formation, so it can be restored any number of times.
+        """
+        return (self.left.copy(), self.top.copy(), self.alive.copy())
+
+    def restore(self, state):
+        """
+        Puts this formation back in the state returned by snapshot.
+
+        Precondition: state was returned by snapshot on a formation with the
+        same number of rows and columns
+        """
+        left, top, alive = state
+        np.copyto(self.left, left)
+        np.copyto(self.top, top)
+        np.copyto(self.alive, alive)
+        self.recount()
+
+    def move(self, dx, dy):
+        """
+        Moves every cell dx to the right and dy up.
+
+        Precondition: dx, dy are ints or floats
+        """
+        if dx:
+            self.left += dx
+            self._leftedge += dx
+            self._rightedge += dx
+        if dy:
+            self.top += dy
+            self._bottomedge += dy
+
+    def count(self):
+        """
+        Returns the number of aliens still alive.
+        """
+        return self._count
+
+    def rowCount(self, row):
+        """
+        Returns the number of aliens still alive in the given row.
+
+        Precondition: row is an int in 0..rows-1
+        """
+        return self._rowcount[row]
+
+    def colCount(self, col):
+        """
+        Returns the number of aliens still alive in the given column.
+
+        Precondition: col is an int in 0..cols-1
+        """
+        return self._colcount[col]
+
+    def isEmpty(self):
+        """
+        Returns True if every alien has been destroyed.
+        """
+        return self._count == 0
+
+    def leftEdge(self):
+        """
+        Returns the left edge of the leftmost living alien, or None if the
+        formation is empty.
+        """
+        if self._count == 0:
+            return None
+        return self._leftedge
+
+    def rightEdge(self):
+        """
+        Returns the left edge of the rightmost living alien, or None if the
+        formation is empty.
+
+        Like Alien.atRightEdge, this is the LEFT edge of that alien.
+        """
+        if self._count == 0:
+            return None
+        return self._rightedge
+
+    def bottomEdge(self):
+        """
+        Returns the top edge of the lowest living alien, or None if the
+        formation is empty.
+        """
+        if self._count == 0:
+            return None
+        return self._bottomedge
+
+    def columnBottom(self, col):
+        """
+        Returns the row of the lowest living alien in column col, or None if
+        that column is empty.
+
+        Precondition: col is an int in 0..cols-1
+        """
+        if not self._colcount[col]:
+            return None
+        return int(self.alive[:,col].argmax())
+
+    def kill(self, row, col):
+        """
+        Destroys the alien at (row, col), updating the counts and bounds.
+
+        Precondition: row, col index a living alien
+        """
+        self.alive[row,col] = False
+        self._count -= 1
+        self._rowcount[row] -= 1
+        self._colcount[col] -= 1
+        if self._count == 0:
+            return
+        if not self._colcount[col]:
+            if col == self._first:
+                while not self._colcount[self._first]:
+                    self._first += 1
+                self._leftedge = float(self.left[0,self._first])
+            if col == self._last:
+                while not self._colcount[self._last]:
+                    self._last -= 1
+                self._rightedge = float(self.left[0,self._last])
+        if not self._rowcount[row] and row == self._lowest:
+            while not self._rowcount[self._lowest]:
+                self._lowest += 1
+            self._bottomedge = float(self.top[self._lowest,0])
+
+    def hit(self, left, bottom):
+        """
+        Returns the (row, col) of the first living alien hit by a bolt with
+        the given bottom-left corner, or None if there is no such alien.
+
+        The formation is a regular lattice, so the only cells a bolt can hit
+        are the ones under its corners.  Those (at most four) cells are found
+        by dividing by the lattice pitch, and then given the exact
+        four-corner test of Alien.collides.  Cells are searched bottom row
+        first, left to right.
+
+        Precondition: left, bottom are ints or floats
+        """
+        cols = lattice_cells(left, left+BOLT_WIDTH, float(self.left[0,0]), \
+        ALIEN_H_SEP + ALIEN_WIDTH, self.cols)
+        if not cols:
+            return None
+        rows = lattice_cells(bottom, bottom+BOLT_HEIGHT, \
+        float(self.top[0,0]) - ALIEN_HEIGHT, ALIEN_V_SEP + ALIEN_HEIGHT, \
+        self.rows)
+        half_w = ALIEN_WIDTH/2.0
+        half_h = ALIEN_HEIGHT/2.0
+        for row in rows:
+            if not self._rowcount[row]:
+                continue
+            for col in cols:
+                if not self.alive[row,col]:
+                    continue
+                cx = float(self.left[row,col]) + half_w
+                cy = float(self.top[row,col]) - half_h
+                if (abs(left-cx) < half_w or \
+                abs(left+BOLT_WIDTH-cx) < half_w) and \
+                (abs(bottom-cy) < half_h or \
+                abs(bottom+BOLT_HEIGHT-cy) < half_h):
+                    return (row, col)
+        return None
+
+
+def lattice_cells(lo, hi, origin, pitch, size):
+    """
+    Returns the sorted list of lattice cells containing the coordinate lo or
+    the coordinate hi.
+
+    Cell k of the lattice starts at origin + k*pitch.  Cells outside of
+    0..size-1 are left out, so the result has at most two entries.
+
+    Precondition: lo, hi, origin are ints or floats
+    Precondition: pitch is an int or float > 0
+    Precondition: size is an int >= 0
+    """
+    result = []
+    for value in (lo, hi):
+        k = math.floor((value-origin)/pitch)
+        if 0 <= k < size and k not in result:
+            result.append(k)
+    result.sort()
+    return result
+
+
+class BoltPool(object):
+    """
+    The laser bolts on screen, stored in preallocated slots.
+
+    Each slot has a left edge, a bottom edge, a velocity, an owner and an
+    alive flag, and each of these is a NumPy array with one entry per slot.
+    Firing a bolt takes a free slot and expiring a bolt gives the slot back,
+    so the steady state allocates nothing.  Moving every bolt is a single
+    in-place array addition (free slots have velocity 0).
+
+    Several rules depend on the order in which bolts were fired, so every
+    slot also records a serial number that increases with each shot.
+
+    Attribute left: the left edge of the bolt in each slot
+    Invariant: left is a float array of shape (capacity,)
+
+    Attribute bottom: the bottom edge of the bolt in each slot
+    Invariant: bottom is a float array of shape (capacity,)
+
+    Attribute velocity: the distance the bolt in each slot moves per update
+    Invariant: velocity is a float array of shape (capacity,), 0 in free slots
+
+    Attribute player: whether the bolt in each slot was fired by the player
+    Invariant: player is a bool array of shape (capacity,)
+
+    Attribute alive: whether each slot holds a bolt
+    Invariant: alive is a bool array of shape (capacity,)
+
+    Attribute serial: the firing order of the bolt in each slot
+    Invariant: serial is an int array of shape (capacity,)
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _free: the slots that do not hold a bolt, as a stack
+    # Invariant: _free is a list of ints, exactly the slots where alive is
+    # False
+    #
+    # Attribute _next: the serial number to give the next bolt fired
+    # Invariant: _next is an int >= 0
+    #
+    # Attribute _players: the number of player bolts on screen
+    # Invariant: _players is an int >= 0
+
+    @property
+    def capacity(self):
+        """
+        The number of slots in this pool.
+        """
+        return self.alive.shape[0]
+
+    def __init__(self, capacity=64):
+        """
+        Initializes an empty pool with the given number of slots.
+
+        Precondition: capacity is an int > 0
+        """
+        self.left = np.zeros(capacity)
+        self.bottom = np.zeros(capacity)
+        self.velocity = np.zeros(capacity)
+        self.player = np.zeros(capacity, dtype=bool)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.serial = np.zeros(capacity, dtype=np.int64)
+        self._free = list(range(capacity-1,-1,-1))
+        self._next = 0
+        self._players = 0
+
+    def count(self):
+        """
+        Returns the number of bolts on screen.
+        """
+        return self.capacity - len(self._free)
+
+    def playerCount(self):
+        """
+        Returns the number of player bolts on screen.
+        """
+        return self._players
+
+    def fire(self, left, bottom, velocity):
+        """
+        Adds a bolt to a free slot and returns that slot.
+
+        Player bolts are the ones with positive velocity.  If there are no
+        free slots, the pool doubles in size first.
+
+        Precondition: left, bottom are ints or floats
+        Precondition: velocity is a nonzero int or float
+        """
+        if not self._free:
+            self._grow()
+        slot = self._free.pop()
+        self.left[slot] = left
+        self.bottom[slot] = bottom
+        self.velocity[slot] = velocity
+        self.player[slot] = velocity > 0
+        self.alive[slot] = True
+        self.serial[slot] = self._next
+        self._next += 1
+        if velocity > 0:
+            self._players += 1
+        return slot
+
+    def expire(self, slot):
+        """
+        Removes the bolt in slot, returning the slot to the pool.
+
+        Precondition: slot holds a bolt
+        """
+        if self.player[slot]:
+            self._players -= 1
+        self.alive[slot] = False
+        self.player[slot] = False
+        self.velocity[slot] = 0
+        self._free.append(slot)
+
+    def expireAll(self, mask):
+        """
+        Removes every bolt whose slot is True in mask.
+
+        Precondition: mask is a bool array of shape (capacity,)
+        """
+        for slot in np.flatnonzero(mask & self.alive).tolist():
+            self.expire(slot)
+
+    def clear(self):
+        """
+        Removes every bolt.
+        """
+        self.expireAll(self.alive)
+
+    def move(self):
+        """
+        Moves every bolt at its velocity.
+        """
+        self.bottom += self.velocity
+
+    def snapshot(self):
+        """
+        Returns a copy of the state of this pool, for restore.
+
+        The result is a tuple of arrays and ints.  It shares nothing with the
+        pool, so it can be restored any number of times.
+        """
+        return (self.left.copy(), self.bottom.copy(), self.velocity.copy(), \
+        self.player.copy(), self.alive.copy(), self.serial.copy(), \
+        tuple(self._free), self._next, self._players)
+
+    def restore(self, state):
+        """
+        Puts this pool back in the state returned by snapshot.
+
+        The pool takes the capacity it had when the snapshot was made.
+
+        Precondition: state was returned by snapshot on a BoltPool
+        """
+        left, bottom, velocity, player, alive, serial, free, next, players = \
+        state
+        if self.capacity == len(alive):
+            np.copyto(self.left, left)
+            np.copyto(self.bottom, bottom)
+            np.copyto(self.velocity, velocity)
+            np.copyto(self.player, player)
+            np.copyto(self.alive, alive)
+            np.copyto(self.serial, serial)
+        else:
+            self.left = left.copy()
+            self.bottom = bottom.copy()
+            self.velocity = velocity.copy()
+            self.player = player.copy()
+            self.alive = alive.copy()
+            self.serial = serial.copy()
+        self._free = list(free)
+        self._next = next
+        self._players = players
+
+    def active(self, player=None):
+        """
+        Returns the slots holding bolts, in firing order.
+
+        If player is True (False), only player (alien) bolts are returned.
+
+        Precondition: player is a bool or None
+        """
+        mask = self.alive if player is None else self.alive & \
+        (self.player == player)
+        slots = np.flatnonzero(mask)
+        return slots[np.argsort(self.serial[slots])].tolist()
+
+    def hits(self, x, y, half_w, half_h):
+        """
+        Returns a bool array that is True for every bolt with a corner
+        strictly inside the box of the given center and half-size.
+
+        This is the four-corner test of Ship.collides and Alien.collides,
+        evaluated for every slot at once.
+
+        Precondition: x, y are ints or floats
+        Precondition: half_w, half_h are ints or floats > 0
+        """
+        hx = (np.abs(self.left-x) < half_w) | \
+        (np.abs(self.left+BOLT_WIDTH-x) < half_w)
+        hy = (np.abs(self.bottom-y) < half_h) | \
+        (np.abs(self.bottom+BOLT_HEIGHT-y) < half_h)
+        return hx & hy & self.alive
+
+    # HIDDEN METHODS
+    def _grow(self):
+        """
+        Doubles the number of slots in this pool.
+        """
+        old = self.capacity
+        self.left = np.concatenate((self.left, np.zeros(old)))
+        self.bottom = np.concatenate((self.bottom, np.zeros(old)))
+        self.velocity = np.concatenate((self.velocity, np.zeros(old)))
+        self.player = np.concatenate((self.player, np.zeros(old, dtype=bool)))
+        self.alive = np.concatenate((self.alive, np.zeros(old, dtype=bool)))
+        self.serial = np.concatenate((self.serial, \
+        np.zeros(old, dtype=np.int64)))
+        self._free.extend(range(2*old-1,old-1,-1))
+
+
+class WaveSim(object):
+    """
+    A headless simulation of a single wave of Alien Invaders.
+
+    This class owns the rules of the game.  It has the same update signature
+    as Wave, and the same queries that Invaders uses to drive its state
+    machine (getShip, wonGame, aliensCross, moreLives, newShip, clearBolts).
+    The only thing it needs from its input is an is_key_down method, so
+    either a GInput or a SimInput can be used.
+
+    Alien bolts that fall below the bottom of the window are discarded, since
+    they can no longer hit anything.  Otherwise a long wave would accumulate
+    bolts forever.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _ship: the player ship
+    # Invariant: _ship is a SimShip object or None
+    #
+    # Attribute _aliens: the alien formation
+    # Invariant: _aliens is a Formation object
+    #
+    # Attribute _bolts: the laser bolts currently on screen
+    # Invariant: _bolts is a BoltPool object
+    #
+    # Attribute _lives: the number of lives left
+    # Invariant: _lives is an int >= 0
+    #
+    # Attribute _time: the amount of time since the last Alien "step"
+    # Invariant: _time is a float >= 0s
+    #
+    # Attribute _direction: the direction the aliens are moving
+    # Invariant: _direction is either the string "left" or the string "right"
+    #
+    # Attribute _moved: True if _aliens moved down in the last Alien "step"
+    # Invariant: _moved is either True or False
+    #
+    # Attribute _rng: the random number stream used for alien bolts
+    # Invariant: _rng is a random.Random object owned by this wave
+    #
+    # Attribute _rate: the most alien steps between alien bolts
+    # Invariant: _rate is an int > 0 (BOLT_RATE unless given)
+    #
+    # Attribute _random: the number of alien steps until the next alien bolt
+    # Invariant: _random is an int such that 1 <= _random <= _rate
+    #
+    # Attribute _moves: the number of Alien "steps" since the last bolt was
+    # fired. Initialized as -1.
+    # Invariant: _moves is an int >= -1
+    #
+    # Attribute _explosion: the time spent in the ship death animation
+    # Invariant: _explosion is a float >= 0, or None if the ship is not
+    # exploding
+    #
+    # Attribute _shots: the number of bolts fired by the player
+    # Invariant: _shots is an int >= 0
+
+    # GETTERS
+    def getShip(self):
+        """
+        Returns _ship attribute.
+        """
+        return self._ship
+
+    def getAliens(self):
+        """
+        Returns _aliens attribute.
+        """
+        return self._aliens
+
+    def getBolts(self):
+        """
+        Returns _bolts attribute.
+        """
+        return self._bolts
+
+    def getLives(self):
+        """
+        Returns _lives attribute.
+        """
+        return self._lives
+
+    def getTime(self):
+        """
+        Returns _time attribute.
+        """
+        return self._time
+
+    def getShots(self):
+        """
+        Returns _shots attribute.
+        """
+        return self._shots
+
+    def isExploding(self):
+        """
+        Returns True if the ship death animation is playing.
+        """
+        return self._explosion is not None
+
+    # INITIALIZER
+    def __init__(self, rows=ALIEN_ROWS, cols=ALIENS_IN_ROW, seed=None, \
+    rate=BOLT_RATE):
+        """
+        Initializes a simulated wave with a rows x cols formation.
+
+        The formation size is not limited to the ranges accepted on the
+        command line in consts.py.
+
+        Every wave draws its random numbers from its own stream, so two waves
+        made with the same seed (and given the same input) play out exactly
+        the same way.  If seed is None, the stream is seeded from the system.
+
+        Precondition: rows is an int > 0
+        Precondition: cols is an int > 0
+        Precondition: seed is an int, or None
+        Precondition: rate is an int > 0, the most alien steps between alien
+        bolts
+        """
+        self._ship = SimShip(GAME_WIDTH/2, SHIP_BOTTOM)
+        self._aliens = Formation(rows, cols)
+        self._bolts = BoltPool()
+        self._lives = SHIP_LIVES
+        self._time = 0
+        self._direction = 'right'
+        self._moved = True
+        self._rng = random.Random(seed)
+        self._rate = rate
+        self._random = self._rng.randint(1,rate)
+        self._moves = -1
+        self._explosion = None
+        self._shots = 0
+
+    # UPDATE METHOD
+    def update(self, ship_amount, input, alien_hor_amount, alien_vert_amount, \
+    speed, dt):
+        """
+        Moves ship, aliens, and laser bolts one frame.
+
+        Precondition: ship_amount is an int or float
+        Precondition: input has a method is_key_down (e.g. GInput, SimInput)
+        Precondition: alien_hor_amount is an int or float
+        Precondition: alien_vert_amount is an int or float
+        Precondition: speed is an int or float
+        Precondition: dt is an int or float
+        """
+        self.moveShip(ship_amount, input)
+        self.moveAliens(alien_hor_amount, alien_vert_amount, speed, dt)
+        self.shipBolts(input)
+        self.alienBolts()
+        self.moveBolts()
+        self.alienCollisions()
+        self.animateShip(dt)
+
+    # SNAPSHOT METHODS
+    def snapshot(self):
+        """
+        Returns a copy of the complete state of this wave, for restore.
+
+        The result is a tuple of the ship, formation, bolts, counters, lives,
+        explosion progress and random number state.  It holds only arrays
+        and plain values, and it shares nothing with the wave, so it can be
+        kept, copied, pickled and restored any number of times.  Treat it as
+        opaque: its layout may change.
+        """
+        ship = self._ship
+        if ship is not None:
+            ship = (ship.x, ship.bottom, ship.frame)
+        return (ship, self._aliens.snapshot(), self._bolts.snapshot(), \
+        self._lives, self._time, self._direction, self._moved, self._rate, \
+        self._random, self._moves, self._explosion, self._shots, \
+        self._rng.getstate())
+
+    def restore(self, state):
+        """
+        Puts this wave back in the state returned by snapshot.
+
+        After a restore, the wave plays out exactly as it did after the
+        snapshot was made (given the same input).
+
+        Precondition: state was returned by snapshot on a wave with the same
+        number of rows and columns
+        """
+        ship, aliens, bolts, self._lives, self._time, self._direction, \
+        self._moved, self._rate, self._random, self._moves, \
+        self._explosion, self._shots, rng = state
+        if ship is None:
+            self._ship = None
+        else:
+            self._ship = SimShip(ship[0], ship[1])
+            self._ship.frame = ship[2]
+        self._aliens.restore(aliens)
+        self._bolts.restore(bolts)
+        self._rng.setstate(rng)
+
+    # SHIP HELPER METHODS
+    def moveShip(self, amount, input):
+        """
+        Moves the ship amount left or right according to the arrow keys,
+        keeping it inside the window.
+
+        Precondition: amount is an int or float
+        Precondition: input has a method is_key_down
+        """
+        ship = self._ship
+        if ship is None or self._explosion is not None:
+            return
+        lo = SHIP_WIDTH/2
+        hi = GAME_WIDTH-(SHIP_WIDTH/2)
+        to_move = 0
+        if input.is_key_down('left') and not ship.x <= lo:
+            to_move -= amount
+        if input.is_key_down('right') and not ship.x >= hi:
+            to_move += amount
+        if ship.x <= lo:
+            ship.x = lo
+        elif ship.x >= hi:
+            ship.x = hi
+        ship.x += to_move
+
+    def animateShip(self, dt):
+        """
+        Advances the ship death animation, or starts it if the ship was hit.
+
+        Precondition: dt is an int or float greater than or equal to 0.
+        """
+        if self._explosion is not None:
+            self._explosion += dt
+            amount = (8 / DEATH_SPEED)*self._explosion
+            if int(amount) > 7:
+                self._explosion = None
+                self._ship = None
+            else:
+                self._ship.frame = int(amount)
+        elif self.shipCollides():
+            self._explosion = 0
+
+    def newShip(self):
+        """
+        Creates a new ship.
+        """
+        self._ship = SimShip(GAME_WIDTH/2, SHIP_BOTTOM)
+
+    # ALIEN HELPER METHODS
+    def moveAliens(self, hor_amount, vert_amount, speed, dt):
+        """
+        Moves the aliens one step every speed seconds, marching down and
+        reversing direction at the edges.
+
+        Precondition: hor_amount is an int or float greater than or equal to 0
+        Precondition: vert_amount is an int or float greater than or equal to 0
+        Precondition: speed is an int or float
+        Precondition: dt is an int or float
+        """
+        if self._time >= speed:
+            if self.aliensAtRight() and self._moved == False:
+                self.moveAliensDown(vert_amount)
+                self._direction = 'left'
+                self._moved = True
+            elif self.aliensAtLeft() and self._moved == False:
+                self.moveAliensDown(vert_amount)
+                self._direction = 'right'
+                self._moved = True
+            elif self.aliensNearRight() and not self.aliensAtRight():
+                self.moveAliensHorizontal(GAME_WIDTH - ALIEN_H_SEP - \
+                ALIEN_WIDTH - self._aliens.rightEdge())
+            elif self.aliensNearLeft() and not self.aliensAtLeft() and \
+            self._moved == False:
+                self.moveAliensHorizontal(ALIEN_H_SEP - \
+                self._aliens.leftEdge())
+            else:
+                if self._direction == 'right':
+                    self.moveAliensHorizontal(hor_amount)
+                else:
+                    self.moveAliensHorizontal(-hor_amount)
+                self._moved = False
+            self._time = 0
+        else:
+            self._time += dt
+
+    def moveAliensHorizontal(self, amount):
+        """
+        Moves every alien amount to the right (left if amount is negative).
+
+        Precondition: amount is an int or float.
+        """
+        self._aliens.move(amount, 0)
+
+    def moveAliensDown(self, amount):
+        """
+        Moves every alien amount down.
+
+        Precondition: amount is an int or float greater than or equal to 0
+        """
+        self._aliens.move(0, -amount)
+
+    def checkEmpty(self):
+        """
+        Returns True if there are no aliens left.
+        """
+        return self._aliens.isEmpty()
+
+    def aliensAtLeft(self):
+        """
+        Returns True if the aliens are at the left edge. Else returns False.
+        """
+        left = self._aliens.leftEdge()
+        return left is not None and left <= ALIEN_H_SEP
+
+    def aliensAtRight(self):
+        """
+        Returns True if the aliens are at the right edge. Else returns False.
+        """
+        right = self._aliens.rightEdge()
+        return right is not None and \
+        right >= (GAME_WIDTH - ALIEN_H_SEP - ALIEN_WIDTH)
+
+    def aliensNearLeft(self):
+        """
+        Returns True if the leftmost alien is less than ALIEN_H_WALK from the
+        left edge (but not at it). Else returns False.
+        """
+        left = self._aliens.leftEdge()
+        return left is not None and (left - ALIEN_H_WALK) < ALIEN_H_SEP and \
+        not left <= ALIEN_H_SEP
+
+    def aliensNearRight(self):
+        """
+        Returns True if the rightmost alien is less than ALIEN_H_WALK from the
+        right edge (but not at it). Else returns False.
+        """
+        right = self._aliens.rightEdge()
+        return right is not None and (right + ALIEN_WIDTH + ALIEN_H_WALK) > \
+        (GAME_WIDTH - ALIEN_H_SEP) and not right >= \
+        (GAME_WIDTH - ALIEN_H_SEP - ALIEN_WIDTH)
+
+    # BOLT HELPER METHODS
+    def shipBolts(self, input):
+        """
+        Fires a player bolt if the up key is pressed and there is no other
+        player bolt on screen, then removes bolts that have left the window.
+
+        Precondition: input has a method is_key_down
+        """
+        if self._ship == None:
+            return
+        bolts = self._bolts
+        if input.is_key_down('up') and bolts.playerCount() == 0:
+            bolts.fire(self._ship.x-(BOLT_WIDTH/2), \
+            self._ship.bottom + SHIP_HEIGHT, BOLT_SPEED)
+            self._shots += 1
+        bolts.expireAll((bolts.bottom > GAME_HEIGHT) | \
+        (bolts.bottom + BOLT_HEIGHT < 0))
+
+    def alienBolts(self):
+        """
+        Fires a bolt from the bottom alien of a random non-empty column once
+        every _random alien steps.
+        """
+        if self._time == 0:
+            self._moves += 1
+        if self._moves >= self._random:
+            aliens = self._aliens
+            row = None
+            while row is None and not aliens.isEmpty():
+                randcolumn = self._rng.randint(0,aliens.cols-1)
+                row = aliens.columnBottom(randcolumn)
+            if row is not None:
+                self._bolts.fire(aliens.left[row,randcolumn], \
+                aliens.top[row,randcolumn] - ALIEN_HEIGHT - BOLT_HEIGHT, \
+                -BOLT_SPEED)
+            self._random = self._rng.randint(1,self._rate)
+            self._moves = 0
+
+    def moveBolts(self):
+        """
+        Moves each bolt at its velocity.
+        """
+        self._bolts.move()
+
+    # COLLISION DETECTION
+    def alienCollisions(self):
+        """
+        Removes every alien hit by a player bolt, along with the bolt.
+
+        Bolts are checked in firing order.  Each bolt destroys at most one
+        alien, the first one it hits searching bottom row first, left to
+        right.
+        """
+        bolts = self._bolts
+        if bolts.playerCount() == 0:
+            return
+        for slot in bolts.active(True):
+            cell = self._aliens.hit(float(bolts.left[slot]), \
+            float(bolts.bottom[slot]))
+            if cell is not None:
+                self._aliens.kill(*cell)
+                bolts.expire(slot)
+
+    def shipCollides(self):
+        """
+        Returns True if the ship collides with an alien bolt. Else returns
+        False.
+
+        On a collision, the bolt (and every bolt fired after it) is removed
+        and _lives is lowered by 1.
+        """
+        if self._ship is None:
+            return False
+        bolts = self._bolts
+        if bolts.count() == bolts.playerCount():
+            return False
+        hits = bolts.hits(self._ship.x, self._ship.bottom + SHIP_HEIGHT/2.0, \
+        SHIP_WIDTH/2.0, SHIP_HEIGHT/2.0) & ~bolts.player
+        if not hits.any():
+            return False
+        first = bolts.serial[hits].min()
+        bolts.expireAll(bolts.serial >= first)
+        self._lives -= 1
+        return True
+
+    # MISC METHODS
+    def wonGame(self):
+        """
+        Returns True if there are no aliens left. Else Returns False
+        """
+        if self.checkEmpty():
+            self.clearBolts()
+            return True
+
+        return False
+
+    def aliensCross(self):
+        """
+        Returns True if any alien crosses the defense line.
+        """
+        bottom = self._aliens.bottomEdge()
+        return bottom is not None and (bottom - ALIEN_HEIGHT) <= DEFENSE_LINE
+
+    def moreLives(self):
+        """
+        Returns True if _lives is greater than 0. Else returns False.
+        """
+        return self._lives > 0
+
+    def clearBolts(self):
+        """
+        Removes every bolt from the wave.
+        """
+        self._bolts.clear()
+
+
+class GameSim(object):
+    """
+    The Invaders state machine, with no graphics.
+
+    This class steps through the states of the game (STATE_INACTIVE,
+    STATE_NEWWAVE, STATE_ACTIVE, STATE_PAUSED, STATE_CONTINUE and
+    STATE_COMPLETE) on the keys held down, and plays the wave.  It shows no
+    messages: Invaders plays its game through a GameSim that makes Wave
+    objects, and shows the message for each state it reaches.  By default the
+    wave is a WaveSim, which is how replay.py plays back recorded games.
+    Given the seed and the keys held down on every update, both reach exactly
+    the same result.
+
+    If you change the way the game moves between states, old replays will no
+    longer play back.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _state: the current state of the game represented as an int
+    # Invariant: _state is one of STATE_INACTIVE, STATE_NEWWAVE, STATE_ACTIVE,
+    # STATE_PAUSED, STATE_CONTINUE, or STATE_COMPLETE
+    #
+    # Attribute _wave: the wave being played
+    # Invariant: _wave is a wave made by _factory, or None if _state is
+    # STATE_INACTIVE
+    #
+    # Attribute _lastkeys: the number of keys held down in the last update
+    # Invariant: _lastkeys is an int >= 0
+    #
+    # Attribute _seed: the seed of the wave
+    # Invariant: _seed is an int, or None
+    #
+    # Attribute _rows: the number of rows in the wave
+    # Invariant: _rows is an int > 0
+    #
+    # Attribute _cols: the number of aliens in each row
+    # Invariant: _cols is an int > 0
+    #
+    # Attribute _speed: the number of seconds between alien steps
+    # Invariant: _speed is an int or float >= 0
+    #
+    # Attribute _factory: the function that makes the wave
+    # Invariant: _factory is a function that takes the arguments rows, cols
+    # and seed, and returns an object with the methods of WaveSim used here
+
+    # GETTERS
+    def getState(self):
+        """
+        Returns _state attribute.
+        """
+        return self._state
+
+    def getWave(self):
+        """
+        Returns _wave attribute.
+        """
+        return self._wave
+
+    # INITIALIZER
+    def __init__(self, seed=None, rows=ALIEN_ROWS, cols=ALIENS_IN_ROW, \
+    speed=ALIEN_SPEED, factory=None):
+        """
+        Initializes a game waiting for a key press.
+
+        The wave is made by calling factory(rows, cols, seed) when the game
+        starts.  The default factory is WaveSim.
+
+        Precondition: seed is an int, or None
+        Precondition: rows is an int > 0
+        Precondition: cols is an int > 0
+        Precondition: speed is an int or float >= 0
+        Precondition: factory is a function (as for _factory), or None
+        """
+        self._state = STATE_INACTIVE
+        self._wave = None
+        self._lastkeys = 0
+        self._seed = seed
+        self._rows = rows
+        self._cols = cols
+        self._speed = speed
+        self._factory = WaveSim if factory is None else factory
+
+    # UPDATE METHOD
+    def update(self, input, dt):
+        """
+        Performs one update of the game.
+
+        Precondition: input has the attribute key_count and the method
+        is_key_down (e.g. GInput, SimInput)
+        Precondition: dt is an int or float
+        """
+        if self._state == STATE_INACTIVE:
+            keys_held = input.key_count
+            if keys_held > 0 and self._lastkeys == 0:
+                self._state = STATE_NEWWAVE
+            self._lastkeys = keys_held
+        if self._state == STATE_NEWWAVE:
+            self._wave = self._factory(self._rows, self._cols, self._seed)
+            self._state = STATE_ACTIVE
+        if self._state == STATE_ACTIVE:
+            self._wave.update(SHIP_MOVEMENT, input, ALIEN_H_WALK, \
+            ALIEN_V_WALK, self._speed, dt)
+            if self._wave.getShip() is None:
+                self._state = STATE_PAUSED
+            if self._wave.wonGame():
+                self._state = STATE_COMPLETE
+            if self._wave.aliensCross():
+                self._state = STATE_COMPLETE
+        if self._state == STATE_PAUSED:
+            if self._wave.moreLives():
+                keys_held = input.key_count
+                if keys_held > 0 and self._lastkeys == 0:
+                    self._state = STATE_CONTINUE
+                self._lastkeys = keys_held
+            else:
+                self._wave.clearBolts()
+                self._state = STATE_COMPLETE
+        if self._state == STATE_CONTINUE:
+            self._wave.newShip()
+            self._state = STATE_ACTIVE
@@ -0,0 +1,723 @@
+"""
+Vectorized simulation module for Alien Invaders
+
+This module steps many waves of Alien Invaders in lockstep, for training and
+evaluating automated players.  Rather than one WaveSim per wave, the class
+VecWaves keeps the state of every wave in shared NumPy arrays with one row
+per environment, and each rule of the game is a handful of array operations
+over all of the environments at once.  The Python overhead of an update is
+paid once per batch, not once per wave.
+
+The rules are exactly those of WaveSim.  Each environment is one episode as
+played by batch.playGame: the ship is replaced as soon as it is destroyed,
+and the episode ends when the wave is won or lost (or runs too long).  An
+environment started with the same seed and given the same actions as a
+WaveSim plays out exactly the same way.
+
+A step takes one action per environment.  An action is a sum of the bits
+ACTION_LEFT, ACTION_RIGHT and ACTION_FIRE (the same bits as replay.KEY_BITS),
+so there are 8 actions in all.  It returns the observations, rewards and done
+flags of every environment as arrays.  Environments that finish are reset at
+once with a new seed, so the batch never has to stop.
+"""
+from consts import *
+import numpy as np
+import random
+
+
+# the action bit to move the ship left
+ACTION_LEFT = 1
+# the action bit to move the ship right
+ACTION_RIGHT = 2
+# the action bit to fire a bolt
+ACTION_FIRE = 4
+# the number of different actions
+ACTIONS = 8
+
+# the number of alien bolts (the lowest ones) included in an observation
+OBS_BOLTS = 8
+# the columns of an observation before the bolts and the alien grid
+OBS_FIELDS = ('ship_x', 'ship_ready', 'lives', 'origin_x', 'origin_y', \
+'direction', 'player_bolt', 'player_left', 'player_bottom')
+
+
+class VecWaves(object):
+    """
+    A batch of n independent waves, stepped together.
+
+    Every attribute below is an array with one entry (or row) per
+    environment; the alien grid and bolt arrays have extra dimensions.  The
+    aliens always move as a block, so the grid only records which aliens are
+    alive; the position of alien (row, col) in environment e is
+    origin_x[e] + col*(ALIEN_H_SEP+ALIEN_WIDTH) for its left edge and
+    origin_y[e] + row*(ALIEN_V_SEP+ALIEN_HEIGHT) for its top edge.  Bolts are
+    stored in capacity slots per environment, as in BoltPool.
+
+    Attribute seed: the seed of the episode in each environment
+    Invariant: seed is an int array of shape (n,)
+
+    Attribute ship_x: the horizontal coordinate of each ship center
+    Invariant: ship_x is a float array of shape (n,)
+
+    Attribute ship_alive: whether each environment has a ship (it may be
+    exploding)
+    Invariant: ship_alive is a bool array of shape (n,)
+
+    Attribute ship_frame: the frame of each ship filmstrip
+    Invariant: ship_frame is an int array of shape (n,), with values in 0..7
+
+    Attribute exploding: whether each ship death animation is playing
+    Invariant: exploding is a bool array of shape (n,)
+
+    Attribute explosion: the time spent in each ship death animation
+    Invariant: explosion is a float array of shape (n,), meaningless where
+    exploding is False
+
+    Attribute lives: the number of lives left in each environment
+    Invariant: lives is an int array of shape (n,), with values >= 0
+
+    Attribute time: the amount of time since each last Alien "step"
+    Invariant: time is a float array of shape (n,), with values >= 0
+
+    Attribute direction: the direction each formation is moving
+    Invariant: direction is an int array of shape (n,), 1 for right and -1
+    for left
+
+    Attribute moved: whether each formation moved down in its last step
+    Invariant: moved is a bool array of shape (n,)
+
+    Attribute random: the number of alien steps until each next alien bolt
+    Invariant: random is an int array of shape (n,), with values in
+    1..BOLT_RATE (or the rate given)
+
+    Attribute moves: the number of alien steps since each last alien bolt
+    Invariant: moves is an int array of shape (n,), with values >= -1
+
+    Attribute shots: the number of bolts each player has fired
+    Invariant: shots is an int array of shape (n,), with values >= 0
+
+    Attribute ticks: the number of updates in each episode so far
+    Invariant: ticks is an int array of shape (n,), with values >= 0
+
+    Attribute alive: whether each alien is alive
+    Invariant: alive is a bool array of shape (n, rows, cols), with row 0 the
+    bottom row
+
+    Attribute colcount: the number of living aliens in each column
+    Invariant: colcount is an int array of shape (n, cols)
+
+    Attribute rowcount: the number of living aliens in each row
+    Invariant: rowcount is an int array of shape (n, rows)
+
+    Attribute count: the number of living aliens in each environment
+    Invariant: count is an int array of shape (n,)
+
+    Attribute origin_x: the left edge of column 0 in each formation
+    Invariant: origin_x is a float array of shape (n,)
+
+    Attribute origin_y: the top edge of row 0 in each formation
+    Invariant: origin_y is a float array of shape (n,)
+
+    Attribute bolt_left: the left edge of the bolt in each slot
+    Invariant: bolt_left is a float array of shape (n, capacity)
+
+    Attribute bolt_bottom: the bottom edge of the bolt in each slot
+    Invariant: bolt_bottom is a float array of shape (n, capacity)
+
+    Attribute bolt_velocity: the velocity of the bolt in each slot
+    Invariant: bolt_velocity is a float array of shape (n, capacity), 0 in
+    free slots
+
+    Attribute bolt_player: whether the bolt in each slot is a player bolt
+    Invariant: bolt_player is a bool array of shape (n, capacity)
+
+    Attribute bolt_alive: whether each slot holds a bolt
+    Invariant: bolt_alive is a bool array of shape (n, capacity)
+
+    Attribute bolt_serial: the firing order of the bolt in each slot
+    Invariant: bolt_serial is an int array of shape (n, capacity)
+
+    Attribute next_serial: the serial number of the next bolt fired in each
+    environment
+    Invariant: next_serial is an int array of shape (n,)
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _rngs: the random number stream of each environment
+    # Invariant: _rngs is a list of n random.Random objects, seeded with seed
+    #
+    # Attribute _nextseed: the seed to give the next episode started
+    # Invariant: _nextseed is an int
+    #
+    # Attribute _rows: the number of rows in each formation
+    # Invariant: _rows is an int > 0
+    #
+    # Attribute _cols: the number of aliens in each row
+    # Invariant: _cols is an int > 0
+    #
+    # Attribute _speed: the number of seconds between alien steps
+    # Invariant: _speed is an int or float >= 0
+    #
+    # Attribute _rate: the most alien steps between alien bolts
+    # Invariant: _rate is an int > 0
+    #
+    # Attribute _limit: the most updates in an episode
+    # Invariant: _limit is an int > 0
+    #
+    # Attribute _obs: the observations returned by observe
+    # Invariant: _obs is a float32 array of shape (n, observation size)
+
+    @property
+    def size(self):
+        """
+        The number of environments.
+        """
+        return self.ship_x.shape[0]
+
+    @property
+    def capacity(self):
+        """
+        The number of bolt slots in each environment.
+        """
+        return self.bolt_alive.shape[1]
+
+    @property
+    def observation_size(self):
+        """
+        The length of the observation of a single environment.
+        """
+        return self._obs.shape[1]
+
+    def __init__(self, n, seed=0, rows=ALIEN_ROWS, cols=ALIENS_IN_ROW, \
+    speed=ALIEN_SPEED, rate=BOLT_RATE, limit=int(3600/SIM_TICK), \
+    capacity=16):
+        """
+        Initializes n environments, each at the start of an episode.
+
+        Environment e starts with the seed seed+e.  Later episodes are given
+        the seeds seed+n, seed+n+1, ... in the order they start.
+
+        Precondition: n is an int > 0
+        Precondition: seed is an int
+        Precondition: rows is an int > 0
+        Precondition: cols is an int > 0
+        Precondition: speed is an int or float >= 0
+        Precondition: rate is an int > 0
+        Precondition: limit is an int > 0, the most updates in an episode
+        Precondition: capacity is an int > 0, the initial bolt slots
+        """
+        self._rows = rows
+        self._cols = cols
+        self._speed = speed
+        self._rate = rate
+        self._limit = limit
+        self._nextseed = seed
+        self.seed = np.zeros(n, dtype=np.int64)
+        self.ship_x = np.zeros(n)
+        self.ship_alive = np.zeros(n, dtype=bool)
+        self.ship_frame = np.zeros(n, dtype=int)
+        self.exploding = np.zeros(n, dtype=bool)
+        self.explosion = np.zeros(n)
+        self.lives = np.zeros(n, dtype=int)
+        self.time = np.zeros(n)
+        self.direction = np.zeros(n, dtype=int)
+        self.moved = np.zeros(n, dtype=bool)
+        self.random = np.zeros(n, dtype=int)
+        self.moves = np.zeros(n, dtype=int)
+        self.shots = np.zeros(n, dtype=int)
+        self.ticks = np.zeros(n, dtype=int)
+        self.alive = np.zeros((n, rows, cols), dtype=bool)
+        self.colcount = np.zeros((n, cols), dtype=int)
+        self.rowcount = np.zeros((n, rows), dtype=int)
+        self.count = np.zeros(n, dtype=int)
+        self.origin_x = np.zeros(n)
+        self.origin_y = np.zeros(n)
+        self.bolt_left = np.zeros((n, capacity))
+        self.bolt_bottom = np.zeros((n, capacity))
+        self.bolt_velocity = np.zeros((n, capacity))
+        self.bolt_player = np.zeros((n, capacity), dtype=bool)
+        self.bolt_alive = np.zeros((n, capacity), dtype=bool)
+        self.bolt_serial = np.zeros((n, capacity), dtype=np.int64)
+        self.next_serial = np.zeros(n, dtype=np.int64)
+        self._rngs = [None]*n
+        self._obs = np.zeros((n, len(OBS_FIELDS) + 3*OBS_BOLTS + rows*cols), \
+        dtype=np.float32)
+        self.reset()
+
+    # EPISODE METHODS
+    def reset(self, envs=None):
+        """
+        Starts a new episode in each of envs, and returns the observations.
+
+        Precondition: envs is an int array of environment indices, or None
+        for every environment
+        """
+        if envs is None:
+            envs = np.arange(self.size)
+        envs = np.asarray(envs, dtype=int)
+        for e in envs.tolist():
+            self.seed[e] = self._nextseed
+            self._rngs[e] = random.Random(self._nextseed)
+            self._nextseed += 1
+        self.ship_x[envs] = GAME_WIDTH/2
+        self.ship_alive[envs] = True
+        self.ship_frame[envs] = 0
+        self.exploding[envs] = False
+        self.explosion[envs] = 0
+        self.lives[envs] = SHIP_LIVES
+        self.time[envs] = 0
+        self.direction[envs] = 1
+        self.moved[envs] = True
+        for e in envs.tolist():
+            self.random[e] = self._rngs[e].randint(1,self._rate)
+        self.moves[envs] = -1
+        self.shots[envs] = 0
+        self.ticks[envs] = 0
+        self.alive[envs] = True
+        self.colcount[envs] = self._rows
+        self.rowcount[envs] = self._cols
+        self.count[envs] = self._rows*self._cols
+        self.origin_x[envs] = ALIEN_H_SEP
+        self.origin_y[envs] = GAME_HEIGHT - ALIEN_CEILING - \
+        ((self._rows-1)*ALIEN_HEIGHT) - ((self._rows-1)*ALIEN_V_SEP)
+        self.bolt_alive[envs] = False
+        self.bolt_player[envs] = False
+        self.bolt_velocity[envs] = 0
+        self.next_serial[envs] = 0
+        return self.observe()
+
+    def step(self, actions):
+        """
+        Performs one update of every environment and returns a tuple
+        (observations, rewards, dones, info).
+
+        observations is the array returned by observe (after any resets).
+        rewards is a float array of shape (n,): the number of aliens
+        destroyed in the update, less the number of lives lost.  dones is a
+        bool array of shape (n,) that is True for every environment whose
+        episode ended (and that has been reset).  info is a dictionary of
+        arrays of shape (n,) about the episodes that ended, meaningful only
+        where dones is True: 'won', 'timeout', 'ticks', 'shots',
+        'lives_lost', 'aliens' and 'seed'.
+
+        Precondition: actions is an int array of shape (n,), with values in
+        0..ACTIONS-1
+        """
+        actions = np.asarray(actions)
+        left = (actions & ACTION_LEFT) != 0
+        right = (actions & ACTION_RIGHT) != 0
+        fire = (actions & ACTION_FIRE) != 0
+        count = self.count.copy()
+        lives = self.lives.copy()
+        self.update(SHIP_MOVEMENT, left, right, fire, ALIEN_H_WALK, \
+        ALIEN_V_WALK, self._speed, SIM_TICK)
+        self.ticks += 1
+        rewards = ((count - self.count) - (lives - self.lives)).astype(float)
+
+        won = self.count == 0
+        self.clearBolts(won)
+        edge = self.bottomEdge()
+        lost = ~won & (self.count > 0) & (edge - ALIEN_HEIGHT <= DEFENSE_LINE)
+        going = ~won & ~lost
+        lost |= going & ~self.ship_alive & (self.lives <= 0)
+        replace = going & ~self.ship_alive & (self.lives > 0)
+        self.newShip(replace)
+        timeout = ~won & ~lost & (self.ticks >= self._limit)
+        dones = won | lost | timeout
+
+        info = {'won': won, 'timeout': timeout, 'ticks': self.ticks.copy(), \
+        'shots': self.shots.copy(), 'lives_lost': SHIP_LIVES - self.lives, \
+        'aliens': self.count.copy(), 'seed': self.seed.copy()}
+        if dones.any():
+            self.reset(np.flatnonzero(dones))
+        else:
+            self.observe()
+        return (self._obs, rewards, dones, info)
+
+    def observe(self):
+        """
+        Returns the observations of every environment.
+
+        The result is a float32 array of shape (n, observation_size).  The
+        first columns are named by OBS_FIELDS: ship_ready is 1 if the ship
+        can move (it exists and is not exploding), and player_bolt is 1 if
+        the player has a bolt on screen at (player_left, player_bottom).
+        Next come OBS_BOLTS triples (present, left, bottom) for the lowest
+        alien bolts, lowest first, and then the alien grid (1 for a living
+        alien) in row-major order, bottom row first.
+
+        The same array is reused on every call, so copy it to keep it.
+        """
+        obs = self._obs
+        obs[:, 0] = self.ship_x
+        obs[:, 1] = self.ship_alive & ~self.exploding
+        obs[:, 2] = self.lives
+        obs[:, 3] = self.origin_x
+        obs[:, 4] = self.origin_y
+        obs[:, 5] = self.direction
+        mine = self.bolt_alive & self.bolt_player
+        slot = mine.argmax(axis=1)
+        envs = np.arange(self.size)
+        obs[:, 6] = mine.any(axis=1)
+        obs[:, 7] = np.where(obs[:, 6] > 0, self.bolt_left[envs, slot], 0)
+        obs[:, 8] = np.where(obs[:, 6] > 0, self.bolt_bottom[envs, slot], 0)
+        base = len(OBS_FIELDS)
+        theirs = self.bolt_alive & ~self.bolt_player
+        order = np.argsort(np.where(theirs, self.bolt_bottom, np.inf), \
+        axis=1, kind='stable')[:, :OBS_BOLTS]
+        present = np.take_along_axis(theirs, order, axis=1)
+        width = order.shape[1]
+        obs[:, base:base+3*OBS_BOLTS] = 0
+        obs[:, base:base+3*width:3] = present
+        obs[:, base+1:base+3*width:3] = np.where(present, \
+        np.take_along_axis(self.bolt_left, order, axis=1), 0)
+        obs[:, base+2:base+3*width:3] = np.where(present, \
+        np.take_along_axis(self.bolt_bottom, order, axis=1), 0)
+        obs[:, base+3*OBS_BOLTS:] = self.alive.reshape(self.size, -1)
+        return obs
+
+    # UPDATE METHOD
+    def update(self, ship_amount, left, right, fire, alien_hor_amount, \
+    alien_vert_amount, speed, dt):
+        """
+        Moves ships, aliens, and laser bolts one frame in every environment,
+        in the same order as WaveSim.update.
+
+        Precondition: ship_amount is an int or float
+        Precondition: left, right, fire are bool arrays of shape (n,), the
+        keys held down in each environment
+        Precondition: alien_hor_amount is an int or float
+        Precondition: alien_vert_amount is an int or float
+        Precondition: speed is an int or float
+        Precondition: dt is an int or float
+        """
+        self.moveShip(ship_amount, left, right)
+        self.moveAliens(alien_hor_amount, alien_vert_amount, speed, dt)
+        self.shipBolts(fire)
+        self.alienBolts()
+        self.moveBolts()
+        self.alienCollisions()
+        self.animateShip(dt)
+
+    # SHIP HELPER METHODS
+    def moveShip(self, amount, left, right):
+        """
+        Moves each ship amount left or right, keeping it inside the window.
+
+        Precondition: amount is an int or float
+        Precondition: left, right are bool arrays of shape (n,)
+        """
+        lo = SHIP_WIDTH/2
+        hi = GAME_WIDTH-(SHIP_WIDTH/2)
+        x = self.ship_x
+        to_move = np.where(left & ~(x <= lo), -amount, 0) + \
+        np.where(right & ~(x >= hi), amount, 0)
+        clamped = np.where(x <= lo, lo, np.where(x >= hi, hi, x))
+        ready = self.ship_alive & ~self.exploding
+        self.ship_x = np.where(ready, clamped + to_move, x)
+
+    def animateShip(self, dt):
+        """
+        Advances each ship death animation, or starts it if the ship was hit.
+
+        Precondition: dt is an int or float greater than or equal to 0.
+        """
+        exploding = self.exploding.copy()
+        self.explosion[exploding] += dt
+        frame = ((8 / DEATH_SPEED)*self.explosion).astype(int)
+        over = exploding & (frame > 7)
+        playing = exploding & ~over
+        self.ship_frame[playing] = frame[playing]
+        self.exploding[over] = False
+        self.ship_alive[over] = False
+        hit = self.shipCollides(self.ship_alive & ~exploding)
+        self.exploding[hit] = True
+        self.explosion[hit] = 0
+
+    def shipCollides(self, envs):
+        """
+        Returns a bool array of the environments in envs where the ship is
+        hit by an alien bolt.
+
+        On a collision, the bolt (and every bolt fired after it) is removed
+        and a life is lost.
+
+        Precondition: envs is a bool array of shape (n,)
+        """
+        theirs = self.bolt_alive & ~self.bolt_player & envs[:, None]
+        if not theirs.any():
+            return np.zeros(self.size, dtype=bool)
+        x = self.ship_x[:, None]
+        y = SHIP_BOTTOM + SHIP_HEIGHT/2.0
+        half_w = SHIP_WIDTH/2.0
+        half_h = SHIP_HEIGHT/2.0
+        hx = (np.abs(self.bolt_left-x) < half_w) | \
+        (np.abs(self.bolt_left+BOLT_WIDTH-x) < half_w)
+        hy = (np.abs(self.bolt_bottom-y) < half_h) | \
+        (np.abs(self.bolt_bottom+BOLT_HEIGHT-y) < half_h)
+        hits = hx & hy & theirs
+        hit = hits.any(axis=1)
+        if hit.any():
+            first = np.where(hits, self.bolt_serial, \
+            np.iinfo(np.int64).max).min(axis=1)
+            self.expire(hit[:, None] & (self.bolt_serial >= first[:, None]))
+            self.lives[hit] -= 1
+        return hit
+
+    def newShip(self, envs):
+        """
+        Creates a new ship in each environment in envs.
+
+        Precondition: envs is a bool array of shape (n,)
+        """
+        self.ship_x[envs] = GAME_WIDTH/2
+        self.ship_alive[envs] = True
+        self.ship_frame[envs] = 0
+
+    # ALIEN HELPER METHODS
+    def moveAliens(self, hor_amount, vert_amount, speed, dt):
+        """
+        Moves each formation one step every speed seconds, marching down and
+        reversing direction at the edges.
+
+        Precondition: hor_amount is an int or float greater than or equal to 0
+        Precondition: vert_amount is an int or float greater than or equal to 0
+        Precondition: speed is an int or float
+        Precondition: dt is an int or float
+        """
+        step = self.time >= speed
+        if not step.any():
+            self.time += dt
+            return
+        full = self.count > 0
+        leftedge = self.leftEdge()
+        rightedge = self.rightEdge()
+        at_left = full & (leftedge <= ALIEN_H_SEP)
+        at_right = full & (rightedge >= (GAME_WIDTH - ALIEN_H_SEP - ALIEN_WIDTH))
+        near_left = full & ((leftedge - ALIEN_H_WALK) < ALIEN_H_SEP) & \
+        ~at_left
+        near_right = full & ((rightedge + ALIEN_WIDTH + ALIEN_H_WALK) > \
+        (GAME_WIDTH - ALIEN_H_SEP)) & ~at_right
+        rest = step.copy()
+        down_left = rest & at_right & ~self.moved
+        rest &= ~down_left
+        down_right = rest & at_left & ~self.moved
+        rest &= ~down_right
+        snap_right = rest & near_right
+        rest &= ~snap_right
+        snap_left = rest & near_left & ~self.moved
+        rest &= ~snap_left
+
+        down = down_left | down_right
+        self.origin_y[down] -= vert_amount
+        self.direction[down_left] = -1
+        self.direction[down_right] = 1
+        self.moved[down] = True
+        self.origin_x[snap_right] += (GAME_WIDTH - ALIEN_H_SEP - ALIEN_WIDTH - \
+        rightedge[snap_right])
+        self.origin_x[snap_left] += (ALIEN_H_SEP - leftedge[snap_left])
+        self.origin_x[rest] += self.direction[rest]*hor_amount
+        self.moved[rest] = False
+        self.time = np.where(step, 0, self.time + dt)
+
+    def leftEdge(self):
+        """
+        Returns a float array of the left edge of the leftmost living alien
+        in each environment (meaningless where there are none).
+        """
+        first = (self.colcount > 0).argmax(axis=1)
+        return self.origin_x + first*(ALIEN_H_SEP + ALIEN_WIDTH)
+
+    def rightEdge(self):
+        """
+        Returns a float array of the left edge of the rightmost living alien
+        in each environment (meaningless where there are none).
+        """
+        last = self._cols-1 - (self.colcount[:, ::-1] > 0).argmax(axis=1)
+        return self.origin_x + last*(ALIEN_H_SEP + ALIEN_WIDTH)
+
+    def bottomEdge(self):
+        """
+        Returns a float array of the top edge of the lowest living alien in
+        each environment (meaningless where there are none).
+        """
+        lowest = (self.rowcount > 0).argmax(axis=1)
+        return self.origin_y + lowest*(ALIEN_V_SEP + ALIEN_HEIGHT)
+
+    # BOLT HELPER METHODS
+    def shipBolts(self, fire):
+        """
+        Fires a player bolt where fire is True, the ship exists and there is
+        no other player bolt on screen, then removes bolts that have left the
+        window (in environments with a ship).
+
+        Precondition: fire is a bool array of shape (n,)
+        """
+        mine = (self.bolt_alive & self.bolt_player).any(axis=1)
+        shoot = fire & self.ship_alive & ~mine
+        if shoot.any():
+            self.fire(shoot, self.ship_x-(BOLT_WIDTH/2), \
+            np.full(self.size, SHIP_BOTTOM + SHIP_HEIGHT, dtype=float), \
+            BOLT_SPEED)
+            self.shots[shoot] += 1
+        gone = (self.bolt_bottom > GAME_HEIGHT) | \
+        (self.bolt_bottom + BOLT_HEIGHT < 0)
+        self.expire(gone & self.bolt_alive & self.ship_alive[:, None])
+
+    def alienBolts(self):
+        """
+        Fires a bolt from the bottom alien of a random non-empty column in
+        each environment once every random alien steps.
+
+        The column is chosen with the random stream of the environment,
+        exactly as in WaveSim.alienBolts.
+        """
+        self.moves[self.time == 0] += 1
+        due = np.flatnonzero(self.moves >= self.random)
+        if len(due) == 0:
+            return
+        shoot = np.zeros(self.size, dtype=bool)
+        lefts = np.zeros(self.size)
+        bottoms = np.zeros(self.size)
+        for e in due.tolist():
+            rng = self._rngs[e]
+            colcount = self.colcount[e]
+            row = None
+            while row is None and self.count[e] > 0:
+                col = rng.randint(0,self._cols-1)
+                if colcount[col]:
+                    row = int(self.alive[e, :, col].argmax())
+            if row is not None:
+                shoot[e] = True
+                lefts[e] = self.origin_x[e] + col*(ALIEN_H_SEP + ALIEN_WIDTH)
+                bottoms[e] = self.origin_y[e] + \
+                row*(ALIEN_V_SEP + ALIEN_HEIGHT) - ALIEN_HEIGHT - BOLT_HEIGHT
+            self.random[e] = rng.randint(1,self._rate)
+            self.moves[e] = 0
+        if shoot.any():
+            self.fire(shoot, lefts, bottoms, -BOLT_SPEED)
+
+    def moveBolts(self):
+        """
+        Moves each bolt at its velocity.
+        """
+        self.bolt_bottom += self.bolt_velocity
+
+    def alienCollisions(self):
+        """
+        Removes every alien hit by a player bolt, along with the bolt.
+
+        There is at most one player bolt per environment.  As in
+        Formation.hit, only the (at most four) cells under the corners of the
+        bolt are tested, bottom row first, left to right.
+        """
+        mine = self.bolt_alive & self.bolt_player
+        envs = np.flatnonzero(mine.any(axis=1))
+        if len(envs) == 0:
+            return
+        slot = mine[envs].argmax(axis=1)
+        left = self.bolt_left[envs, slot]
+        bottom = self.bolt_bottom[envs, slot]
+        origin_x = self.origin_x[envs]
+        origin_y = self.origin_y[envs]
+        pitch_x = ALIEN_H_SEP + ALIEN_WIDTH
+        pitch_y = ALIEN_V_SEP + ALIEN_HEIGHT
+        cols = [np.floor((left-origin_x)/pitch_x).astype(int), \
+        np.floor((left+BOLT_WIDTH-origin_x)/pitch_x).astype(int)]
+        rows = [np.floor((bottom-(origin_y-ALIEN_HEIGHT))/pitch_y).astype(int), \
+        np.floor((bottom+BOLT_HEIGHT-(origin_y-ALIEN_HEIGHT))/pitch_y).astype(int)]
+        half_w = ALIEN_WIDTH/2.0
+        half_h = ALIEN_HEIGHT/2.0
+        found = np.zeros(len(envs), dtype=bool)
+        hit_row = np.zeros(len(envs), dtype=int)
+        hit_col = np.zeros(len(envs), dtype=int)
+        for row in rows:
+            for col in cols:
+                ok = ~found & (row >= 0) & (row < self._rows) & (col >= 0) & \
+                (col < self._cols)
+                r = np.where(ok, row, 0)
+                c = np.where(ok, col, 0)
+                ok &= self.alive[envs, r, c]
+                cx = origin_x + c*pitch_x + half_w
+                cy = origin_y + r*pitch_y - half_h
+                ok &= ((np.abs(left-cx) < half_w) | \
+                (np.abs(left+BOLT_WIDTH-cx) < half_w)) & \
+                ((np.abs(bottom-cy) < half_h) | \
+                (np.abs(bottom+BOLT_HEIGHT-cy) < half_h))
+                hit_row[ok] = r[ok]
+                hit_col[ok] = c[ok]
+                found |= ok
+        if not found.any():
+            return
+        envs = envs[found]
+        r = hit_row[found]
+        c = hit_col[found]
+        self.alive[envs, r, c] = False
+        self.rowcount[envs, r] -= 1
+        self.colcount[envs, c] -= 1
+        self.count[envs] -= 1
+        gone = np.zeros(self.bolt_alive.shape, dtype=bool)
+        gone[envs, slot[found]] = True
+        self.expire(gone)
+
+    def fire(self, envs, left, bottom, velocity):
+        """
+        Adds a bolt to a free slot in each environment where envs is True.
+
+        The bolt in environment e has its bottom-left corner at (left[e],
+        bottom[e]).  If any of these environments has no free slot, every
+        environment gets twice the slots first.
+
+        Precondition: envs is a bool array of shape (n,)
+        Precondition: left, bottom are float arrays of shape (n,)
+        Precondition: velocity is a nonzero int or float
+        """
+        free = ~self.bolt_alive[envs]
+        if not free.any(axis=1).all():
+            self._grow()
+            free = ~self.bolt_alive[envs]
+        which = np.flatnonzero(envs)
+        slot = free.argmax(axis=1)
+        self.bolt_left[which, slot] = left[which]
+        self.bolt_bottom[which, slot] = bottom[which]
+        self.bolt_velocity[which, slot] = velocity
+        self.bolt_player[which, slot] = velocity > 0
+        self.bolt_alive[which, slot] = True
+        self.bolt_serial[which, slot] = self.next_serial[which]
+        self.next_serial[which] += 1
+
+    def expire(self, mask):
+        """
+        Removes every bolt whose slot is True in mask.
+
+        Precondition: mask is a bool array of shape (n, capacity)
+        """
+        self.bolt_alive[mask] = False
+        self.bolt_player[mask] = False
+        self.bolt_velocity[mask] = 0
+
+    def clearBolts(self, envs):
+        """
+        Removes every bolt in each environment where envs is True.
+
+        Precondition: envs is a bool array of shape (n,)
+        """
+        self.expire(envs[:, None] & self.bolt_alive)
+
+    # HIDDEN METHODS
+    def _grow(self):
+        """
+        Doubles the number of bolt slots in every environment.
+        """
+        n, old = self.bolt_alive.shape
+        self.bolt_left = np.concatenate((self.bolt_left, np.zeros((n, old))), \
+        axis=1)
+        self.bolt_bottom = np.concatenate((self.bolt_bottom, \
+        np.zeros((n, old))), axis=1)
+        self.bolt_velocity = np.concatenate((self.bolt_velocity, \
+        np.zeros((n, old))), axis=1)
+        self.bolt_player = np.concatenate((self.bolt_player, \
+        np.zeros((n, old), dtype=bool)), axis=1)
+        self.bolt_alive = np.concatenate((self.bolt_alive, \
+        np.zeros((n, old), dtype=bool)), axis=1)
+        self.bolt_serial = np.concatenate((self.bolt_serial, \
+        np.zeros((n, old), dtype=np.int64)), axis=1)
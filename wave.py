@@ -4,6 +4,11 @@ Subcontroller module for Alien Invaders
 This module contains the subcontroller to manage a single level or wave in
 the Alien Invaders game.
 
+The rules of the wave live in the headless class WaveSim (simulation.py).
+Wave is the adapter that mirrors the simulated state into game2d objects so
+that Invaders can draw it.  To draw a WaveSim on the CPU instead, for games
+with no window, see render.py.
+
 The samples provided in the assignment description were used.
 
 Author: Alec Galin (amg388)
@@ -12,7 +17,8 @@ Date: 12/09/2021
 from game2d import *
 from consts import *
 from models import *
-import random
+from simulation import WaveSim
+import numpy as np
 
 
 class Wave(object):
@@ -26,6 +32,11 @@ class Wave(object):
     loses). When the wave is complete, you  should create a NEW instance of
     Wave (in Invaders) if you want to make a new wave of aliens.
 
+    The game rules themselves are implemented by a WaveSim object, which
+    knows nothing about graphics.  Each time the wave is drawn, this class
+    first copies the simulated positions onto its Ship, Alien and Bolt
+    objects.
+
     If you want to pause the game, tell this controller to draw, but do not
     update.  See subcontrollers.py from Lecture 24 for an example.  This
     class will be similar to than one in how it interacts with the main class
@@ -40,68 +51,112 @@ class Wave(object):
 
     """
     # HIDDEN ATTRIBUTES:
-    # Attribute _ship: the player ship to control
-    # Invariant: _ship is a Ship object or None
+    # Attribute _sim: the headless simulation that owns the rules of the wave
+    # Invariant: _sim is a WaveSim object
+    #
+    # Attribute _ship: the sprite used to draw the player ship
+    # Invariant: _ship is a Ship object
     #
     # Attribute _aliens: the 2d list of aliens in the wave
-    # Invariant: _aliens is a rectangular 2d list containing Alien objects or
-    # None
+    # Invariant: _aliens is a rectangular 2d list with the same shape as the
+    # simulated grid, containing Alien objects or None where the simulated
+    # alien has been destroyed.  Each Alien is in the formation _formation,
+    # at its position when the wave began
     #
     # Attribute _bolts: the laser bolts currently on screen
-    # Invariant: _bolts is a list of Bolt objects, possibly empty
+    # Invariant: _bolts is a list of Bolt objects, possibly empty, one for
+    # each bolt in the simulation as of the last sync, in firing order.  It
+    # may be behind the simulation if _stale is True
     #
-    # Attribute _dline: the defensive line being protected
-    # Invariant : _dline is a GPath object
+    # Attribute _spares: Bolt objects that are not currently on screen
+    # Invariant: _spares is a dict mapping True (player) and False (alien) to
+    # lists of Bolt objects of that owner
+    #
+    # Attribute _boltslots: the BoltPool slot of each bolt in _bolts
+    # Invariant: _boltslots is a list of ints the same length as _bolts
     #
-    # Attribute _lives: the number of lives left
-    # Invariant: _lives is an int >= 0
+    # Attribute _stale: whether the simulation was updated since the last
+    # sync
+    # Invariant: _stale is a bool
     #
-    # Attribute _time: the amount of time since the last Alien "step"
-    # Invariant: _time is a float >= 0s
+    # Attribute _slotserials: the serial number of the bolt shown for each
+    # BoltPool slot
+    # Invariant: _slotserials is an int array with one entry per slot, -1
+    # where no bolt is shown
     #
-    # Attribute _direction: the direction the aliens are moving
-    # Invariant: _direction is either the string "left" or the string "right"
+    # Attribute _slotwanted: scratch space for syncBolts
+    # Invariant: _slotwanted is an int array the same size as _slotserials
     #
-    # Attribute _moved: a boolean that is true if _aliens moved down in the
-    # last Alien "step". Initalized as True.
-    # Invariant: _moved is either True or False
+    # Attribute _slotchanged: scratch space for syncBolts
+    # Invariant: _slotchanged is a bool array the same size as _slotserials
     #
-    # Attribute _otherbolts: a boolean that is true if there are any bolts
-    # fired by the player currently in the wave.
-    # Invariant: _otherbolts is either True or False
+    # Attribute _dline: the defensive line being protected
+    # Invariant : _dline is a GPath object
     #
-    # Attribute _random: a random number between 1 and BOLT_RATE from the
-    # module consts.
-    # Invariant: _random is an int such that 1 <= _random <= BOLT_RATE
+    # Attribute _batch: the renderer that draws the ship and bolts
+    # Invariant: _batch is a GBatch object
     #
-    # Attribute _moves: the number of Alien "steps" since the last bolt was
-    # fired. Initialized as -1.
-    # Invariant: _moves is an int such that -1 <= _random <= BOLT_RATE
+    # Attribute _formation: the renderer that draws the aliens
+    # Invariant: _formation is a GBatch object whose origin is how far the
+    # simulated formation has moved since the wave began
     #
-    # Attribute _animator: A coroutine to perform an animation
-    # Invariant: _animator is a generator-based coroutine or None
+    # Attribute _origin: the left and top of the bottom left alien when the
+    # wave began
+    # Invariant: _origin is a tuple of two floats
     #
-    # You may change any attribute above, as long as you update the invariant
-    # You may also add any new attributes as long as you document them.
-    # LIST MORE ATTRIBUTES (AND THEIR INVARIANTS) HERE IF NECESSARY
+    # Attribute _shown: the number of aliens in _formation
+    # Invariant: _shown is an int >= 0, or None if _formation must be
+    # refilled from _aliens
+    #
+    # Attribute _view: the view whose retained scene holds _dline, _formation
+    # and _batch
+    # Invariant: _view is a GView object, or None if the wave is not shown
+    #
+    # Attribute _lastx: the x coordinate of the ship before the last update
+    # Invariant: _lastx is a float, or None if there was no ship to move
+    #
+    # Attribute _lastbolts: the bolt pool before the last update
+    # Invariant: _lastbolts is a tuple of copies of the pool arrays bottom,
+    # alive and serial, or None before the first update.  The copies are
+    # refilled in place by each update, and only made again when the pool
+    # grows
 
     # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def getSim(self):
+        """
+        Returns _sim attribute.
+        """
+        return self._sim
+
     def getShip(self):
         """
-        Returns _ship attribute.
+        Returns _ship attribute, or None if the simulated ship is destroyed.
+
+        The ship is moved to the simulated ship first, if it has moved since
+        the last sync.
         """
+        if self._sim.getShip() is None:
+            return None
+        if self._stale:
+            self.syncShip()
         return self._ship
 
     def getAliens(self):
         """
-        Returns _aliens attribute.
+        Returns _aliens attribute, synced with the simulation first if it was
+        updated since the last sync.
         """
+        if self._stale:
+            self.sync()
         return self._aliens
 
     def getBolts(self):
         """
-        Returns _bolts attribute.
+        Returns _bolts attribute, synced with the simulation first if it was
+        updated since the last sync.
         """
+        if self._stale:
+            self.sync()
         return self._bolts
 
     def getDline(self):
@@ -112,60 +167,69 @@ class Wave(object):
 
     def getLives(self):
         """
-        Returns _lives attribute.
+        Returns the number of lives left.
         """
-        return self._lives
+        return self._sim.getLives()
 
     def getTime(self):
         """
-        Returns _time attribute.
+        Returns the amount of time since the last Alien "step".
         """
-        return self._time
+        return self._sim.getTime()
 
     # INITIALIZER (standard form) TO CREATE SHIP AND ALIEN
-    def __init__(self):
+    def __init__(self, seed=None):
         """
         Initializes a wave object.
+
+        The wave plays out exactly the same way every time it is given the
+        same seed and the same input.  If seed is None, it is seeded from the
+        system.
+
+        Precondition: seed is an int, or None
         """
+        self._sim = WaveSim(seed=seed)
         self._ship = Ship(bottom=SHIP_BOTTOM, x=GAME_WIDTH/2, width=SHIP_WIDTH,\
          height=SHIP_HEIGHT, source=SHIP_IMAGE, format=(2,4), frame=0)
+        formation = self._sim.getAliens()
+        self._origin = (float(formation.left[0,0]), float(formation.top[0,0]))
+        self._formation = GBatch()
         self._aliens  = self.aliens()
+        self._shown = None
         self._bolts = []
+        self._spares = {True: [], False: []}
+        self._boltslots = []
+        self._stale = False
+        self._slotserials = None
+        self._slotwanted = None
+        self._slotchanged = None
         self._dline = GPath(points=[0,DEFENSE_LINE,GAME_WIDTH,DEFENSE_LINE], \
         linewidth=2, linecolor='red')
-        self._lives = 3
-        self._time = 0
-        self._direction = 'right'
-        self._moved = True
-        self._otherbolts = False
-        self._random = random.randint(1,BOLT_RATE)
-        self._moves = -1
-        self._animator = None
+        self._lastx = None
+        self._lastbolts = None
+        self._batch = GBatch()
+        self._view = None
+        self.syncAliens()
 
     def aliens(self):
         """
-        Returns a 2d list of Alien instances applying relevant constants in the
-        module consts.
+        Returns a 2d list of Alien instances, one for each simulated alien.
+
+        The aliens are put in the formation _formation, which must not have
+        moved yet.
         """
+        formation = self._sim.getAliens()
+        lefts = formation.left.tolist()
+        tops = formation.top.tolist()
+        sprites = formation.sprite.tolist()
         all = []
-        top_start = GAME_HEIGHT - ALIEN_CEILING - ((ALIEN_ROWS-1)*ALIEN_HEIGHT)\
-         - ((ALIEN_ROWS-1)*ALIEN_V_SEP)
-        source_index = 0
-        for n in range(ALIEN_ROWS):
-            if n % 2 == 0 and n != 0:
-                if source_index == 2:
-                    source_index = 0
-                else:
-                    source_index += 1
-            source = ALIEN_IMAGES[source_index]
+        for n in range(formation.rows):
             row = []
-            left_start = ALIEN_H_SEP
-            for n in range(ALIENS_IN_ROW):
-                row.append(Alien(top=top_start, left=left_start, \
-                width=ALIEN_WIDTH, height=ALIEN_HEIGHT, source=source))
-                left_start += (ALIEN_H_SEP + ALIEN_WIDTH)
+            for i in range(formation.cols):
+                row.append(Alien(top=tops[n][i], left=lefts[n][i], \
+                width=ALIEN_WIDTH, height=ALIEN_HEIGHT, \
+                source=ALIEN_IMAGES[sprites[n][i]], formation=self._formation))
             all.append(row)
-            top_start += (ALIEN_V_SEP + ALIEN_HEIGHT)
 
         return all
 
@@ -175,523 +239,313 @@ class Wave(object):
         """
         Moves ship, aliens, and laser bolt.
 
+        Only the simulation is updated.  The drawable objects catch up with
+        it when the wave is next drawn (or its getters are called), so that
+        several updates in one frame cost a single sync.
+
         Precondition: ship_amount is an int or float
         Precondition: input is an instance of GInput
         Precondition: alien_amount is an int or float
         Precondition: speed is an int or float
         Precondition: dt is an int or float
         """
-        self.moveShip(ship_amount, input)
-        self.moveAliens(alien_hor_amount, alien_vert_amount, speed, dt)
-        self.shipBolts(input)
-        self.alienBolts()
-        self.moveBolts()
-        self.alienCollisions()
-        self.animateShip(dt)
-
-    # HELPER METHODS FOR UPDATE
-    # SHIP HELPER METHODS FOR UPDATE
-    def moveShip(self, amount, input):
-        """
-        Moves the _ship attribute amount to the right each time right key is
-        pressed.
-
-        Left key moves the _ship attribute amount to the left.
-
-        Precondition: amount is an int or float
-        Precondition: input is an instance of GInput
-        """
-        if self._ship == None or self._animator != None:
-            return
-        to_move = 0
-        if input.is_key_down("left") and (not self.shipAtLeftEdge()):
-            to_move -= amount
-        if input.is_key_down("right") and (not self.shipAtRightEdge()):
-            to_move += amount
-        if self.shipAtLeftEdge() or self.shipAtRightEdge():
-            self.moveShipToEdge()
-        self._ship.moveShip(to_move)
-
-    def shipAtLeftEdge(self):
-        """
-        Returns True if the attribute _ship is at the left edge of the window.
-
-        If _ship is None, the function returns False.
-        """
-        if self._ship == None:
-            return False
-
-        return self._ship.atLeftEdge()
-
-    def shipAtRightEdge(self):
-        """
-        Returns True if the attribute _ship is at the right edge of the window
-        as defined in consts.
-
-        If _ship is None, the function returns False.
-        """
-        if self._ship == None:
-            return False
-
-        return self._ship.atRightEdge()
-
-    def moveShipToEdge(self):
-        """
-        Moves ship to correct position at edge of the game window as defined in
-        the module consts.
-        """
-        try:
-            self._ship.moveToEdge()
-        except:
-            pass
-
-    def animateShip(self, dt):
-        """
-        Animates the ship.
-
-        Precondition: dt is an int or float greater than or equal to 0.
-        """
-        if not self._animator == None:
-            try:
-                self._animator.send(dt)
-            except StopIteration:
-                self._animator = None
-                self._ship = None
-        elif self.shipCollides():
-            self._animator = self._ship.animateExplosion()
-            next(self._animator)
+        ship = self._sim.getShip()
+        self._lastx = None if ship is None else ship.x
+        pool = self._sim.getBolts()
+        last = self._lastbolts
+        if last is None or len(last[0]) != pool.capacity:
+            self._lastbolts = (pool.bottom.copy(), pool.alive.copy(), \
+            pool.serial.copy())
+        else:
+            np.copyto(last[0], pool.bottom)
+            np.copyto(last[1], pool.alive)
+            np.copyto(last[2], pool.serial)
+        self._sim.update(ship_amount, input, alien_hor_amount, \
+        alien_vert_amount, speed, dt)
+        self._stale = True
 
     def newShip(self):
         """
         Creates a new ship.
         """
-        self._ship = Ship(bottom=SHIP_BOTTOM, x=GAME_WIDTH/2, \
-        width=SHIP_WIDTH, height=SHIP_HEIGHT, source=SHIP_IMAGE, format=(2,4), \
-        frame=0)
-
-    # ALIEN HELPER METHODS FOR UPDATE
-    def moveAliens(self, hor_amount, vert_amount, speed, dt):
-        """
-        Moves each alien in a 2d list of aliens hor_amount right after speed
-        seconds;
-        once aliens hit an edge, aliens move down and in the opposite direction.
-
-        Precondition: hor_amount is an int or float greater than or equal to 0
-        Precondition: ver_amount is an int or float greater than or equal to 0
-        Precondition: speed is an int or float
-        Precondition: dt is an int or float
-        """
-        if self._time >= speed:
-            if self.aliensAtRight() and self._moved == False:
-                self.moveAliensDown(vert_amount)
-                self._direction = 'left'
-                self._moved = True
-            elif self.aliensAtLeft() and self._moved == False:
-                self.moveAliensDown(vert_amount)
-                self._direction = 'right'
-                self._moved = True
-            elif self.aliensNearRight() and not self.aliensAtRight():
-                self.moveAliensToRightEdge()
-            elif self.aliensNearLeft() and not self.aliensAtLeft() and \
-            self._moved == False:
-                self.moveAliensToLeftEdge()
-            else:
-                if self._direction == 'right':
-                    self.moveAliensHorizontal(hor_amount)
-                    self._moved = False
-                elif self._direction == 'left':
-                    self.moveAliensHorizontal(-hor_amount)
-                    self._moved = False
-            self._time = 0
-        else:
-            self._time += dt
+        self._sim.newShip()
+        self._lastx = None
+        self.sync()
 
-    def moveAliensHorizontal(self, amount):
+    # SNAPSHOT METHODS
+    def snapshot(self):
         """
-        Moves each alien in a 2d list of aliens amount to the right. If amount
-        is negative, the aliens move |amount| left.
+        Returns a copy of the complete state of the wave, for restore.
 
-        Precondition: amount is an int or float.
+        The snapshot is taken from the simulation only (see WaveSim.snapshot),
+        so it holds no game2d objects and is cheap to make and to copy.
         """
-        for row in self._aliens:
-            for alien in row:
-                try:
-                    alien.moveHorizontal(amount)
-                except:
-                    pass
+        return self._sim.snapshot()
 
-    def moveAliensDown(self, amount):
+    def restore(self, state):
         """
-        Moves each alien in a 2d list of aliens amount down.
+        Puts the wave back in the state returned by snapshot.
 
-        Precondition: amount is an int or float greater than or equal to 0
+        Precondition: state was returned by snapshot on a wave of the same
+        size
         """
-        for row in self._aliens:
-                for alien in row:
-                    try:
-                        alien.moveVertical(-amount)
-                    except:
-                        pass
-
-    def checkEmpty(self):
-        """
-        Returns True if _aliens is empty.
-        """
-        if len(self._aliens) == 0:
-            return True
-        #checks if _aliens only contains None objects
-        num_of_aliens = 0
-        for row in self._aliens:
-            for alien in row:
-                if alien != None:
-                    num_of_aliens += 1
-        if num_of_aliens == 0:
-            return True
-
-        return False
+        self._sim.restore(state)
+        self._lastx = None
+        self._lastbolts = None
+        self._shown = None
+        self.hideBolts()
+        self.sync()
 
-    def checkEmptyRow(self, row):
+    # HELPER METHODS TO MIRROR THE SIMULATION
+    def sync(self):
         """
-        Returns True if list of Alien instances is empty.
-
-        Precondition: row is a list of Alien instances.
+        Copies the simulated ship, aliens and bolts onto the drawable objects.
         """
-        for n in range(len(row)):
-            none_count = 0
-            for alien in row:
-                if alien == None:
-                    none_count += 1
-            if none_count >= ALIENS_IN_ROW:
-                return True
+        self.syncShip()
+        self.syncAliens()
+        self.syncBolts()
+        self._stale = False
 
-    def leftMostAlien(self):
+    def syncShip(self):
         """
-        Returns list where first element is row of leftmost alien second
-        element is column of leftmost alien in that row.
+        Moves the Ship sprite to the simulated ship and shows its frame.
         """
-        if self.checkEmpty():
+        sim = self._sim.getShip()
+        if sim is None:
             return
-        farthest = {}
-        for n in range(len(self._aliens)):
-            if self.checkEmptyRow(self._aliens[n]):
-                continue
-            else:
-                row = self._aliens[n]
-                for i in range(len(row)):
-                    if row[i] == None:
-                        continue
-                    else:
-                        farthest[n] = i
-                        break
-        farthest_row = min(farthest, key=farthest.get)
-        column = farthest[farthest_row]
-
-        return [farthest_row,column]
-
-    def rightMostAlien(self):
-        """
-        Returns list where first element is row of rightmost alien second
-        element is column of rightmost alien in that row.
-        """
-        if self.checkEmpty():
+        if self._ship.x != sim.x:
+            self._ship.x = sim.x
+        if self._ship.bottom != sim.bottom:
+            self._ship.bottom = sim.bottom
+        if self._ship.frame != sim.frame:
+            self._ship.frame = sim.frame
+
+    def syncAliens(self):
+        """
+        Moves the formation to the simulated aliens, dropping dead ones.
+
+        The aliens never move within the formation, so marching them is just
+        a move of _formation.  The aliens themselves are only looked at when
+        some have died (or been brought back to life by restore, which gets
+        them new Alien images).
+        """
+        formation = self._sim.getAliens()
+        dx = float(formation.left[0,0]) - self._origin[0]
+        dy = float(formation.top[0,0]) - self._origin[1]
+        if self._formation.x != dx:
+            self._formation.x = dx
+        if self._formation.y != dy:
+            self._formation.y = dy
+        if self._shown == formation.count():
             return
-        farthest = {}
-        for n in range(len(self._aliens)):
-            if self.checkEmptyRow(self._aliens[n]):
-                continue
-            else:
-                row = self._aliens[n][::-1]
-                for i in range(len(row)):
-                    if row[i] == None:
-                        continue
-                    else:
-                        farthest[n] = len(row) - i - 1
-                        break
-        farthest_row = max(farthest, key=farthest.get)
-        column = farthest[farthest_row]
-
-        return [farthest_row,column]
-
-    def aliensAtLeft(self):
-        """
-        Returns True if _aliens are at left edge. Else returns False.
-        """
-        if self.checkEmpty():
-            return False
-        leftmost = self.leftMostAlien()
-        leftmost_row = leftmost[0]
-        column = leftmost[1]
-        if self._aliens[leftmost_row][column].atLeftEdge():
-            return True
-
-        return False
-
-    def aliensAtRight(self):
-        """
-        Returns True if _aliens are at right edge. Else returns False.
-        """
-        if self.checkEmpty():
-            return False
-        rightmost = self.rightMostAlien()
-        rightmost_row = rightmost[0]
-        column = rightmost[1]
-        if self._aliens[rightmost_row][column].atRightEdge():
-            return True
-
-        return False
-
-    def aliensNearLeft(self):
-        """
-        Returns True if leftmost alien in _aliens in ALIEN_H_SEP away or less
-        from left edge. Else returns False.
-        """
-        if self.checkEmpty():
-            return False
-        leftmost = self.leftMostAlien()
-        leftmost_row = leftmost[0]
-        column = leftmost[1]
-        if self._aliens[leftmost_row][column].nearLeftEdge():
-            return True
-
-        return False
-
-    def aliensNearRight(self):
-        """
-        Returns True if rightmost alien in _aliens is ALIEN_H_SEP away or less
-        from left edge. Else returns False.
-        """
-        if self.checkEmpty():
-            return False
-        rightmost = self.rightMostAlien()
-        rightmost_row = rightmost[0]
-        column = rightmost[1]
-        if self._aliens[rightmost_row][column].nearRightEdge():
-            return True
-
-        return False
-
-    def aliensAtEdge(self):
-        """
-        Returns True if _aliens are at left or right edge. Else returns False.
-        """
-        if self.checkEmpty():
-            return False
-        try:
-            if self.aliensAtLeft() or self.aliensAtRight():
-                return True
-        except:
-            pass
-
-        return False
 
-    def moveAliensToLeftEdge(self):
-        """
-        Moves 2D list of Aliens to left edge.
-        """
-        if self.checkEmpty():
-            return
-        leftmost = self.leftMostAlien()
-        leftmost_row = leftmost[0]
-        column = leftmost[1]
-        distance_to_move = self._aliens[leftmost_row][column].getLeft() - \
-        ALIEN_H_SEP
+        lefts = formation.left.tolist()
+        tops = formation.top.tolist()
+        alive = formation.alive.tolist()
+        for n in range(len(self._aliens)):
+            row = self._aliens[n]
+            for i in range(len(row)):
+                if row[i] is None and alive[n][i]:
+                    row[i] = Alien(top=tops[n][i]-dy, left=lefts[n][i]-dx, \
+                    width=ALIEN_WIDTH, height=ALIEN_HEIGHT, \
+                    source=ALIEN_IMAGES[int(formation.sprite[n,i])], \
+                    formation=self._formation)
+                elif not alive[n][i]:
+                    row[i] = None
+        objects = []
         for row in self._aliens:
-            for alien in row:
-                try:
-                    alien.moveHorizontal(-distance_to_move)
-                except:
-                    pass
-
-    def moveAliensToRightEdge(self):
-        """
-        Moves 2D list of Aliens to right edge.
+            objects.extend(row)
+        self._formation.update(objects)
+        self._shown = formation.count()
+
+    def syncBolts(self):
+        """
+        Updates _bolts to match the simulated bolts, reusing Bolt objects.
+
+        Only bolts fired or expired since the last sync are added to or
+        removed from _bolts; the rest are just moved.  The slots that changed
+        are found by comparing serial numbers in preallocated arrays, so a
+        sync with no shots fired allocates nothing per bolt.
+        """
+        pool = self._sim.getBolts()
+        if self._slotserials is None or \
+        len(self._slotserials) != pool.capacity:
+            self._resizeSlots(pool.capacity)
+
+        wanted = self._slotwanted
+        wanted.fill(-1)
+        np.copyto(wanted, pool.serial, where=pool.alive)
+        np.not_equal(wanted, self._slotserials, out=self._slotchanged)
+        if self._slotchanged.any():
+            changed = np.flatnonzero(self._slotchanged).tolist()
+            fired = []
+            for slot in changed:
+                if self._slotserials[slot] >= 0:
+                    index = self._boltslots.index(slot)
+                    bolt = self._bolts.pop(index)
+                    del self._boltslots[index]
+                    self._spares[bolt.isPlayerBolt()].append(bolt)
+                if wanted[slot] >= 0:
+                    fired.append(slot)
+            fired.sort(key=lambda slot: pool.serial[slot])
+            for slot in fired:
+                self._bolts.append(self.newBolt(slot))
+                self._boltslots.append(slot)
+            np.copyto(self._slotserials, wanted)
+
+        bottoms = pool.bottom
+        for n in range(len(self._bolts)):
+            bottom = float(bottoms[self._boltslots[n]])
+            bolt = self._bolts[n]
+            if bolt.getBottom() != bottom:
+                bolt.bottom = bottom
+
+    def hideBolts(self):
+        """
+        Empties _bolts, keeping its Bolt objects as spares.
+
+        The next sync shows every simulated bolt again, in firing order.
         """
-        if self.checkEmpty():
+        for bolt in self._bolts:
+            self._spares[bolt.isPlayerBolt()].append(bolt)
+        del self._bolts[:]
+        del self._boltslots[:]
+        if self._slotserials is not None:
+            self._slotserials.fill(-1)
+
+    def newBolt(self, slot):
+        """
+        Returns a Bolt object for the simulated bolt in slot, reusing a spare
+        one of the same owner if there is one.
+
+        Precondition: slot is a BoltPool slot holding a bolt
+        """
+        pool = self._sim.getBolts()
+        player = bool(pool.player[slot])
+        left = float(pool.left[slot])
+        bottom = float(pool.bottom[slot])
+        spares = self._spares[player]
+        if not spares:
+            color = 'yellow' if player else 'purple'
+            return Bolt(bottom=bottom, left=left, width=BOLT_WIDTH, \
+            height=BOLT_HEIGHT, linecolor=color, fillcolor=color, \
+            velocity=BOLT_SPEED if player else -BOLT_SPEED)
+        bolt = spares.pop()
+        if bolt.getLeft() != left:
+            bolt.left = left
+        if bolt.getBottom() != bottom:
+            bolt.bottom = bottom
+        return bolt
+
+    def _resizeSlots(self, capacity):
+        """
+        Makes the slot arrays fit a pool of the given capacity.
+
+        Bolts shown in slots that are kept stay shown.  This only happens
+        when the pool grows (or the first time bolts are synced).
+
+        Precondition: capacity is an int > 0
+        """
+        serials = np.full(capacity, -1, dtype=np.int64)
+        if self._slotserials is not None:
+            keep = min(capacity, len(self._slotserials))
+            serials[:keep] = self._slotserials[:keep]
+        self._slotserials = serials
+        self._slotwanted = np.empty(capacity, dtype=np.int64)
+        self._slotchanged = np.empty(capacity, dtype=bool)
+
+    def interpolate(self, alpha):
+        """
+        Moves the ship and bolts alpha of the way from their positions before
+        the last update to their current ones.
+
+        The aliens are not interpolated, since they march in discrete steps.
+        Bolts fired in the last update are drawn where they are.
+
+        Precondition: alpha is a float in 0..1
+        """
+        sim = self._sim.getShip()
+        if sim is not None and self._lastx is not None:
+            self._ship.x = self._lastx + alpha*(sim.x - self._lastx)
+        if self._lastbolts is None:
             return
-        rightmost = self.rightMostAlien()
-        rightmost_row = rightmost[0]
-        column = rightmost[1]
-        distance_to_move = GAME_WIDTH - ALIEN_H_SEP - \
-        self._aliens[rightmost_row][column].getLeft() - ALIEN_WIDTH
-        for row in self._aliens:
-            for alien in row:
-                try:
-                    alien.moveHorizontal(distance_to_move)
-                except:
-                    pass
+        bottoms, alive, serials = self._lastbolts
+        pool = self._sim.getBolts()
+        for bolt, slot in zip(self._bolts, self._boltslots):
+            if slot < len(alive) and alive[slot] and \
+            serials[slot] == pool.serial[slot]:
+                last = float(bottoms[slot])
+                bolt.bottom = last + alpha*(float(pool.bottom[slot]) - last)
 
-    # BOLT HELPER METHODS FOR UPDATE
-    def shipBolts(self, input):
+    # DRAW METHOD TO DRAW THE SHIP, ALIENS, DEFENSIVE LINE AND BOLTS
+    def draw(self, view, alpha=1.0):
         """
-        Shoots bolts out of the ship if the up key is pressed.
-
-        Bolts are removed if they reach higher than GAME_HEGHT defined in the
-        module consts.
+        Draws the wave in view, alpha of the way between the last two updates.
 
-        Bolts can only be fired if there are no other player bolts on the
-        screen.
-
-        Precondition: input is a valid instance of GInput
-        """
-        if self._ship == None:
-            return
-        otherbolts = False
-        if input.is_key_down('up'):
-            for bolt in self._bolts:
-                if bolt.isPlayerBolt():
-                    otherbolts = True
-            if otherbolts == False:
-                self._bolts.append(Bolt(bottom = (self._ship.getBottom() + \
-                SHIP_HEIGHT), left = (self._ship.getX()-(BOLT_WIDTH/2)), width \
-                = BOLT_WIDTH, height = BOLT_HEIGHT, linecolor = 'yellow', \
-                fillcolor = 'yellow', velocity = BOLT_SPEED))
-        too_high_removed = []
-        for bolt in self._bolts:
-            if bolt.getBottom() <= GAME_HEIGHT:
-                too_high_removed.append(bolt)
-        self._bolts = too_high_removed
-
-    def alienBolts(self):
-        """
-        Shoots bolts from the bottom row of a random column of self._aliens.
-
-        Bolts are shot at random rate such that 1 <= the number of alien steps
-        between bolt firings <= BOLT_RATE (as defined in the modules consts).
-        """
-        if self._time == 0:
-            self._moves += 1
-        if self._moves >= self._random:
-            #only fire from non empty column
-            all_none = True
-            while all_none:
-                none_count = 0
-                randcolumn = random.randint(0,ALIENS_IN_ROW-1)
-                for row in self._aliens:
-                    if row[randcolumn] == None:
-                        none_count += 1
-                if none_count < ALIEN_ROWS:
-                    all_none = False
-                else:
-                    pass
-            #make alien in last row that's not none shoot bolt
-            for n in range(len(self._aliens)):
-                if self._aliens[n][randcolumn] != None:
-                    self._bolts.append(Bolt(bottom = (self._aliens[n]\
-                    [randcolumn].getTop() - ALIEN_HEIGHT - BOLT_HEIGHT),\
-                    left = self._aliens[n][randcolumn].getLeft(), width = \
-                    BOLT_WIDTH, height = BOLT_HEIGHT, linecolor = 'purple', \
-                    fillcolor = 'purple', velocity = -BOLT_SPEED))
-                    break
-            self._random = random.randint(1,BOLT_RATE)
-            self._moves = 0
-
-    def moveBolts(self):
-        """
-        Moves each Bolt instance in _bolts at the proper velocity.
-        """
-        for bolt in self._bolts:
-            bolt.moveVertical(bolt.getVelocity())
+        The aliens are drawn by one GBatch, and the ship and bolts by another,
+        so each image (and each bolt color) takes a single draw call.  The
+        defensive line is drawn first; nothing else ever overlaps it except
+        the bolts, which were drawn over it anyway.
 
-    # DRAW METHOD TO DRAW THE SHIP, ALIENS, DEFENSIVE LINE AND BOLTS
-    def draw(self, view):
-        """
-        Draws the wave in view.
+        The line and the batches are added to the retained scene of view the
+        first time the wave is drawn, and stay there until hide is called.
+        After that, drawing syncs the objects with the simulation (once, no
+        matter how many updates there were since the last frame) and refills
+        the batch of the ship and bolts.  Nothing is added to view.
 
         Precondition: view is a valid instance of GView
+        Precondition: alpha is a float in 0..1
         """
-        try:
-            self._ship.draw(view)
-        except AttributeError:
-            pass
-        for row in self._aliens:
-            for alien in row:
-                try:
-                    alien.draw(view)
-                except:
-                    pass
-        self._dline.draw(view)
-        for bolt in self._bolts:
-            bolt.draw(view)
+        if self._view is not view:
+            self.hide()
+            view.add(self._dline)
+            view.add(self._formation)
+            view.add(self._batch)
+            self._view = view
+        self.sync()
+        if alpha < 1:
+            self.interpolate(alpha)
+        self._batch.update([self.getShip()]+self._bolts)
 
-    # HELPER METHODS FOR COLLISION DETECTION
-    def alienCollisions(self):
+    def hide(self):
         """
-        Replaces an Alien instance with None if it collides with a player bolt.
+        Takes the wave out of the view it was drawn to, if any.
 
-        A player bolt is also removed if it collides with an Alien instance
+        Call this before dropping a wave that has been drawn, since the view
+        keeps drawing it until it is removed.
         """
-        for n in range(len(self._aliens)):
-            for i in range(len(self._aliens[n])):
-                new_bolts = []
-                for bolt in self._bolts:
-                    try:
-                        if self._aliens[n][i].collides(bolt):
-                            self._aliens[n][i] = None
-                        else:
-                            new_bolts.append(bolt)
-                    except:
-                        new_bolts.append(bolt)
-                self._bolts = new_bolts
-
-    def shipCollides(self):
-        """
-        Returns True is the ship collides with a bolt. Else returns False.
-
-        Removes bolt if ship collides with it and lowers _lives by 1.
-        """
-        collision = False
-        if self._ship == None:
-            return False
-        new_bolts = []
-        for bolt in self._bolts:
-            if self._ship.collides(bolt):
-                collision = True
-                break
-            else:
-                new_bolts.append(bolt)
-        self._bolts = new_bolts
-        if collision == True:
-            self._lives -= 1
-
-        return collision
+        if self._view is not None:
+            self._view.remove(self._dline)
+            self._view.remove(self._formation)
+            self._view.remove(self._batch)
+            self._view = None
 
     # MISC METHODS
     def wonGame(self):
         """
         Returns True if there are no aliens left. Else Returns False
         """
-        if self.checkEmpty():
-            self.clearBolts()
+        if self._sim.wonGame():
+            self.syncBolts()
             return True
 
         return False
 
-
     def aliensCross(self):
         """
         Returns True if any Alien instance crosses the defense line.
         """
-        for row in self._aliens:
-            for alien in row:
-                try:
-                    if (alien.getTop() - ALIEN_HEIGHT) <= DEFENSE_LINE:
-                        return True
-                except:
-                    pass
-
-        return False
+        return self._sim.aliensCross()
 
     def moreLives(self):
         """
         Returns True if _lives is greater than 0. Else returns False.
         """
-        if self._lives > 0:
-            return True
-
-        return False
+        return self._sim.moreLives()
 
     def clearBolts(self):
         """
-        Sets the _bolt attribute to an empty list.
+        Removes every laser bolt from the wave.
         """
-        self._bolts.clear()
+        self._sim.clearBolts()
+        self.syncBolts()